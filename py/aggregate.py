@@ -0,0 +1,144 @@
+"""Merge every session's results into per-condition summaries.
+
+Finds <TRIGGER>_<ACTION>_<HHMMSS>_measure.txt files, parses them across a process
+pool and groups rounds by trigger / action / background level (office, game,
+stock: taken from the path column). Parsed files are remembered in an index, so
+a re-run only reads files that are new or changed.
+
+    python py/aggregate.py [ROOT ...] [--out DIR] [--workers N]
+
+Outputs (in --out): summary.csv, merged.csv, index.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Tuple
+import argparse, json, os, re, statistics, sys
+
+from constant import OPTIONS
+from measure import read_results
+
+_NAME = re.compile(r"^(?P<trigger>[^_]+)_(?P<action>[^_]+)_(?P<hhmmss>\d{6})_(?P<rest>.+)$")
+_LEVEL = re.compile(r"assets[\\/]([^\\/]+)[\\/]")
+
+MERGED_COLUMNS = ("session", "trigger", "action", "level", "round", "time_ms", "clicks", "path")
+SUMMARY_COLUMNS = ("trigger", "action", "level", "sessions", "rounds",
+                   "time_mean", "time_sd", "time_median", "time_p90", "clicks_mean")
+
+_INLINE_MAX = 8  # below this many files a process pool costs more than it saves
+
+
+def discover(roots: List[str], filename: str = OPTIONS["FILENAME"]) -> List[Path]:
+    found = []
+    for root in roots:
+        for p in Path(root).rglob(f"*_{filename}"):
+            if p.is_file() and _NAME.match(p.name):
+                found.append(p)
+    return sorted(found)
+
+
+def level_of(path: str) -> str:
+    m = _LEVEL.search(path)
+    return m.group(1) if m else "unknown"
+
+
+def parse_session(path: str) -> List[list]:
+    """One results file -> merged rows (runs in a worker process)."""
+    m = _NAME.match(Path(path).name)
+    trigger, action = (m.group("trigger"), m.group("action")) if m else ("unknown", "unknown")
+    return [[path, trigger, action, level_of(bg), r, t, c, bg]
+            for r, t, c, bg in read_results(path)]
+
+
+def _stamp(p: Path) -> Tuple[int, int]:
+    st = p.stat()
+    return st.st_size, st.st_mtime_ns
+
+
+def load_index(path: Path) -> Dict[str, dict]:
+    if not path.exists():
+        return {}
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def update_index(index: Dict[str, dict], files: List[Path], workers: int) -> int:
+    """Parse new/changed files into index (in place); returns how many were read."""
+    todo = []
+    for p in files:
+        key = str(p)
+        size, mtime = _stamp(p)
+        ent = index.get(key)
+        if ent is None or ent["size"] != size or ent["mtime_ns"] != mtime:
+            todo.append((key, size, mtime))
+    keys = [t[0] for t in todo]
+    if len(keys) > _INLINE_MAX and workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            chunk = max(1, len(keys) // (workers * 4))
+            for (key, size, mtime), rows in zip(todo, pool.map(parse_session, keys, chunksize=chunk)):
+                index[key] = {"size": size, "mtime_ns": mtime, "rows": rows}
+    else:
+        for key, size, mtime in todo:
+            index[key] = {"size": size, "mtime_ns": mtime, "rows": parse_session(key)}
+    # forget files that disappeared
+    live = {str(p) for p in files}
+    for key in [k for k in index if k not in live]:
+        del index[key]
+    return len(todo)
+
+
+def summarize(index: Dict[str, dict]) -> List[list]:
+    groups: Dict[Tuple[str, str, str], dict] = {}
+    for key, ent in index.items():
+        for _, trigger, action, level, _, t, c, _ in ent["rows"]:
+            g = groups.setdefault((trigger, action, level), {"sessions": set(), "t": [], "c": []})
+            g["sessions"].add(key)
+            g["t"].append(t)
+            g["c"].append(c)
+    out = []
+    for (trigger, action, level), g in sorted(groups.items()):
+        ts = sorted(g["t"])
+        n = len(ts)
+        p90 = ts[min(n - 1, int(round(0.9 * (n - 1))))]
+        out.append([trigger, action, level, len(g["sessions"]), n,
+                    statistics.fmean(ts), statistics.stdev(ts) if n > 1 else 0.0,
+                    statistics.median(ts), p90, statistics.fmean(g["c"])])
+    return out
+
+
+def _write_csv(path: Path, header, rows) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        for row in rows:
+            f.write(",".join(f"{v:.3f}" if isinstance(v, float) else str(v) for v in row) + "\n")
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("roots", nargs="*", default=[OPTIONS["DIR"]])
+    ap.add_argument("--out", default="aggregate")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    index_path = out / "index.json"
+
+    files = discover(args.roots)
+    index = load_index(index_path)
+    n_read = update_index(index, files, args.workers)
+    with index_path.open("w", encoding="utf-8") as f:
+        json.dump(index, f)
+
+    _write_csv(out / "merged.csv", MERGED_COLUMNS,
+               (row for key in sorted(index) for row in index[key]["rows"]))
+    summary = summarize(index)
+    _write_csv(out / "summary.csv", SUMMARY_COLUMNS, summary)
+    print(f"{len(files)} sessions ({n_read} read), {len(summary)} conditions -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,162 @@
+"""Pointing metrics over recorded rounds, batched in NumPy.
+
+All rounds of one or more sessions are concatenated into flat columns with a
+per-sample round index, and every metric is a handful of vectorized passes over
+those columns (no per-point Python loops).
+
+    python py/analytics.py <results.txt> [...]
+"""
+from pathlib import Path
+from typing import Dict, Iterable, List
+import sys
+
+import numpy as np
+
+import trajectory
+from measure import read_results
+
+MOVE_EPS_PX = 2.0          # displacement that counts as "moved"
+SUBMOVE_FRAC = 0.2         # submovement = speed rising above this fraction of the round's peak
+MIN_DT_S = 0.0005          # floor for sample spacing (coalesced / equal timestamps)
+
+METRICS = ("path_len", "efficiency", "peak_v", "submovements", "t_first_move_ms", "t_toggle_ms")
+
+
+def traj_dir_for(results_path: str | Path) -> Path:
+    p = Path(results_path)
+    return p.parent / (p.stem + "_traj")
+
+
+def load_results(results_path: str | Path) -> Dict[str, np.ndarray]:
+    """Results CSV as columns: round, time_ms, clicks, path."""
+    rows = read_results(str(results_path))
+    return {
+        "round": np.array([r[0] for r in rows], dtype=np.int32),
+        "time_ms": np.array([r[1] for r in rows], dtype=np.float64),
+        "clicks": np.array([r[2] for r in rows], dtype=np.int32),
+        "path": np.array([r[3] for r in rows], dtype=object),
+    }
+
+
+def load_trajectories(files: Iterable[str | Path]) -> Dict[str, np.ndarray]:
+    """Concatenate .trj files into flat columns plus `rid` (index into `round`/`t0_ns`)."""
+    cols: Dict[str, List[np.ndarray]] = {name: [] for name, _ in trajectory.COLUMNS}
+    rounds, t0s, rids = [], [], []
+    for i, f in enumerate(files):
+        d = trajectory.load_round(f)
+        rounds.append(d["round"])
+        t0s.append(d["t0_ns"])
+        for name, _ in trajectory.COLUMNS:
+            cols[name].append(np.frombuffer(d[name], dtype=d[name].typecode))
+        rids.append(np.full(d["n"], i, dtype=np.int32))
+    out = {name: (np.concatenate(v) if v else np.empty(0)) for name, v in cols.items()}
+    out["rid"] = np.concatenate(rids) if rids else np.empty(0, dtype=np.int32)
+    out["round"] = np.array(rounds, dtype=np.int32)
+    out["t0_ns"] = np.array(t0s, dtype=np.int64)
+    return out
+
+
+def _first_per_round(rid: np.ndarray, mask: np.ndarray, values: np.ndarray, n_rounds: int) -> np.ndarray:
+    """values at the first masked sample of every round (NaN if none); rid must be sorted."""
+    out = np.full(n_rounds, np.nan)
+    r = rid[mask]
+    if r.size:
+        uniq, first = np.unique(r, return_index=True)
+        out[uniq] = values[mask][first]
+    return out
+
+
+def compute_metrics(tr: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+    """Per-round metrics for the rounds in `tr` (see load_trajectories)."""
+    R = len(tr["round"])
+    out = {"round": tr["round"]}
+    rid = tr["rid"]
+    kind = tr["kind"]
+    t_ns = tr["t_ns"].astype(np.int64)
+    t0 = tr["t0_ns"]
+
+    # ---- pointer samples (moves + presses/releases carry a position) ----
+    pm = kind != trajectory.TOGGLE
+    prid = rid[pm]
+    x = tr["x"][pm].astype(np.float64)
+    y = tr["y"][pm].astype(np.float64)
+    pt = t_ns[pm]
+    pkind = kind[pm]
+
+    # segments between consecutive samples of the same round
+    same = prid[1:] == prid[:-1]
+    seg = np.hypot(np.diff(x), np.diff(y))
+    dt = np.maximum(np.diff(pt) / 1e9, MIN_DT_S)
+    seg_rid = prid[1:][same]
+    seg = seg[same]
+    speed = seg / dt[same]
+
+    path_len = np.bincount(seg_rid, weights=seg, minlength=R)
+    peak_v = np.zeros(R)
+    np.maximum.at(peak_v, seg_rid, speed)
+
+    # straightness: start -> click distance over travelled path
+    start_x = _first_per_round(prid, np.ones_like(prid, dtype=bool), x, R)
+    start_y = _first_per_round(prid, np.ones_like(prid, dtype=bool), y, R)
+    press = pkind == trajectory.PRESS
+    # last press of each round = first press of the reversed arrays
+    rev = slice(None, None, -1)
+    end_x = _first_per_round(prid[rev], press[rev], x[rev], R)
+    end_y = _first_per_round(prid[rev], press[rev], y[rev], R)
+    straight = np.hypot(end_x - start_x, end_y - start_y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        efficiency = np.where(path_len > 0, straight / path_len, np.nan)
+
+    # submovements: upward crossings of SUBMOVE_FRAC * peak speed
+    thr = SUBMOVE_FRAC * peak_v[seg_rid]
+    above = speed > thr
+    rising = above.copy()
+    rising[1:] &= ~(above[:-1] & (seg_rid[1:] == seg_rid[:-1]))
+    submovements = np.bincount(seg_rid[rising], minlength=R)
+
+    # time to first move: first sample displaced MOVE_EPS_PX from the round's start position
+    moved = (pkind == trajectory.MOVE) & (np.hypot(x - start_x[prid], y - start_y[prid]) >= MOVE_EPS_PX)
+    t_first_move = (_first_per_round(prid, moved, pt.astype(np.float64), R) - t0) / 1e6
+
+    # time to toggle: first TOGGLE row switching the cursor on
+    on = (kind == trajectory.TOGGLE) & (tr["toggle"] == 1)
+    t_toggle = (_first_per_round(rid, on, t_ns.astype(np.float64), R) - t0) / 1e6
+
+    out.update(path_len=path_len, efficiency=efficiency, peak_v=peak_v,
+               submovements=submovements, t_first_move_ms=t_first_move, t_toggle_ms=t_toggle)
+    return out
+
+
+def analyze_session(results_path: str | Path) -> Dict[str, np.ndarray]:
+    """Results rows joined with their trajectory metrics (NaN where no .trj exists)."""
+    res = load_results(results_path)
+    files = sorted(traj_dir_for(results_path).glob("round_*.trj"))
+    met = compute_metrics(load_trajectories(files))
+
+    n = len(res["round"])
+    pos = {int(r): i for i, r in enumerate(met["round"])}
+    idx = np.array([pos.get(int(r), -1) for r in res["round"]], dtype=np.int64)
+    have = idx >= 0
+    for name in METRICS:
+        col = np.full(n, np.nan)
+        col[have] = met[name][idx[have]]
+        res[name] = col
+    return res
+
+
+def main(argv: List[str]) -> int:
+    if not argv:
+        print(__doc__.strip().splitlines()[-1].strip())
+        return 2
+    cols = ("round", "time_ms", "clicks") + METRICS + ("path",)
+    print(",".join(cols))
+    for results_path in argv:
+        res = analyze_session(results_path)
+        for i in range(len(res["round"])):
+            print(",".join(f"{res[c][i]:.3f}" if isinstance(res[c][i], float) else str(res[c][i])
+                           for c in cols))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,199 @@
+"""Headless micro-benchmarks of the hot paths (runs under QT_QPA_PLATFORM=offscreen).
+
+    python py/bench.py [--out results.json] [--baseline base.json] [--tolerance 0.25]
+
+Each case reports per-call mean/p50/p95 in microseconds as JSON. With --baseline,
+cases whose p50 got slower than (1 + tolerance) x baseline are listed and the exit
+status is 1.
+"""
+from pathlib import Path
+from typing import Callable, Dict
+import argparse, json, os, sys, tempfile, time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+# Demo resolves ./py/assets relative to the repo root (main() changes to it)
+_ROOT = Path(__file__).resolve().parent.parent
+
+from PyQt6 import QtWidgets, QtCore, QtGui
+from PyQt6.QtCore import Qt, QEvent
+
+
+def timeit(fn: Callable[[int], None], n: int, warmup: int = 20) -> Dict[str, float]:
+    for i in range(warmup):
+        fn(i)
+    samples = []
+    for i in range(n):
+        t0 = time.perf_counter_ns()
+        fn(i)
+        samples.append(time.perf_counter_ns() - t0)
+    return summary_ns(samples)
+
+
+def summary_ns(samples: list) -> Dict[str, float]:
+    ns = sorted(samples)
+    n = len(ns)
+    return {"n": n,
+            "mean_us": sum(ns) / n / 1e3,
+            "p50_us": ns[n // 2] / 1e3,
+            "p95_us": ns[min(n - 1, int(0.95 * n))] / 1e3}
+
+
+def _mouse(x: float, y: float, et=QEvent.Type.MouseMove, button=Qt.MouseButton.NoButton):
+    # synthetic events carry timestamp 0 -> the toggler falls back to the monotonic clock
+    p = QtCore.QPointF(x, y)
+    return QtGui.QMouseEvent(et, p, p, button, button, Qt.KeyboardModifier.NoModifier)
+
+
+def run(quick: bool = False) -> Dict[str, Dict[str, float]]:
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    import measure, toggle
+    from constant import OPTIONS
+    from cursor import Demo, _ClickFilter, _TRAJ_KINDS
+    from dispatch import EventDispatcher
+
+    n = 200 if quick else 2000
+    out: Dict[str, Dict[str, float]] = {}
+    tmp = Path(tempfile.mkdtemp(prefix="cursor-bench-"))
+    measure.setup_measure(10**6, out_path=str(tmp / "bench_measure.txt"))
+    target = QtWidgets.QWidget()
+
+    # ---- CursorToggle.eventFilter: key stream (press + release) ----
+    kt = toggle.get_toggler(dict(OPTIONS, TRIGGER="spacebar", ACTION="big-size"), app)
+    press = QtGui.QKeyEvent(QEvent.Type.KeyPress, Qt.Key.Key_Space, Qt.KeyboardModifier.NoModifier)
+    release = QtGui.QKeyEvent(QEvent.Type.KeyRelease, Qt.Key.Key_Space, Qt.KeyboardModifier.NoModifier)
+    out["toggle.key_press_release"] = timeit(
+        lambda i: (kt.eventFilter(target, press), kt.eventFilter(target, release)), n)
+
+    # ---- CursorToggle.eventFilter: 1000 Hz shake stream ----
+    st = toggle.get_toggler(dict(OPTIONS, TRIGGER="shake", ACTION="big-size"), app)
+    moves = [_mouse(500 + (300 if (i // 20) % 2 else -300) * ((i % 20) / 20), 400 + i % 7) for i in range(4000)]
+    out["toggle.shake_move"] = timeit(lambda i: st.eventFilter(target, moves[i % len(moves)]), n * 5)
+    st._restore()
+
+    # ---- _ClickFilter.eventFilter: moves + presses inside an active round ----
+    cf = _ClickFilter()
+    measure.start_round(1)
+    out["click_filter.move"] = timeit(lambda i: cf.eventFilter(target, moves[i % len(moves)]), n * 5)
+    # distinct positions, so measure's press de-duplication does not drop them
+    presses = [_mouse(10 + i, 10, QEvent.Type.MouseButtonPress, Qt.MouseButton.LeftButton) for i in range(n)]
+    out["click_filter.press"] = timeit(lambda i: cf.eventFilter(target, presses[i]), n, warmup=0)
+
+    # ---- EventDispatcher: routed move vs. an event type nobody subscribed to ----
+    d = EventDispatcher()
+    d.subscribe(target, _TRAJ_KINDS, cf.eventFilter)
+    out["dispatch.move"] = timeit(lambda i: d.eventFilter(target, moves[i % len(moves)]), n * 5)
+    other = QEvent(QEvent.Type.Timer)
+    out["dispatch.unrouted"] = timeit(lambda i: d.eventFilter(target, other), n * 5)
+
+    # ---- measure: click registration and end of round ----
+    out["measure.register_click"] = timeit(lambda i: measure.register_click(None), n)
+    paths = ["py/assets/office/bg1.png"] * 10
+    def end_round(i):
+        measure.start_round(1)
+        measure.end_round(paths)
+    out["measure.start_end_round"] = timeit(end_round, n // 4)
+
+    # ---- cursor rendering ----
+    for size in (24, 48, 96, 128):
+        out[f"cursor.render_{size}"] = timeit(
+            lambda i, s=size: toggle.make_windows_arrow_cursor(size=s, body_color="#FF0000"), n // 4)
+    cache = toggle.CursorCache()
+    cache.warm(Qt.CursorShape.ArrowCursor, "#FF0000", 96)
+    out["cursor.cache_hit_96"] = timeit(lambda i: cache.get(Qt.CursorShape.ArrowCursor, "#FF0000", 96), n)
+
+    # ---- Demo round transition (background swap + target placement) ----
+    w = Demo()
+    w.resize(1920, 1080)
+    w.show()
+    while not w.is_ready:  # session setup runs after the first frame
+        app.processEvents()
+    w.scheduler.cancel()
+    def transition(i):
+        w.round_no = i % w.total_rounds + 1
+        w.prefetcher.request(w._bg_path_for(w.round_no), w.container.decode_size())
+        w.prefetcher._pool.submit(lambda: None).result()  # decode done, as after the pause
+        app.processEvents()
+        t0 = time.perf_counter_ns()
+        w.randomize_background()
+        w.place_random_button()
+        transition.ns.append(time.perf_counter_ns() - t0)
+    transition.ns = []
+    for i in range(n // 20 + 5):
+        transition(i)
+    out["demo.round_transition"] = summary_ns(transition.ns[5:])
+
+    # ---- key press -> first frame showing the cursor: override cursor vs. overlay window ----
+    from latency import ToggleLatency
+    win = w.windowHandle()
+    for name, action in (("override", "big-size"), ("overlay", "overlay-big-size")):
+        t = toggle.get_toggler(dict(OPTIONS, TRIGGER="spacebar", ACTION=action, HALO=True), app)
+        t.latency = ToggleLatency()
+        d = EventDispatcher()
+        t.attach(w, d)  # UpdateRequest of the Demo window (override path)
+        def cycle(i, t=t):
+            n0 = len(t.latency.samples)
+            t.eventFilter(win, press)
+            deadline = time.perf_counter() + 1.0
+            while len(t.latency.samples) == n0 and time.perf_counter() < deadline:
+                app.processEvents()
+            t.eventFilter(win, release)
+            app.processEvents()
+        for i in range(max(10, n // 20)):
+            cycle(i)
+        out[f"toggle.to_frame_{name}"] = summary_ns([s[-1] * 1e6 for s in t.latency.samples[5:]])
+        d.unsubscribe(t.eventFilter)
+
+    # ---- one overlay animation frame (atlas blit) vs. cursor.render_96 (path re-render) ----
+    t._apply_cursor_for(win)
+    app.processEvents()  # exposed
+    ov = t._overlay
+    def blit(i):
+        ov.frame = i % ov.atlas.frames
+        ov.repaint()
+    out["overlay.frame_blit"] = timeit(blit, n)
+    t._restore()
+    w.close()
+    measure.close()
+    return out
+
+
+def compare(cur: Dict[str, Dict[str, float]], base: Dict[str, Dict[str, float]], tolerance: float) -> list:
+    slower = []
+    for name, b in base.items():
+        c = cur.get(name)
+        if c is not None and b["p50_us"] > 0 and c["p50_us"] > b["p50_us"] * (1.0 + tolerance):
+            slower.append((name, b["p50_us"], c["p50_us"]))
+    return slower
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--out", help="write results JSON here (default: stdout)")
+    ap.add_argument("--baseline", help="results JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25)
+    ap.add_argument("--quick", action="store_true", help="fewer iterations")
+    args = ap.parse_args(argv)
+    # relative to the caller's cwd, not the repo root run() switches to
+    out = Path(args.out).resolve() if args.out else None
+    baseline = Path(args.baseline).resolve() if args.baseline else None
+
+    os.chdir(_ROOT)
+    res = run(quick=args.quick)
+    text = json.dumps(res, indent=2, sort_keys=True)
+    if out:
+        out.write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+
+    if baseline:
+        base = json.loads(baseline.read_text(encoding="utf-8"))
+        slower = compare(res, base, args.tolerance)
+        for name, b, c in slower:
+            print(f"REGRESSION {name}: p50 {b:.1f}us -> {c:.1f}us", file=sys.stderr)
+        return 1 if slower else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,173 @@
+"""Block-based session runner: several conditions in one process.
+
+    python py/blocks.py --block spacebar:big-size --block shake:big-size:SIZE=64 \
+                        --block shake:overlay-highlight:COLOR=#00FF00 [--rounds 10]
+    python py/blocks.py --spec blocks.json [--rounds 10]
+
+A block is TRIGGER:ACTION[:KEY=VALUE...] (an OPTIONS key, e.g. SHAPE, COLOR,
+SIZE, HALO, TARGET, QUIET_ROUNDS; not PROFILE or the buffer sizes, which are
+set once per run); a spec file is a JSON list of OPTIONS overrides, each
+optionally with "rounds". The window, assets and plan code are set up once. Every block's
+toggler is built and its cursors pre-rendered before the first round (one shared
+cursor cache), and a ToggleSlot swaps them between blocks, so switching costs
+no rendering and no restart.
+
+Block order is rotated by PARTICIPANT (block p % n goes first). Each block
+writes its own <TRIGGER>_<ACTION>_<HHMMSS>_block<k>_measure.txt, with the
+_latency.csv / _plan.json sidecars next to it. With SEED set, block k uses a
+seed derived from it. Sessions are not recorded for replay in block mode.
+"""
+from pathlib import Path
+from typing import Dict, List
+import argparse, json, random, sys, time
+
+from PyQt6 import QtWidgets
+
+from constant import OPTIONS
+
+# keys of a block that are not OPTIONS
+_BLOCK_KEYS = ("rounds",)
+# OPTIONS read once per run (window, buffers, profiler): set them in constant.py
+_RUN_KEYS = ("PROFILE", "PREFETCH_BUDGET_MB", "TRAJECTORY", "TRAJECTORY_CAPACITY")
+
+
+def parse_block(text: str) -> Dict[str, object]:
+    trigger, action, *rest = text.split(":")
+    block: Dict[str, object] = {"TRIGGER": trigger, "ACTION": action}
+    for kv in rest:
+        key, _, value = kv.partition("=")
+        block[key.upper() if key not in _BLOCK_KEYS else key] = _value(value)
+    return check_block(block)
+
+
+def check_block(block: dict) -> dict:
+    fixed = [k for k in block if k in _RUN_KEYS]
+    if fixed:
+        raise ValueError(f"{', '.join(fixed)} cannot change between blocks (set in constant.py)")
+    return block
+
+
+def _value(text: str):
+    # numbers / true / false / null as JSON, anything else (e.g. #00FF00) as text
+    try:
+        return json.loads(text)
+    except ValueError:
+        return text
+
+
+def rotate(blocks: List[dict], participant: int) -> List[dict]:
+    k = participant % len(blocks) if blocks else 0
+    return blocks[k:] + blocks[:k]
+
+
+def block_seed(master, k: int):
+    return None if master is None else random.Random(f"{master}/block/{k}").randrange(2**63)
+
+
+class BlockRunner:
+    """Runs `blocks` one after another in one Demo window."""
+    def __init__(self, app: QtWidgets.QApplication, blocks: List[dict], *, rounds: int | None = None):
+        from cursor import Demo
+        from toggle import CursorCache, ToggleSlot, get_toggler
+        import measure
+        self.measure = measure
+
+        self.app = app
+        self.base = dict(OPTIONS)
+        self.blocks = [dict(b) for b in blocks]
+        self.rounds = rounds
+        self.k = 0
+        self.stamp = time.strftime("%H%M%S", time.localtime())
+
+        # every block's toggler, cursors rendered once and shared (rendered after the first frame)
+        cache = CursorCache(max_entries=max(32, 4 * len(self.blocks)))
+        self.togglers = [get_toggler(self._options(b), app, prewarm=False, cursor_cache=cache)
+                         for b in self.blocks]
+        self.slot = ToggleSlot(self.togglers[0], parent=app)
+
+        self._apply_options(0)
+        self.demo = Demo(seed=block_seed(self.base.get("SEED"), 0), out_path=self._out_path(0),
+                         rounds=self._block_rounds(0))
+        self.demo.close_when_done = False
+        self.demo.ready.connect(self._prewarm)
+        self.demo.finished.connect(self._next)
+        self.slot.attach(self.demo)
+        app.aboutToQuit.connect(self._on_quit)
+
+    def _options(self, block: dict) -> dict:
+        return dict(self.base, **{k: v for k, v in block.items() if k not in _BLOCK_KEYS})
+
+    def _apply_options(self, k: int) -> None:
+        OPTIONS.clear()
+        OPTIONS.update(self._options(self.blocks[k]))
+        OPTIONS["RECORD_SESSION"] = False
+
+    def _out_path(self, k: int) -> str:
+        return str(Path(OPTIONS["DIR"]) / f"{OPTIONS['TRIGGER']}_{OPTIONS['ACTION']}_{self.stamp}"
+                                          f"_block{k + 1}_{OPTIONS['FILENAME']}")
+
+    def _block_rounds(self, k: int) -> int | None:
+        r = self.blocks[k].get("rounds", self.rounds)
+        return int(r) if r is not None else None
+
+    def _prewarm(self) -> None:
+        for t in self.togglers:
+            t.prewarm()
+
+    def _dump(self, k: int) -> None:
+        t = self.togglers[k]
+        if t.latency is not None:
+            t.latency.dump(self.measure.sidecar_path("_latency.csv"))
+            t.latency.samples.clear()
+        self.demo.dump_plan(self.measure.sidecar_path("_plan.json"))
+
+    def _on_quit(self) -> None:
+        # window closed mid-block: keep what that block recorded
+        if self.k < len(self.blocks):
+            self._dump(self.k)
+
+    def _next(self) -> None:
+        self._dump(self.k)
+        self.k += 1
+        if self.k >= len(self.blocks):
+            self.measure.close()
+            self.demo.close()
+            return
+        self._apply_options(self.k)
+        self.slot.swap(self.togglers[self.k])
+        b = self.blocks[self.k]
+        self.demo.toasts.show(f"Block {self.k + 1} of {len(self.blocks)}: {b['TRIGGER']} / {b['ACTION']}",
+                              duration_ms=1500, pos="top-center")
+        self.demo.start_block(block_seed(self.base.get("SEED"), self.k), self._out_path(self.k),
+                              self._block_rounds(self.k))
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description="Run several conditions in one session.")
+    ap.add_argument("--block", action="append", default=[], metavar="TRIGGER:ACTION[:KEY=VALUE...]")
+    ap.add_argument("--spec", help="JSON list of OPTIONS overrides (one per block)")
+    ap.add_argument("--rounds", type=int, help="rounds per block (default: every background)")
+    args = ap.parse_args(argv)
+
+    try:
+        blocks = [parse_block(b) for b in args.block]
+        if args.spec:
+            with open(args.spec, "r", encoding="utf-8") as f:
+                blocks += [check_block(b) for b in json.load(f)]
+    except ValueError as e:
+        ap.error(str(e))
+    if not blocks:
+        ap.error("no blocks (use --block or --spec)")
+
+    app = QtWidgets.QApplication([])
+    from cursor import cleanup_override_cursor
+    runner = BlockRunner(app, rotate(blocks, int(OPTIONS.get("PARTICIPANT", 0))), rounds=args.rounds)
+    runner.demo.showMaximized()
+    runner.demo.setMouseTracking(True)
+    app.aboutToQuit.connect(cleanup_override_cursor)
+    app.aboutToQuit.connect(runner.measure.close)
+    return app.exec()
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
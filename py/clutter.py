@@ -0,0 +1,239 @@
+"""Visual-clutter features of the backgrounds, joined to round times (NumPy).
+
+Every image is decoded (QImageReader, real format from the asset manifest) to a
+fixed analysis size and measured in a few vectorized passes:
+  edge_density   : share of pixels whose Sobel gradient of luminance is >= EDGE_THRESHOLD
+  color_entropy  : Shannon entropy (bits) of the colour histogram, 4 bits per channel
+  local_contrast : mean RMS luminance contrast over BLOCK_PX x BLOCK_PX blocks
+and, per recorded round, target_contrast: RMS luminance contrast of the background
+under the exact target rect, decoded at the container size the round was played at.
+Images are spread over a process pool and cached by sha256 in <out>/cache.json,
+so a re-run only decodes new or changed images (and rects not measured before).
+
+    python py/clutter.py [results.txt ...] [--assets py/assets] [--out clutter]
+                         [--plan plans.json --participant P] [--workers N]
+
+Target rects come from <results>_plan.json (written by run.py), or from entry P of
+a plan file for results recorded before that. Outputs (in --out): images.csv,
+rounds.csv, cache.json
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse, json, os, sys
+
+import numpy as np
+
+import manifest
+import plan
+from measure import read_results
+
+VERSION = 1
+
+ANALYSIS_SIZE = plan.DEFAULT_SIZE  # image features: every image stretched like the default window
+EDGE_THRESHOLD = 0.1               # luminance step (0..1) that counts as an edge
+COLOR_BITS = 4                     # per channel -> 4096 histogram bins
+BLOCK_PX = 16
+
+IMAGE_FEATURES = ("edge_density", "color_entropy", "local_contrast")
+IMAGE_COLUMNS = ("path", "level", "sha256") + IMAGE_FEATURES
+ROUND_COLUMNS = ("session", "round", "time_ms", "clicks", "level") + IMAGE_FEATURES + ("target_contrast", "path")
+
+_INLINE_MAX = 4  # below this many images a process pool costs more than it saves
+
+# results paths are relative to the repo root (where run.py is started)
+_ROOT = Path(__file__).resolve().parent.parent
+
+
+# ----------------- pixels -----------------
+def read_rgb(path: str, size: Sequence[int], fmt: Optional[str] = None) -> np.ndarray:
+    """(h, w, 3) uint8 of path stretched to size (w, h), as BackgroundView draws it."""
+    from PyQt6 import QtCore, QtGui
+    reader = QtGui.QImageReader(path)
+    if fmt:
+        reader.setFormat(fmt.encode())
+    reader.setAutoTransform(True)
+    reader.setScaledSize(QtCore.QSize(int(size[0]), int(size[1])))
+    img = reader.read()
+    if img.isNull():
+        raise OSError(f"{path}: {reader.errorString()}")
+    img = img.convertToFormat(QtGui.QImage.Format.Format_RGB888)
+    w, h = img.width(), img.height()
+    bits = img.constBits()
+    bits.setsize(img.sizeInBytes())
+    # rows are padded to bytesPerLine
+    return np.frombuffer(bits, np.uint8).reshape(h, img.bytesPerLine())[:, :w * 3].reshape(h, w, 3).copy()
+
+
+def luminance(rgb: np.ndarray) -> np.ndarray:
+    """Relative luminance 0..1 (Rec. 709 weights on the sRGB values)."""
+    return rgb.astype(np.float32) @ np.array([0.2126, 0.7152, 0.0722], np.float32) / 255.0
+
+
+# ----------------- features -----------------
+def edge_density(lum: np.ndarray, threshold: float = EDGE_THRESHOLD) -> float:
+    # 3x3 Sobel from shifted views, scaled so a unit step gives magnitude 1
+    p = np.pad(lum, 1, mode="edge")
+    gx = ((p[:-2, 2:] + 2 * p[1:-1, 2:] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[1:-1, :-2] + p[2:, :-2])) / 4
+    gy = ((p[2:, :-2] + 2 * p[2:, 1:-1] + p[2:, 2:]) - (p[:-2, :-2] + 2 * p[:-2, 1:-1] + p[:-2, 2:])) / 4
+    return float(np.mean(np.hypot(gx, gy) >= threshold))
+
+
+def color_entropy(rgb: np.ndarray, bits: int = COLOR_BITS) -> float:
+    q = (rgb >> (8 - bits)).astype(np.int32)
+    codes = (q[..., 0] << (2 * bits)) | (q[..., 1] << bits) | q[..., 2]
+    p = np.bincount(codes.ravel(), minlength=1 << (3 * bits)).astype(np.float64)
+    p = p[p > 0] / codes.size
+    return float(-(p * np.log2(p)).sum())
+
+
+def local_contrast(lum: np.ndarray, block: int = BLOCK_PX) -> float:
+    h, w = (lum.shape[0] // block) * block, (lum.shape[1] // block) * block
+    if not h or not w:
+        return rms_contrast(lum)
+    blocks = lum[:h, :w].reshape(h // block, block, w // block, block)
+    return float(blocks.std(axis=(1, 3)).mean())
+
+
+def rms_contrast(lum: np.ndarray) -> float:
+    return float(lum.std()) if lum.size else float("nan")
+
+
+def image_features(path: str, fmt: Optional[str] = None, size: Sequence[int] = ANALYSIS_SIZE) -> Dict[str, float]:
+    """Features of one image (runs in a worker process)."""
+    rgb = read_rgb(path, size, fmt)
+    lum = luminance(rgb)
+    return {"edge_density": edge_density(lum), "color_entropy": color_entropy(rgb),
+            "local_contrast": local_contrast(lum)}
+
+
+def rect_contrasts(path: str, fmt: Optional[str], size: Sequence[int],
+                   rects: List[Sequence[int]]) -> List[float]:
+    """RMS contrast under each (x, y, w, h) rect of path decoded at size (one decode)."""
+    lum = luminance(read_rgb(path, size, fmt))
+    return [rms_contrast(lum[max(y, 0):y + h, max(x, 0):x + w]) for x, y, w, h in rects]
+
+
+# ----------------- cache -----------------
+def load_cache(path: Path) -> dict:
+    try:
+        with path.open("r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = None
+    if not cache or cache.get("version") != VERSION or cache.get("size") != list(ANALYSIS_SIZE):
+        return {"version": VERSION, "size": list(ANALYSIS_SIZE), "images": {}, "rects": {}}
+    return cache
+
+
+def _rect_key(sha: str, size: Sequence[int], rect: Sequence[int]) -> str:
+    return f"{sha}/{size[0]}x{size[1]}/{','.join(str(int(v)) for v in rect)}"
+
+
+def _run(fn, jobs: List[tuple], workers: int) -> list:
+    if len(jobs) > _INLINE_MAX and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as pool:
+            return list(pool.map(fn, *zip(*jobs)))
+    return [fn(*job) for job in jobs]
+
+
+def update_images(cache: dict, entries: List[dict], root: str | Path, workers: int) -> int:
+    """Measure entries whose sha256 is not cached yet (in place); returns how many were decoded."""
+    todo = {e["sha256"]: e for e in entries if e["sha256"] not in cache["images"]}
+    jobs = [(manifest.join(root, e["path"]), e["format"]) for e in todo.values()]
+    for sha, feats in zip(todo, _run(image_features, jobs, workers)):
+        cache["images"][sha] = feats
+    return len(todo)
+
+
+def update_rects(cache: dict, wanted: List[Tuple[dict, Sequence[int], Sequence[int]]],
+                 root: str | Path, workers: int) -> int:
+    """wanted: [(manifest entry, container size, rect)]; one decode per image and size."""
+    groups: Dict[Tuple[str, tuple], Tuple[dict, list]] = {}
+    for e, size, rect in wanted:
+        key = _rect_key(e["sha256"], size, rect)
+        if key not in cache["rects"]:
+            groups.setdefault((e["sha256"], tuple(size)), (e, []))[1].append((key, rect))
+    jobs = [(manifest.join(root, e["path"]), e["format"], size, [r for _, r in items])
+            for (_, size), (e, items) in groups.items()]
+    for (_, items), values in zip(groups.values(), _run(rect_contrasts, jobs, workers)):
+        for (key, _), v in zip(items, values):
+            cache["rects"][key] = v
+    return sum(len(items) for _, items in groups.values())
+
+
+# ----------------- rounds -----------------
+def plan_for(results_path: str | Path, plan_file: Optional[str] = None, participant: int = 0) -> Optional[dict]:
+    """{"size", "rounds"} of a session: its <results>_plan.json, else entry `participant` of plan_file."""
+    p = Path(results_path)
+    side = p.with_name(p.stem + "_plan.json")
+    src, idx = (side, 0) if side.exists() else (plan_file, participant)
+    if src is None:
+        return None
+    doc = plan.load_plans(src)
+    return {"size": doc["size"], "rounds": doc["plans"][idx]["rounds"]}
+
+
+def _entry_of(by_path: Dict[Path, dict], bg: str) -> Optional[dict]:
+    p = Path(bg)
+    return by_path.get((p if p.is_absolute() else _ROOT / p).resolve())
+
+
+def _write_csv(path: Path, header, rows) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write(",".join(header) + "\n")
+        for row in rows:
+            f.write(",".join(f"{v:.4f}" if isinstance(v, float) else str(v) for v in row) + "\n")
+
+
+def main(argv: List[str]) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("results", nargs="*", help="<...>_measure.txt files to join the features to")
+    ap.add_argument("--assets", default=str(_ROOT / "py" / "assets"))
+    ap.add_argument("--out", default="clutter")
+    ap.add_argument("--plan", help="plan file for results without a _plan.json sidecar")
+    ap.add_argument("--participant", type=int, default=0)
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = ap.parse_args(argv)
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    cache_path = out / "cache.json"
+    cache = load_cache(cache_path)
+
+    m = manifest.load(args.assets)
+    n_images = update_images(cache, m["entries"], args.assets, args.workers)
+    _write_csv(out / "images.csv", IMAGE_COLUMNS,
+               ([e["path"], e["level"] or "-", e["sha256"]] + [cache["images"][e["sha256"]][f] for f in IMAGE_FEATURES]
+                for e in m["entries"]))
+
+    by_path = {Path(manifest.join(args.assets, e["path"])).resolve(): e for e in m["entries"]}
+    rows, wanted = [], []
+    for results_path in args.results:
+        pl = plan_for(results_path, args.plan, args.participant)
+        rounds = {r["round"]: r for r in pl["rounds"]} if pl else {}
+        for r, t, c, bg in read_results(results_path):
+            e = _entry_of(by_path, bg)
+            rect = rounds[r]["target"] if r in rounds else None
+            rows.append((results_path, r, t, c, bg, e, pl["size"] if pl else None, rect))
+            if e is not None and rect is not None:
+                wanted.append((e, pl["size"], rect))
+    n_rects = update_rects(cache, wanted, args.assets, args.workers)
+
+    nan = float("nan")
+    def round_row(session, r, t, c, bg, e, size, rect):
+        feats = cache["images"].get(e["sha256"], {}) if e else {}
+        tc = cache["rects"][_rect_key(e["sha256"], size, rect)] if e and rect else nan
+        return [session, r, t, c, e["level"] if e else "unknown"] + [feats.get(f, nan) for f in IMAGE_FEATURES] + [tc, bg]
+    _write_csv(out / "rounds.csv", ROUND_COLUMNS, (round_row(*row) for row in rows))
+
+    tmp = cache_path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(cache, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, cache_path)
+    print(f"{len(m['entries'])} images ({n_images} decoded), {len(rows)} rounds "
+          f"({n_rects} target rects measured) -> {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
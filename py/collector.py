@@ -0,0 +1,403 @@
+"""Results collector for many stations (asyncio, stdlib only).
+
+With OPTIONS["COLLECTOR"] = "host:port", measure streams every finished round
+(and its trajectory blob) to a collector as well as to the local CSV. The client
+runs its own event loop on a daemon thread: put_*() only appends to a deque, so
+the GUI thread never waits on the network. Records are batched, sent one batch
+at a time and kept until the collector acknowledges them; while it is slow or
+down they queue up (up to MAX_PENDING, newer ones are dropped beyond that; the
+local CSV has everything) and are re-sent after reconnecting.
+
+The collector inserts the batches of all connections together, one transaction
+per flush, into SQLite (indexed by condition, level and station). Inserts are
+idempotent (session, round), so re-sent batches are not counted twice.
+
+    python py/collector.py serve [--host 127.0.0.1] [--port 8765] [--db collector.db]
+    python py/collector.py check [--stations 12] [--rounds 30]   # localhost end-to-end check
+
+Wire format: frames of struct ">II" (json length, binary length), the JSON
+header, then the binary payload (trajectory blobs, back to back).
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Optional, Tuple
+import argparse, asyncio, json, os, socket, sqlite3, struct, sys, tempfile, threading, time, uuid
+
+DEFAULT_PORT = 8765
+BATCH_MAX = 256             # records per frame
+BATCH_MS = 100              # how long a client waits to fill a batch
+MAX_PENDING = 100_000       # records kept while the collector is unreachable
+ACK_TIMEOUT_S = 5.0
+BACKOFF_S = (0.25, 5.0)     # reconnect delay: first, max (doubles)
+FLUSH_MS = 50               # server: how long frames are gathered into one transaction
+
+_HEAD = struct.Struct(">II")
+
+
+def parse_address(addr: str) -> Tuple[str, int]:
+    host, _, port = addr.rpartition(":")
+    return (host or "127.0.0.1"), int(port or DEFAULT_PORT)
+
+
+async def _read_frame(reader: asyncio.StreamReader) -> Tuple[dict, bytes]:
+    n_json, n_bin = _HEAD.unpack(await reader.readexactly(_HEAD.size))
+    head = json.loads(await reader.readexactly(n_json))
+    return head, (await reader.readexactly(n_bin) if n_bin else b"")
+
+
+def _check_frame(head: dict, n_payload: int) -> None:
+    """Raises ValueError unless head is a batch frame CollectorStore.insert can take."""
+    def bad(what):
+        raise ValueError(f"bad frame: {what}")
+    if not isinstance(head, dict) or type(head.get("seq")) is not int:
+        bad("seq")
+    s = head.get("session")
+    if not isinstance(s, dict) or not isinstance(s.get("id"), str):
+        bad("session")
+    rounds, blobs = head.get("rounds"), head.get("blobs")
+    if not isinstance(rounds, list) or not isinstance(blobs, list):
+        bad("rounds / blobs")
+    for row in rounds:
+        if not (isinstance(row, list) and len(row) == 4 and type(row[0]) is int
+                and isinstance(row[1], (int, float)) and type(row[2]) is int and isinstance(row[3], str)):
+            bad(f"round {row!r}")
+    for row in blobs:
+        if not (isinstance(row, list) and len(row) == 3 and isinstance(row[0], str)
+                and type(row[1]) is int and type(row[2]) is int
+                and 0 <= row[1] and 0 <= row[2] and row[1] + row[2] <= n_payload):
+            bad(f"blob {row!r}")
+
+
+def _frame(head: dict, payload: bytes = b"") -> bytes:
+    j = json.dumps(head, separators=(",", ":")).encode()
+    return _HEAD.pack(len(j), len(payload)) + j + payload
+
+
+# ----------------- client (station side) -----------------
+class CollectorSink:
+    """measure sink: streams rounds / blobs of one session to a collector.
+
+    session: metadata sent with every batch (station, name, trigger, action, ...);
+    an "id" is generated if missing. sent / dropped / reconnects are counters.
+    """
+    def __init__(self, address: str, session: dict, *, batch_max: int = BATCH_MAX,
+                 batch_ms: int = BATCH_MS, max_pending: int = MAX_PENDING):
+        self.host, self.port = parse_address(address)
+        self.session = dict(session)
+        self.session.setdefault("id", uuid.uuid4().hex)
+        self.session.setdefault("station", socket.gethostname())
+        self.batch_max = int(batch_max)
+        self.batch_s = max(int(batch_ms), 0) / 1000.0
+        self.max_pending = int(max_pending)
+        self.sent = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.connected = False
+
+        self._pending: deque = deque()  # ("round", row) / ("blob", name, data)
+        self._loop = asyncio.new_event_loop()
+        self._wake = asyncio.Event()
+        self._closing = False
+        self._drained = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="collector-sink", daemon=True)
+        self._thread.start()
+
+    # called from the GUI thread: O(1), no I/O
+    def put_round(self, round_no: int, time_ms: float, clicks: int, path: str) -> None:
+        self._put(("round", [int(round_no), float(time_ms), int(clicks), str(path)]))
+
+    def put_blob(self, name: str, data: bytes) -> None:
+        self._put(("blob", str(name), bytes(data)))
+
+    def put_click(self, round_no, t_ms, x, y, button) -> None:
+        pass  # the collector keeps rounds and trajectories (clicks are in the trajectory)
+
+    def _put(self, item: tuple) -> None:
+        if len(self._pending) >= self.max_pending:
+            self.dropped += 1  # (only the sender thread pops: a batch may be in flight)
+            return
+        self._pending.append(item)
+        if not self._closing:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    def close(self, timeout: Optional[float] = 2.0) -> bool:
+        """Send what is queued (waiting up to timeout, not at all while the collector
+        is unreachable), then stop. True if everything was acknowledged."""
+        if self._closing:
+            return self._drained.is_set()
+        self._closing = True
+        self._loop.call_soon_threadsafe(self._wake.set)
+        ok = self._drained.wait(timeout if self.connected else 0)
+        self._loop.call_soon_threadsafe(self._stop)
+        self._thread.join(1.0)
+        return ok
+
+    def _run(self) -> None:
+        asyncio.set_event_loop(self._loop)
+        self._task = self._loop.create_task(self._main())
+        self._loop.run_forever()
+        self._loop.close()
+
+    def _stop(self) -> None:
+        self._task.cancel()
+        self._task.add_done_callback(lambda _t: self._loop.stop())
+
+    async def _main(self) -> None:
+        backoff = BACKOFF_S[0]
+        seq = 0
+        while True:
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(self.host, self.port), ACK_TIMEOUT_S)
+            except (OSError, asyncio.TimeoutError):
+                if self._closing and not self._pending:
+                    self._drained.set()
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, BACKOFF_S[1])
+                self.reconnects += 1
+                continue
+            backoff = BACKOFF_S[0]
+            self.connected = True
+            try:
+                while True:
+                    if not self._pending:
+                        if self._closing:
+                            self._drained.set()
+                        self._wake.clear()
+                        await self._wake.wait()
+                        if not self._closing:
+                            await asyncio.sleep(self.batch_s)  # let a batch build up
+                    n = min(len(self._pending), self.batch_max)
+                    items = [self._pending[i] for i in range(n)]
+                    seq += 1
+                    writer.write(self._encode(seq, items))
+                    await writer.drain()
+                    head, _ = await asyncio.wait_for(_read_frame(reader), ACK_TIMEOUT_S)
+                    if head.get("ack") != seq:
+                        raise ConnectionError(f"bad ack {head!r}")
+                    # acknowledged: only now leave the queue (else re-sent after reconnecting)
+                    for _ in range(n):
+                        self._pending.popleft()
+                    self.sent += n
+            except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, ValueError):
+                writer.close()
+                self.connected = False
+                self.reconnects += 1
+                await asyncio.sleep(backoff)
+
+    def _encode(self, seq: int, items: list) -> bytes:
+        rounds, blobs, payload, off = [], [], [], 0
+        for item in items:
+            if item[0] == "round":
+                rounds.append(item[1])
+            else:
+                blobs.append([item[1], off, len(item[2])])
+                payload.append(item[2])
+                off += len(item[2])
+        return _frame({"seq": seq, "session": self.session, "rounds": rounds, "blobs": blobs}, b"".join(payload))
+
+
+# ----------------- server (collector side) -----------------
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions(
+    id TEXT PRIMARY KEY, station TEXT, name TEXT, trigger TEXT, action TEXT,
+    participant INTEGER, seed TEXT, first_seen REAL);
+CREATE TABLE IF NOT EXISTS rounds(
+    session TEXT NOT NULL, round INTEGER NOT NULL, time_ms REAL, clicks INTEGER,
+    path TEXT, level TEXT, received REAL, PRIMARY KEY(session, round));
+CREATE TABLE IF NOT EXISTS blobs(
+    session TEXT NOT NULL, name TEXT NOT NULL, data BLOB, PRIMARY KEY(session, name));
+CREATE INDEX IF NOT EXISTS sessions_condition ON sessions(trigger, action);
+CREATE INDEX IF NOT EXISTS sessions_station ON sessions(station);
+CREATE INDEX IF NOT EXISTS rounds_level ON rounds(level);
+"""
+
+
+class CollectorStore:
+    """SQLite store; used from one thread only (the server's executor)."""
+    def __init__(self, path: str | Path):
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def insert(self, frames: List[Tuple[dict, bytes]]) -> int:
+        """All frames in one transaction; returns rounds inserted (duplicates ignored)."""
+        from aggregate import level_of
+        now = time.time()
+        sessions, rounds, blobs = {}, [], []
+        for head, payload in frames:
+            s = head["session"]
+            sessions[s["id"]] = (s["id"], s.get("station"), s.get("name"), s.get("trigger"), s.get("action"),
+                                 s.get("participant"), None if s.get("seed") is None else str(s["seed"]), now)
+            rounds += [(s["id"], r, t, c, p, level_of(p), now) for r, t, c, p in head["rounds"]]
+            blobs += [(s["id"], name, payload[off:off + n]) for name, off, n in head["blobs"]]
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO sessions VALUES (?,?,?,?,?,?,?,?)", sessions.values())
+            before = self.db.total_changes
+            self.db.executemany("INSERT OR IGNORE INTO rounds VALUES (?,?,?,?,?,?,?)", rounds)
+            inserted = self.db.total_changes - before
+            self.db.executemany("INSERT OR IGNORE INTO blobs VALUES (?,?,?)", blobs)
+        return inserted
+
+    def close(self) -> None:
+        self.db.close()
+
+
+class Collector:
+    """asyncio server: connections read frames into one queue; a single writer
+    task inserts everything queued within FLUSH_MS as one transaction, then acks."""
+    def __init__(self, store: CollectorStore, *, flush_ms: int = FLUSH_MS):
+        self.store = store
+        self.flush_s = flush_ms / 1000.0
+        self.rounds = 0
+        self.frames = 0
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._db_thread = ThreadPoolExecutor(max_workers=1, thread_name_prefix="collector-db")
+
+    async def serve(self, host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> asyncio.AbstractServer:
+        asyncio.get_running_loop().create_task(self._writer())
+        return await asyncio.start_server(self._handle, host, port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while True:
+                head, payload = await _read_frame(reader)
+                try:
+                    _check_frame(head, len(payload))
+                except ValueError as e:  # not queued: a bad frame must not reach the writer
+                    writer.write(_frame({"error": str(e)}))
+                    await writer.drain()
+                    break
+                done = loop.create_future()
+                await self._queue.put((head, payload, done))
+                await done
+                writer.write(_frame({"ack": head["seq"]}))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            await asyncio.sleep(self.flush_s)
+            while not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                self.rounds += await loop.run_in_executor(
+                    self._db_thread, self.store.insert, [(h, p) for h, p, _ in batch])
+            except Exception:
+                # one frame at a time, so a failing frame does not fail the other stations'
+                for h, p, done in batch:
+                    try:
+                        self.rounds += await loop.run_in_executor(self._db_thread, self.store.insert, [(h, p)])
+                    except Exception as e:
+                        done.set_exception(ConnectionError(str(e)))  # not acked -> re-sent
+                        continue
+                    self.frames += 1
+                    done.set_result(None)
+                continue
+            self.frames += len(batch)
+            for _, _, done in batch:
+                done.set_result(None)
+
+
+# ----------------- CLI -----------------
+async def _serve(args) -> None:
+    c = Collector(CollectorStore(args.db))
+    server = await c.serve(args.host, args.port)
+    print(f"collecting on {args.host}:{args.port} -> {args.db}")
+    async with server:
+        await server.serve_forever()
+
+
+def _check(args) -> int:
+    """Stations start before the collector is up (exercises retry), then stream
+    rounds with blobs; every round must arrive exactly once, put() must stay cheap."""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    addr = f"127.0.0.1:{port}"
+    tmp = Path(tempfile.mkdtemp(prefix="collector-check-"))
+    sinks = [CollectorSink(addr, {"station": f"station{i:02d}", "name": f"check_{i}",
+                                  "trigger": "spacebar", "action": "big-size"})
+             for i in range(args.stations)]
+
+    store = CollectorStore(tmp / "collector.db")
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="collector", daemon=True).start()
+    c = Collector(store)
+
+    put_ns = []
+    for r in range(1, args.rounds + 1):
+        if r == args.rounds // 2:  # collector comes up half-way through the session
+            asyncio.run_coroutine_threadsafe(c.serve("127.0.0.1", port), loop).result()
+        for s in sinks:
+            blob = os.urandom(4096)
+            t0 = time.perf_counter_ns()
+            s.put_round(r, 1000.0 + r, 1, f"./py/assets/game/bg{r}.png")
+            s.put_blob(f"round_{r:04d}.trj", blob)
+            put_ns.append(time.perf_counter_ns() - t0)
+        time.sleep(0.01)
+    # a batch sent twice must not be counted twice
+    sinks[0].put_round(1, 1001.0, 1, "./py/assets/game/bg1.png")
+    # a malformed frame gets an error (and the connection closed); the collector keeps acking
+    bad = _exchange(port, {"seq": 1, "session": {"id": "check-bad"}, "rounds": [[1, 1.0]], "blobs": []})
+    good = _exchange(port, {"seq": 2, "session": {"id": "check-good", "station": "raw"},
+                            "rounds": [[1, 1000.0, 1, "./py/assets/game/bg1.png"]], "blobs": []})
+    frames_ok = "error" in bad and good.get("ack") == 2
+
+    deadline = time.monotonic() + 30.0
+    while any(s._pending for s in sinks) and time.monotonic() < deadline:
+        time.sleep(0.05)
+    ok = all(s.close(timeout=5.0) for s in sinks)
+    time.sleep(0.2)
+    n = store.db.execute("SELECT COUNT(*) FROM rounds").fetchone()[0]
+    nb = store.db.execute("SELECT COUNT(*) FROM blobs").fetchone()[0]
+    put_ns.sort()
+    expected = args.stations * args.rounds
+    print(f"{args.stations} stations x {args.rounds} rounds: {n - 1}/{expected} rounds, {nb} blobs, "
+          f"{c.frames} frames, reconnects {sum(s.reconnects for s in sinks)}; "
+          f"put p50 {put_ns[len(put_ns) // 2] / 1e3:.1f}us max {put_ns[-1] / 1e3:.1f}us; "
+          f"bad frame {'rejected' if frames_ok else 'NOT handled'}")
+    return 0 if ok and frames_ok and n == expected + 1 and nb == expected else 1
+
+
+def _exchange(port: int, head: dict) -> dict:
+    """Sends one frame on a fresh connection, returns the collector's reply header."""
+    with socket.create_connection(("127.0.0.1", port), timeout=ACK_TIMEOUT_S) as conn:
+        conn.sendall(_frame(head))
+        f = conn.makefile("rb")
+        n_json, n_bin = _HEAD.unpack(f.read(_HEAD.size))
+        reply = json.loads(f.read(n_json))
+        f.read(n_bin)
+        return reply
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description="Results collector for many stations.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("serve")
+    sp.add_argument("--host", default="127.0.0.1")
+    sp.add_argument("--port", type=int, default=DEFAULT_PORT)
+    sp.add_argument("--db", default="collector.db")
+    cp = sub.add_parser("check", help="end-to-end check against a localhost collector")
+    cp.add_argument("--stations", type=int, default=12)
+    cp.add_argument("--rounds", type=int, default=30)
+    args = ap.parse_args(argv)
+
+    if args.cmd == "serve":
+        try:
+            asyncio.run(_serve(args))
+        except KeyboardInterrupt:
+            pass
+        return 0
+    return _check(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
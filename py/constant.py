@@ -1,7 +1,8 @@
 # Options
 OPTIONS = {
     "TRIGGER": "spacebar",  # [spacebar, shake]
-    "ACTION": "big-size",  # [highlight, big-size]
+    "ACTION": "big-size",  # [highlight, big-size, overlay-highlight, overlay-big-size]
+                           # overlay-*: cursor drawn by a transparent overlay window (see HALO)
     "SHAPE": "arrow",   # [crosshead, arrow]
                         # the crosshead is a shapre for test and default mode.
                         # thus, it does not have color/size options.
@@ -9,7 +10,33 @@ OPTIONS = {
                             # Red is a default color for highlight mode.
     "SIZE": "48",           # size in pixels
                             # The original cursor size is 24.
+    "HALO": False,          # overlay-*: pulsing halo around the cursor (pre-rendered frames)
+    "HALO_COLOR": "#FFD400",
+    "DETECTOR": "distance", # [distance, reversal] shake detector
+                            # distance: path length within SHAKE_WINDOW_MS >= SHAKE_DIST_PX
+                            # reversal: >= MIN_REVERSALS fast direction flips within REVERSAL_WINDOW_MS
+    "SHAKE_WINDOW_MS": 300,     # distance detector settings (tune.py sweeps them on recorded traces)
+    "SHAKE_DIST_PX": 3000,
+    "SHAKE_IDLE_MS": 350,       # shake: cursor restored after this long without a detection
+    "CLOCK": "event",       # [event, monotonic] timestamps fed to the shake detector
+    "TARGET": "button",     # [button, icon, hitbox] round target kind
+    "QUIET_ROUNDS": False,  # hide/drop toasts while a round is timed
+    "PREFETCH_BUDGET_MB": 64,   # memory budget for pre-decoded backgrounds
+    "SEED": None,           # master seed of every random stream (None = new seed per session)
+    "PLAN": None,           # plan file from plan.py (None = plan built from SEED)
+    "PARTICIPANT": 0,       # plan index / counterbalancing group
 
     "DIR": "./",
-    "FILENAME": "measure.txt"
+    "FILENAME": "measure.txt",
+    "DURABILITY": "interval",   # [always, interval, os] results file flush policy
+    "FLUSH_MS": 250,            # interval/os: max time a written round stays unflushed
+    "TRAJECTORY": True,         # record pointer events per round (<results>_traj/round_NNNN.trj)
+    "TRAJECTORY_CAPACITY": 200_000,  # max events kept per round (preallocated)
+    "LATENCY": True,            # time trigger -> visible cursor (<results>_latency.csv)
+    "LATENCY_BUDGET_MS": 16.7,  # reported share of toggles within this budget
+    "PROFILE": False,           # paint/frame/stall profiler (<results>_profile.csv)
+    "RECORD_SESSION": True,     # seeds + input stream for replay.py (<results>_session.json)
+    "STORE": None,              # SQLite file: also write sessions/rounds/clicks there (store.py; None = CSV only)
+    "COLLECTOR": None,          # "host:port" of collector.py serve: also stream rounds there (None = CSV only)
+    "STATION": None,            # station name sent to the collector (None = host name)
 }
\ No newline at end of file
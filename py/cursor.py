@@ -1,39 +1,50 @@
-import random, time
-import os, glob, re
+import random
 from pathlib import Path
 
 from PyQt6 import QtWidgets, QtCore, QtGui
 from PyQt6.QtCore import Qt, QEvent
 
-from toast import Toast
+from toast import ToastManager
+from prefetch import BackgroundPrefetcher, BackgroundView
+from scheduler import RoundScheduler
+from target import make_target
+from dispatch import EventDispatcher, window_of
+from constant import OPTIONS
+import plan
+import manifest
 import measure
+import trajectory
+
+# pointer events recorded into the round trajectory (and routed to _ClickFilter)
+_TRAJ_KINDS = {
+    QEvent.Type.MouseMove: trajectory.MOVE,
+    QEvent.Type.MouseButtonPress: trajectory.PRESS,
+    QEvent.Type.MouseButtonRelease: trajectory.RELEASE,
+}
 
 class _ClickFilter(QtCore.QObject):
     def __init__(self):
         super().__init__()
 
     def eventFilter(self, obj, ev):
-        if ev.type() != QEvent.Type.MouseButtonPress:
+        kind = _TRAJ_KINDS.get(ev.type())
+        if kind is None:
             return False
         if not isinstance(ev, QtGui.QMouseEvent):
             return False
-        if ev.button() != Qt.MouseButton.LeftButton:
+        measure.record_pointer(kind, ev)
+        if kind != trajectory.PRESS or ev.button() != Qt.MouseButton.LeftButton:
             return False
 
         measure.register_click(ev)
         return False
 
-class Sleeper(QtCore.QObject):
-    done = QtCore.pyqtSignal()
-
-    @QtCore.pyqtSlot(int)
-    def run(self, ms):
-        # Sleep only current thread (GUI does not stop)
-        QtCore.QThread.msleep(ms)
-        self.done.emit()
-
 class Demo(QtWidgets.QWidget):
-    def __init__(self):
+    first_frame = QtCore.pyqtSignal()  # the window's first frame was processed
+    ready = QtCore.pyqtSignal()        # deferred setup done, round 1 scheduled
+    finished = QtCore.pyqtSignal()     # last round of the session (or block) done
+
+    def __init__(self, seed: int | None = None, out_path: str | None = None, rounds: int | None = None):
         super().__init__()
         self.setWindowTitle("Missing Cursor Demo")
         self.setMinimumSize(1920, 1080)
@@ -45,233 +56,257 @@ class Demo(QtWidgets.QWidget):
         )
         info.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
-        # ---------- low / mid / high directories----------
-        self.bg_levels = ("office", "game", "stock")
-        pat = re.compile(r"bg(\d+)\.(png|jpg|jpeg)$", re.I)
-
-        all_by_level: dict[str, list[str]] = {lvl: [] for lvl in self.bg_levels}
-        base_root = Path("./py/assets")
-
-        for lvl in self.bg_levels:
-            dir_path = base_root / lvl
-            if not dir_path.exists():
-                continue
-            for p in dir_path.glob("bg*.*"):
-                if pat.search(p.name):
-                    all_by_level[lvl].append(str(p))
-
-        self.bg_paths = self._build_mixed_bg_sequence(all_by_level)
-
-        if not self.bg_paths:
-            self.bg_paths = ["./py/assets/mid/bg1.png"]
-
-        self.total_rounds = len(self.bg_paths)
+        # window first: assets, plan and the results file are set up after the first frame
+        self._seed_arg = seed
+        self._out_path = out_path
+        self._rounds_arg = rounds
+        self.seed: int | None = None
+        self.is_ready = False
         self.round_no = 0
-        self.bg_path = self.bg_paths[0]
-
-        # out_path=None -> auto path decision
-        measure.setup_measure(self.total_rounds, out_path=None)
-        # ---------------------------------------------------------------
+        self.plan: list[dict] | None = None   # complete once positions are known
+        self._plan_size = None                # container size of a loaded plan (fit on first use)
+        self.close_when_done = True  # blocks.py keeps the window for the next block
 
-        self.container = QtWidgets.QWidget(self)  # button region
+        self.container = BackgroundView(self)  # button region
         self.container.setObjectName("bg")
-        self.container.setStyleSheet("")
+
+        # next background is decoded during the random pause
+        budget_mb = int(OPTIONS.get("PREFETCH_BUDGET_MB", 64))
+        self.prefetcher = BackgroundPrefetcher(self, budget_bytes=budget_mb * 1024 * 1024)
+
         lay = QtWidgets.QVBoxLayout(self)
         lay.addWidget(info)
         lay.addWidget(self.container, stretch=1)
 
-        self.rand_btn = None  # created button
-
-        # clicks 
+        # persistent target: created once (per TARGET kind), only moved/shown/hidden per round
+        self.rand_btn = None
+        self._target_kind = None
+
+        # pooled toasts; optionally silenced while a round is timed
+        self.toasts = ToastManager.for_parent(self)
+        self._apply_block_options()
+
+        # one precise timer for every round's pause (onsets: scheduler.onsets)
+        self.scheduler = RoundScheduler(self)
+        self.scheduler.fired.connect(self._randomize_once_impl)
+
+        # opt-in paint/frame/stall profiling (<results>_profile.csv)
+        self.profiler = None
+        if OPTIONS.get("PROFILE", False):
+            from profiler import FrameProfiler
+            self.profiler = FrameProfiler(self)
+            self.profiler.watch(self, "Demo")
+            self.profiler.watch(self.container, "bg")
+            self.toasts.created.connect(lambda t: self.profiler.watch(t, "Toast"))
+            self.profiler.start()
+            QtWidgets.QApplication.instance().aboutToQuit.connect(
+                lambda: self.profiler.dump(measure.sidecar_path("_profile.csv")))
+
+        # clicks: pointer events of this window only (not every event in the app)
         self._click_filter = _ClickFilter()
-        QtWidgets.QApplication.instance().installEventFilter(self._click_filter)
-
-        # do single shot the randomization after show (after geometry is stablized)
-        QtCore.QTimer.singleShot(0, self.randomize_once)
-
-    def _build_mixed_bg_sequence(self, all_by_level: dict[str, list[str]]) -> list[str]:
-        pools: dict[str, list[str]] = {lvl: paths[:] for lvl, paths in all_by_level.items() if paths}
-        seq: list[str] = []
-        last_level: str | None = None
-        rng = random.Random()
+        EventDispatcher.instance().subscribe(window_of(self), _TRAJ_KINDS, self._click_filter.eventFilter)
 
-        while True:
-            non_empty = [lvl for lvl, paths in pools.items() if paths]
-            if not non_empty:
-                break
+        # rounds start after the first frame (geometry is stable by then)
+        EventDispatcher.instance().subscribe(self, (QEvent.Type.UpdateRequest,), self._on_first_frame)
 
-            candidates = [lvl for lvl in non_empty if lvl != last_level]
-            if not candidates:
-                candidates = non_empty
+    def _on_first_frame(self, obj, e):
+        EventDispatcher.instance().unsubscribe(self._on_first_frame)
+        self.first_frame.emit()
+        QtCore.QTimer.singleShot(0, self._finish_setup)
+        return False
 
-            lvl = rng.choice(candidates)
-            paths = pools[lvl]
-            idx = rng.randrange(len(paths))
-            path = paths.pop(idx)
+    def _finish_setup(self):
+        if self.is_ready:
+            return
+        self._setup_session(self._seed_arg, self._out_path, self._rounds_arg)
+        measure.prepare()  # trajectory buffers
+        self.is_ready = True
+        self.randomize_once()
+        self.ready.emit()
+
+    def start_block(self, seed: int | None = None, out_path: str | None = None, rounds: int | None = None):
+        """Start a new sequence of rounds in this window: new plan, new results file."""
+        self.scheduler.cancel()
+        self._apply_block_options()
+        self._setup_session(seed, out_path, rounds)
+        self.randomize_once()
+
+    def _apply_block_options(self):
+        # OPTIONS a block may change (TARGET, QUIET_ROUNDS); the plan is rebuilt for the new target size
+        self._quiet_rounds = bool(OPTIONS.get("QUIET_ROUNDS", False))
+        kind = OPTIONS.get("TARGET", "button")
+        if kind == self._target_kind:
+            return
+        if self.rand_btn is not None:
+            self.rand_btn.hide()
+            self.rand_btn.deleteLater()
+        self.rand_btn = make_target(kind, self.container)
+        self.rand_btn.clicked.connect(self._on_target_clicked)
+        self._target_kind = kind
+
+    def _setup_session(self, seed: int | None, out_path: str | None, rounds: int | None = None):
+        # ---------- per-round plan: background, target, cursor start, pause (plan.py) ----------
+        participant = self.participant = int(OPTIONS.get("PARTICIPANT", 0))
+        self.plan = None
+        self._plan_size = None
+        loaded = None
+        if OPTIONS.get("PLAN"):
+            doc = plan.load_plans(OPTIONS["PLAN"])
+            loaded = doc["plans"][participant]
+            self._plan_size = doc["size"]
+            seed = loaded["seed"]
+
+        # one master seed per session (kept for replay.py); None -> OPTIONS["SEED"] -> fresh
+        if seed is None:
+            seed = OPTIONS.get("SEED")
+        self.seed = int(seed) if seed is not None else random.SystemRandom().randrange(2**63)
+        self._rng = plan.streams(self.seed)
+
+        # ---------- low / mid / high directories (asset manifest: one file read) ----------
+        self.bg_levels = ("office", "game", "stock")
+        base_root = Path("./py/assets")
+        assets = manifest.load(base_root)
+        if loaded is not None:
+            self.plan = loaded["rounds"]
+            self._bgs = [(r["level"], r["bg"]) for r in self.plan]
+            self._pauses = [r["pause_ms"] for r in self.plan]
+        else:
+            all_by_level = manifest.by_level(assets, base_root, self.bg_levels)
+            self._bgs = plan.bg_sequence(all_by_level, participant, self._rng["bg"])
+            if not self._bgs:
+                self._bgs = [("mid", "./py/assets/mid/bg1.png")]
+            self._pauses = plan.pauses(len(self._bgs), self._rng["pause"])
+        if rounds is not None:  # shorter blocks: first `rounds` of the plan
+            self._bgs, self._pauses = self._bgs[:rounds], self._pauses[:rounds]
+            if self.plan is not None:
+                self.plan = self.plan[:rounds]
+        self.bg_paths = [path for _, path in self._bgs]
+        self.prefetcher.formats = manifest.formats(assets, base_root)
 
-            seq.append(path)
-            last_level = lvl
+        self.total_rounds = len(self.bg_paths)
+        self.round_no = 0
+        self.bg_path = self.bg_paths[0]
 
-        return seq
+        # out_path=None -> auto path decision
+        measure.setup_measure(self.total_rounds, out_path=out_path,
+                              info={"seed": self.seed, "participant": participant})
 
     # single shot
     def randomize_once(self):
         if self.round_no >= self.total_rounds:
-            Toast.show_toast(parent=self, text="All rounds finished!", duration_ms=1200, pos="top-center")
-            self.close()
+            self.toasts.show("All rounds finished!", duration_ms=1200, pos="top-center")
+            self.finished.emit()
+            if self.close_when_done:
+                self.close()
             return
         
         self.round_no += 1
 
-        # random pause
-        pause = random.randint(1000, 5000) # (1 - 5 sec)
+        # planned pause (1 - 5 sec)
+        pause = self._pauses[self.round_no - 1]
 
-        # remove existing button
-        if self.rand_btn:
-            self.rand_btn.setParent(None)
-            self.rand_btn.deleteLater()
-            self.rand_btn = None
+        # decode this round's background while waiting
+        self.prefetcher.request(self._bg_path_for(self.round_no), self.container.decode_size())
 
-        # sleeper (THREAD way)
-        self._thr = QtCore.QThread(self)     # maintain reference (prevent garbage collection)
-        self._worker = Sleeper()
-        self._worker.moveToThread(self._thr)
+        # hide the target until the next round
+        self.rand_btn.hide()
 
-        self._thr.started.connect(lambda: self._worker.run(pause)) # ms
-        self._worker.done.connect(self._randomize_once_impl)  # real implementation
-        self._worker.done.connect(self._thr.quit)
-        self._worker.done.connect(self._worker.deleteLater)
-        self._thr.finished.connect(self._thr.deleteLater)
-        self._thr.start()
+        # pause on the event loop, then _randomize_once_impl (real implementation)
+        self.scheduler.schedule(self.round_no, pause)
 
     def _randomize_once_impl(self):
         if self.round_no > self.total_rounds:
-            Toast.show_toast(parent=self, text="All rounds finished!", duration_ms=1200, pos="top-center")
+            self.toasts.show("All rounds finished!", duration_ms=1200, pos="top-center")
             return
-    
+
+        if self.profiler is not None:
+            self.profiler.set_round(self.round_no, self._bg_path_for(self.round_no))
         self.randomize_background()
         self.place_random_button()
         self.move_cursor_randomly()
-        Toast.show_toast(parent=self, text="Find and click the button from now!", duration_ms=1000, pos="top-center")
+        if self._quiet_rounds:
+            self.toasts.set_quiet(True)
+        else:
+            self.toasts.show("Find and click the button from now!", duration_ms=1000, pos="top-center")
 
         measure.start_round(self.round_no)
 
+    def _plan_for(self, round_no: int) -> dict:
+        # positions need the settled layout: built (or fit) at the first round's onset
+        if self.plan is None or self._plan_size is not None:
+            cr = self.container.contentsRect()
+            ts = self.rand_btn.frameGeometry().size()
+            if self.plan is None:
+                self.plan = plan.make_rounds(self._rng, self._bgs, (cr.left(), cr.top(), cr.width(), cr.height()),
+                                             (ts.width(), ts.height()), pause_ms=self._pauses)
+            else:
+                self.plan = plan.fit(self.plan, self._plan_size, (cr.width(), cr.height()),
+                                     (ts.width(), ts.height()))
+                self._plan_size = None
+        return self.plan[min(max(round_no - 1, 0), len(self.plan) - 1)]
+
+    def dump_plan(self, path):
+        """Write the rounds as played (target rects in container px) in plan.py's file format."""
+        if self.plan is None:
+            return  # no round was shown
+        if self._plan_size is not None:
+            size = self._plan_size
+        else:
+            cr = self.container.contentsRect()
+            size = (cr.width(), cr.height())
+        ts = self.plan[0]["target"][2:]
+        plan.save_plans(path, [{"participant": self.participant, "seed": self.seed, "rounds": self.plan}],
+                        size=size, target_size=ts)
+
     def place_random_button(self):
-        # re-create random button
-        self.rand_btn = QtWidgets.QPushButton("Click Me!", self.container)
-        self.rand_btn.setFont(QtGui.QFont("Arial", 16, QtGui.QFont.Weight.Bold))
-        self.rand_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2ecc71;   
-                color: white;               
-                border-radius: 8px;         
-                padding: 6px 12px;          
-            }
-            QPushButton:hover {
-                background-color: #27ae60;  
-            }
-            QPushButton:pressed {
-                background-color: #1e8449;  
-            }
-        """)
-        # self.rand_btn.resize(self.rand_btn.sizeHint())
-
-        # calculate button size and container region
-        br = self.rand_btn.frameGeometry()
-        cr = self.container.contentsRect()
-        max_x = max(cr.width() - br.width(), 0)
-        max_y = max(cr.height() - br.height(), 0)
-
-        rx = random.randint(cr.left(), cr.left() + max_x)
-        ry = random.randint(cr.top(), cr.top() + max_y)
-        self.rand_btn.move(rx, ry)
-
-        # when clicking the button
-        def on_clicked():
-            elapsed_ms, clicks = measure.end_round(self.bg_paths)
-            Toast.show_toast(parent=self,
-                     text=f"Round {self.round_no} : {elapsed_ms:.1f} ms, {clicks} clicks",
-                     duration_ms=900, pos="top-center")
-            self.randomize_once()
-
-        self.rand_btn.clicked.connect(on_clicked)
+        # planned top-left (container coordinates)
+        x, y = self._plan_for(self.round_no)["target"][:2]
+        self.rand_btn.move(x, y)
         self.rand_btn.show()
 
-    def move_cursor_randomly(self, min_dist_px: int = 150):
-        # conversion:
-        # choose random coordinates in container → global coordinates
-        cr = self.container.contentsRect()
-        if cr.width() <= 0 or cr.height() <= 0:
-            return
-        
-        # center of button
-        btn_center = None
-        if self.rand_btn is not None and self.rand_btn.isVisible():
-            # container position
-            g = self.rand_btn.geometry()
-            btn_center = g.center()
-        
-        rng = random.Random()
-        min_dist_sq = float(min_dist_px) ** 2
-
-        best_pt = None
-        best_d2 = -1.0
-
-        # too small region -> limit the number of trials
-        for _ in range(50): # number of trials
-            rx = random.randint(cr.left(), cr.right())
-            ry = random.randint(cr.top(), cr.bottom())
-            cand = QtCore.QPoint(rx, ry)
-
-            if btn_center is not None:
-                dx = cand.x() - btn_center.x()
-                dy = cand.y() - btn_center.y()
-                d2 = dx**2 + dy**2
-
-                if d2 < min_dist_sq:
-                    continue
-
-                if d2 > best_d2:
-                    best_d2 = d2
-                    best_pt = cand
-                    continue
-
-            
-            # condition is satisfied
-            best_pt = cand
-            break
-
-        # there's no best, then use the farest one.
-        if best_pt is None:
-            return
-        
-        global_pt = self.container.mapToGlobal(best_pt)
-        QtGui.QCursor.setPos(global_pt)
+    # when clicking the target
+    def _on_target_clicked(self):
+        elapsed_ms, clicks = measure.end_round(self.bg_paths)
+        self.toasts.set_quiet(False)
+        self.toasts.show(f"Round {self.round_no} : {elapsed_ms:.1f} ms, {clicks} clicks",
+                         duration_ms=900, pos="top-center")
+        self.randomize_once()
+
+    def move_cursor_randomly(self):
+        # planned start point, drawn directly from the container points at least
+        # plan.MIN_DIST_PX from the target center (no trials, no fallback case)
+        x, y = self._plan_for(self.round_no)["cursor"]
+        QtGui.QCursor.setPos(self.container.mapToGlobal(QtCore.QPoint(x, y)))
+
+    def _bg_path_for(self, round_no: int) -> str:
+        idx = min(max(round_no - 1, 0), len(self.bg_paths) - 1)
+        return self.bg_paths[idx]
 
     def randomize_background(self):
         if not self.bg_paths:
             return
-        idx = min(self.round_no - 1, len(self.bg_paths) - 1)
-        self.bg_path = self.bg_paths[idx]
-        style_path = self.bg_path.replace("\\", "/")
-        self.container.setStyleSheet(f"""
-            QWidget#bg {{
-                border-image: url('{style_path}') 0 0 0 0 stretch stretch;
-            }}
-        """)
+        self.bg_path = self._bg_path_for(self.round_no)
+        # already decoded off the GUI thread -> front/back swap only
+        self.container.set_back(self.prefetcher.take(self.bg_path, self.container.decode_size()))
+        self.container.swap()
 
 def cleanup_override_cursor():
     # clean-up stack
     while QtWidgets.QApplication.overrideCursor() is not None:
         QtWidgets.QApplication.restoreOverrideCursor()
 
-def install_click_filter_once():
+def install_click_filter_once(widget: QtWidgets.QWidget | None = None):
+    """Route click counting for widget's window (default: the active window)
+    through the shared dispatcher, at most once per application."""
     app = QtWidgets.QApplication.instance()
     if app is None:
         return
     if app.property("_click_filter_installed"):
         return
+    widget = widget or app.activeWindow()
+    if widget is None:
+        return
     f = _ClickFilter()
-    app.installEventFilter(f)
+    EventDispatcher.instance().subscribe(window_of(widget), _TRAJ_KINDS, f.eventFilter)
     app._click_filter_ref = f                 # GC protection
     app.setProperty("_click_filter_installed", True)
\ No newline at end of file
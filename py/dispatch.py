@@ -0,0 +1,81 @@
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Tuple
+
+from PyQt6 import QtWidgets, QtCore, QtGui
+from PyQt6.QtCore import QEvent
+
+Handler = Callable[[QtCore.QObject, QEvent], bool]
+
+
+def window_of(widget: QtWidgets.QWidget) -> QtGui.QWindow:
+    """Native QWindow of widget's top-level (created if not shown yet).
+    Input reaches the QWindow once, before it is propagated through widgets."""
+    top = widget.window()
+    if top.windowHandle() is None:
+        top.winId()  # creates the platform window
+    return top.windowHandle()
+
+
+class EventDispatcher(QtCore.QObject):
+    """Single event filter that routes events by type to subscribers.
+
+    The dispatcher installs itself only on the objects subscribers name (a
+    window, a widget, rarely the application), so unrelated events never cross
+    into Python, and events of types nobody registered for are rejected with
+    one dict lookup. `seen` counts events that reached the filter, `delivered`
+    counts handler calls per event type.
+    """
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._routes: Dict[QEvent.Type, List[Tuple[QtCore.QObject, Handler]]] = {}
+        self._targets: List[QtCore.QObject] = []
+        self.seen = 0
+        self.delivered: Counter = Counter()
+
+    @classmethod
+    def instance(cls) -> "EventDispatcher":
+        """Application-wide dispatcher (created on first use)."""
+        app = QtWidgets.QApplication.instance()
+        d = getattr(app, "_event_dispatcher", None)
+        if d is None:
+            d = cls(app)
+            app._event_dispatcher = d  # GC protection
+        return d
+
+    def subscribe(self, target: QtCore.QObject, types: Iterable[QEvent.Type], handler: Handler) -> None:
+        """Call handler(obj, event) for events of `types` sent to target.
+        A True return consumes the event, like eventFilter."""
+        if not any(t is target for t in self._targets):
+            self._targets.append(target)
+            target.installEventFilter(self)
+        for et in types:
+            self._routes.setdefault(et, []).append((target, handler))
+
+    def unsubscribe(self, handler: Handler) -> None:
+        for et in list(self._routes):
+            subs = [s for s in self._routes[et] if s[1] != handler]
+            if subs:
+                self._routes[et] = subs
+            else:
+                del self._routes[et]
+        # stop filtering objects nobody listens to anymore
+        live = [t for subs in self._routes.values() for t, _ in subs]
+        for target in [t for t in self._targets if not any(t is l for l in live)]:
+            target.removeEventFilter(self)
+            self._targets = [t for t in self._targets if t is not target]
+
+    def stats(self) -> dict:
+        return {"seen": self.seen, "delivered": sum(self.delivered.values()),
+                "by_type": {et.name: n for et, n in self.delivered.items()}}
+
+    def eventFilter(self, obj, e):
+        self.seen += 1
+        subs = self._routes.get(e.type())
+        if subs is None:
+            return False
+        for target, handler in subs:
+            if target is obj:
+                self.delivered[e.type()] += 1
+                if handler(obj, e):
+                    return True
+        return False
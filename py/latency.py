@@ -0,0 +1,145 @@
+"""Toggle latency: trigger -> visible cursor, per activation.
+
+    python py/latency.py <a_latency.csv> [<b_latency.csv> ...] [--budget 16.7]
+
+compares sessions side by side (p50 / p95 per stage), e.g. ACTION=big-size
+(override cursor) against ACTION=overlay-big-size (overlay window).
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import argparse, sys, time
+
+# histogram bin edges (ms); the last bin is open-ended
+BINS_MS = (0.0, 0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 16.7, 33.3, 50.0, 100.0)
+STAGES = ("input_ms", "build_ms", "apply_ms", "frame_ms", "total_ms")
+
+
+class ToggleLatency:
+    """Trigger -> visible cursor timing for CursorToggle.
+
+    Per activation:
+      input_ms : event timestamp -> filter ran. Qt event timestamps are on the
+                 platform's input clock, so this is the delay in excess of the
+                 fastest delivery seen so far (offset calibrated on every event
+                 passed to observe()).
+      build_ms : filter ran -> cursor built / fetched from cache
+      apply_ms : -> setOverrideCursor returned
+      frame_ms : -> next UpdateRequest (frame) of the window
+    """
+    def __init__(self, budget_ms: float = 16.7):
+        self.budget_ms = float(budget_ms)
+        self.samples: List[tuple] = []  # (trigger, ev_ms, input, build, apply, frame, total)
+        self._offset_ms: Optional[float] = None
+        self._cur: Optional[list] = None  # [trigger, ev_ms, input, t_filter, t_built, t_applied]
+
+    def observe(self, ev_ms: int, now_ns: Optional[int] = None) -> float:
+        """Calibrate the input-clock offset; returns the event's excess delay (ms)."""
+        if not ev_ms:
+            return 0.0
+        now_ms = (now_ns if now_ns is not None else time.perf_counter_ns()) / 1e6
+        d = now_ms - ev_ms
+        if self._offset_ms is None or d < self._offset_ms:
+            self._offset_ms = d
+        return d - self._offset_ms
+
+    def begin(self, trigger: str, ev_ms: int) -> None:
+        t = time.perf_counter_ns()
+        self._cur = [trigger, int(ev_ms), self.observe(ev_ms, t), t, t, t]
+
+    def built(self) -> None:
+        if self._cur is not None:
+            self._cur[4] = time.perf_counter_ns()
+
+    def applied(self) -> None:
+        if self._cur is not None:
+            self._cur[5] = time.perf_counter_ns()
+
+    @property
+    def waiting_for_frame(self) -> bool:
+        return self._cur is not None
+
+    def frame(self) -> None:
+        cur = self._cur
+        if cur is None:
+            return
+        self._cur = None
+        trigger, ev_ms, inp, t_f, t_b, t_a = cur
+        t_fr = time.perf_counter_ns()
+        build, apply, frame = (t_b - t_f) / 1e6, (t_a - t_b) / 1e6, (t_fr - t_a) / 1e6
+        self.samples.append((trigger, ev_ms, inp, build, apply, frame, inp + build + apply + frame))
+
+    # ----------------- reporting -----------------
+    def histogram(self, stage: str) -> List[int]:
+        col = STAGES.index(stage) + 2
+        counts = [0] * len(BINS_MS)
+        for s in self.samples:
+            v = s[col]
+            i = len(BINS_MS) - 1
+            while i > 0 and v < BINS_MS[i]:
+                i -= 1
+            counts[i] += 1
+        return counts
+
+    def summary(self) -> dict:
+        out = {"n": len(self.samples), "budget_ms": self.budget_ms}
+        if not self.samples:
+            return out
+        for k, stage in enumerate(STAGES):
+            vals = sorted(s[k + 2] for s in self.samples)
+            n = len(vals)
+            out[stage] = {"p50": vals[n // 2], "p95": vals[min(n - 1, int(0.95 * n))], "max": vals[-1]}
+        out["within_budget"] = sum(s[-1] <= self.budget_ms for s in self.samples) / len(self.samples)
+        return out
+
+    def dump(self, path: str | Path) -> None:
+        """Write raw samples (<path>) and per-stage histograms (<stem>_hist.csv)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("w", encoding="utf-8") as f:
+            f.write("trigger,event_ms," + ",".join(STAGES) + "\n")
+            for trig, ev_ms, *vals in self.samples:
+                f.write(f"{trig},{ev_ms}," + ",".join(f"{v:.3f}" for v in vals) + "\n")
+        edges = [f"{BINS_MS[i]}-{BINS_MS[i + 1] if i + 1 < len(BINS_MS) else 'inf'}" for i in range(len(BINS_MS))]
+        with path.with_name(path.stem + "_hist.csv").open("w", encoding="utf-8") as f:
+            f.write("stage," + ",".join(edges) + "\n")
+            for stage in STAGES:
+                f.write(stage + "," + ",".join(map(str, self.histogram(stage))) + "\n")
+            f.write(f"# within_budget({self.budget_ms}ms)={self.summary().get('within_budget', 1.0):.3f}\n")
+
+
+def load_samples(path: str | Path) -> Dict[str, List[float]]:
+    """{stage: values} of a dumped samples file."""
+    out: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+    with Path(path).open("r", encoding="utf-8") as f:
+        header = f.readline().strip().split(",")
+        cols = [(header.index(stage), stage) for stage in STAGES if stage in header]
+        for line in f:
+            parts = line.strip().split(",")
+            if len(parts) == len(header):
+                for i, stage in cols:
+                    out[stage].append(float(parts[i]))
+    return out
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description="Compare toggle latency of recorded sessions.")
+    ap.add_argument("files", nargs="+", help="<results>_latency.csv")
+    ap.add_argument("--budget", type=float, default=16.7, help="ms")
+    args = ap.parse_args(argv)
+
+    print("file,n," + ",".join(f"{s}_p50,{s}_p95" for s in STAGES) + ",within_budget")
+    for path in args.files:
+        cols = load_samples(path)
+        n = len(cols["total_ms"])
+        cells = []
+        for stage in STAGES:
+            vals = sorted(cols[stage])
+            cells += [f"{vals[len(vals) // 2]:.3f}", f"{vals[min(len(vals) - 1, int(0.95 * len(vals)))]:.3f}"] \
+                if vals else ["", ""]
+        within = sum(v <= args.budget for v in cols["total_ms"]) / n if n else 1.0
+        print(f"{Path(path).name},{n}," + ",".join(cells) + f",{within:.3f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,215 @@
+"""Background asset manifest (stdlib only).
+
+<assets>/manifest.json lists every bg*.* image under the assets root: relative
+path, level (sub-directory, "" for the root itself), number in the name, real
+format (sniffed from the content; several .png files are JPEGs), dimensions,
+size, mtime and sha256. It is built once and then loaded with one file read.
+Staleness is checked on directory mtimes only (one per level, plus the root's,
+kept as the manifest file's own mtime), so the cost does not grow with the
+number of images; files replaced in place under the same name are picked up by
+`python py/manifest.py --check`.
+
+    python py/manifest.py [--assets py/assets] [--rebuild | --check]
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse, hashlib, json, os, re, sys
+
+VERSION = 1
+MANIFEST_NAME = "manifest.json"
+GLOB = "bg*.*"
+NAME_RE = re.compile(r"bg(\d+)\.(png|jpg|jpeg)$", re.I)
+
+# JPEG start-of-frame markers (dimensions live there)
+_SOF = {0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7, 0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF}
+
+
+def sniff(data: bytes) -> Tuple[str, int, int]:
+    """(format, width, height) from the file content; ("unknown", 0, 0) if not recognised."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "png", int.from_bytes(data[16:20], "big"), int.from_bytes(data[20:24], "big")
+    if data[:2] == b"\xff\xd8":
+        i = 2
+        while i + 9 < len(data):
+            if data[i] != 0xFF:
+                i += 1
+                continue
+            marker = data[i + 1]
+            if marker == 0xFF or marker == 0x01 or 0xD0 <= marker <= 0xD8:
+                i += 1 if marker == 0xFF else 2
+                continue
+            if marker in _SOF:
+                return "jpeg", int.from_bytes(data[i + 7:i + 9], "big"), int.from_bytes(data[i + 5:i + 7], "big")
+            i += 2 + int.from_bytes(data[i + 2:i + 4], "big")
+        return "jpeg", 0, 0
+    if data[:4] == b"GIF8":
+        return "gif", int.from_bytes(data[6:8], "little"), int.from_bytes(data[8:10], "little")
+    if data[:2] == b"BM":
+        return ("bmp", abs(int.from_bytes(data[18:22], "little", signed=True)),
+                abs(int.from_bytes(data[22:26], "little", signed=True)))
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        if data[12:16] == b"VP8X":
+            return "webp", int.from_bytes(data[24:27], "little") + 1, int.from_bytes(data[27:30], "little") + 1
+        return "webp", 0, 0
+    return "unknown", 0, 0
+
+
+def _describe(root: Path, rel: str, st: os.stat_result) -> dict:
+    data = (root / rel).read_bytes()
+    fmt, w, h = sniff(data)
+    level, _, name = rel.rpartition("/")
+    m = re.search(r"(\d+)", name)
+    return {"path": rel, "level": level,
+            "index": int(m.group(1)) if m else None, "format": fmt, "width": w, "height": h,
+            "bytes": st.st_size, "mtime_ns": st.st_mtime_ns, "sha256": hashlib.sha256(data).hexdigest()}
+
+
+def _prefix(root: str | Path) -> str:
+    # prefix + rel == str(Path(root) / rel), without a Path per entry
+    base = str(Path(root))
+    return "" if base == "." else base + os.sep
+
+
+def join(root: str | Path, rel: str) -> str:
+    """Entry path (posix, relative to root) as a root-joined OS path."""
+    return _prefix(root) + rel.replace("/", os.sep)
+
+
+def _dirs(root: Path) -> List[Path]:
+    return [root] + sorted(p for p in root.iterdir() if p.is_dir())
+
+
+def _dir_mtimes(root: Path) -> Dict[str, int]:
+    # level directories only: writing the manifest changes the root's mtime, which
+    # is stamped on the manifest file instead (see save)
+    return {d.name: d.stat().st_mtime_ns for d in _dirs(root) if d != root}
+
+
+def build(root: str | Path, previous: Optional[dict] = None, workers: int = 8) -> dict:
+    """Index root; entries whose size and mtime did not change are reused from previous."""
+    root = Path(root)
+    old = {e["path"]: e for e in (previous or {}).get("entries", [])}
+    todo, entries = [], []
+    for d in _dirs(root):
+        for p in d.glob(GLOB):
+            if not p.is_file():
+                continue
+            rel = p.relative_to(root).as_posix()
+            st = p.stat()
+            e = old.get(rel)
+            if e is not None and e["bytes"] == st.st_size and e["mtime_ns"] == st.st_mtime_ns:
+                entries.append(e)
+            else:
+                todo.append((rel, st))
+    if todo:
+        # hashing is I/O bound; a few threads keep thousands of files quick
+        with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="manifest") as ex:
+            entries.extend(ex.map(lambda a: _describe(root, *a), todo))
+    entries = [e for e in entries if e["format"] != "unknown"]
+    entries.sort(key=lambda e: (e["level"], e["index"] if e["index"] is not None else -1, e["path"]))
+    return {"version": VERSION, "dirs": _dir_mtimes(root), "entries": entries}
+
+
+def save(root: str | Path, manifest: dict) -> None:
+    root = Path(root)
+    path = root / MANIFEST_NAME
+    tmp = path.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, separators=(",", ":")), encoding="utf-8")
+    os.replace(tmp, path)
+    # the replace changed the root's mtime: keep the new one as the manifest file's
+    # own mtime (metadata only, the content stays as atomically written)
+    st = root.stat()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def is_stale(root: str | Path, manifest: dict) -> bool:
+    root = Path(root)
+    try:
+        return (manifest.get("version") != VERSION or manifest.get("dirs") != _dir_mtimes(root)
+                or (root / MANIFEST_NAME).stat().st_mtime_ns != root.stat().st_mtime_ns)
+    except OSError:
+        return True
+
+
+def load(root: str | Path = "./py/assets", *, rebuild: bool = False) -> dict:
+    """The manifest of root: one read when it is current, else an incremental rebuild (saved)."""
+    root = Path(root)
+    manifest = None
+    try:
+        manifest = json.loads((root / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        pass
+    if manifest is not None and not rebuild and not is_stale(root, manifest):
+        return manifest
+    if not root.is_dir():
+        return {"version": VERSION, "dirs": {}, "entries": []}
+    manifest = build(root, None if rebuild else manifest)
+    try:
+        save(root, manifest)
+    except OSError:
+        pass  # read-only assets: still usable for this run
+    return manifest
+
+
+def check(root: str | Path, manifest: dict) -> List[str]:
+    """Entries whose file is gone or changed since the manifest was built (stats every file)."""
+    root = Path(root)
+    out = []
+    for e in manifest["entries"]:
+        try:
+            st = (root / e["path"]).stat()
+        except OSError:
+            out.append(f"missing {e['path']}")
+            continue
+        if st.st_size != e["bytes"] or st.st_mtime_ns != e["mtime_ns"]:
+            out.append(f"changed {e['path']}")
+    return out
+
+
+def by_level(manifest: dict, root: str | Path = "./py/assets",
+             levels: Sequence[str] = ("office", "game", "stock"),
+             pattern: re.Pattern = NAME_RE) -> Dict[str, List[str]]:
+    """{level: [paths]} ordered by the number in the name; paths are root-joined."""
+    prefix, sep = _prefix(root), os.sep
+    out: Dict[str, List[str]] = {lvl: [] for lvl in levels}
+    for e in manifest["entries"]:
+        lst = out.get(e["level"])
+        if lst is not None and pattern.search(e["path"]):
+            lst.append(prefix + e["path"].replace("/", sep))
+    return out
+
+
+def formats(manifest: dict, root: str | Path = "./py/assets") -> Dict[str, str]:
+    """{path: real format} (decoder hint for the prefetcher)."""
+    prefix, sep = _prefix(root), os.sep
+    return {prefix + e["path"].replace("/", sep): e["format"] for e in manifest["entries"]}
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description="Build / check the background asset manifest.")
+    ap.add_argument("--assets", default="./py/assets")
+    g = ap.add_mutually_exclusive_group()
+    g.add_argument("--rebuild", action="store_true", help="re-read and re-hash every file")
+    g.add_argument("--check", action="store_true", help="stat every file; rebuild if any changed")
+    args = ap.parse_args(argv)
+
+    m = load(args.assets, rebuild=args.rebuild)
+    if args.check:
+        changed = check(args.assets, m)
+        for c in changed:
+            print(c)
+        if changed:
+            m = load(args.assets, rebuild=True)
+    fmts: Dict[str, int] = {}
+    for e in m["entries"]:
+        fmts[e["format"]] = fmts.get(e["format"], 0) + 1
+    mismatched = sum(1 for e in m["entries"]
+                     if Path(e["path"]).suffix.lower().lstrip(".").replace("jpg", "jpeg") != e["format"])
+    print(f"{len(m['entries'])} images {fmts}, {mismatched} with a misleading extension "
+          f"-> {Path(args.assets) / MANIFEST_NAME}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
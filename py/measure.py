@@ -1,22 +1,32 @@
 from pathlib import Path
-import time, threading, re, glob, os
-from typing import List, Tuple, Optional, Any, LiteralString
+import time, threading, queue, atexit, re, os, sys
+from typing import Callable, List, Tuple, Optional, Any
 
 # constants
 from constant import OPTIONS
+import trajectory
 
 # --- Module-level state (thread-safe) ---
 _lock = threading.Lock()
 _t0_ns: Optional[int] = None          # round start time (ns)
 _round_no: int = 0
 _total_rounds: int = 0
-_out_path: LiteralString = os.path.join(
-    OPTIONS["DIR"], 
-    OPTIONS["TRIGGER"] + "_" + OPTIONS["ACTION"] + "_" + time.strftime("%H%M%S", time.localtime())
-        + "_" + OPTIONS["FILENAME"]
-)
+_out_path: Optional[Path] = None      # decided by setup_measure (default: _default_out_path)
 _header_written: bool = False
+_writer: Optional["_ResultWriter"] = None
 _clicks_in_round: int = 0
+_round_t0_real_ns: int = 0            # round start on perf_counter (click times; _clock may be a tape)
+# per-round pointer trajectory (None = disabled or not allocated yet, see prepare)
+_traj: Optional[trajectory.TrajectoryRecorder] = None
+
+# extra destinations of finished rounds besides the CSV (store.SQLiteSink, collector.CollectorSink):
+# put_round(round, time_ms, clicks, path), put_click(round, t_ms, x, y, button),
+# put_blob(name, data), close(timeout)
+_sinks: List[Any] = []
+_closers: List[threading.Thread] = []  # writers / sinks of earlier sessions still finishing (see setup_measure)
+
+# round-timing clock override (replay.py records / plays back its readings); None = perf_counter_ns
+_clock: Optional[Callable[[], int]] = None
 
 # robust de-duplication for multiple press notifications
 _seen_click_keys: set = set()
@@ -24,39 +34,292 @@ _last_click_ns: Optional[int] = None   # fallback dedup when no event timestamp
 
 
 # ----------------- I/O helpers -----------------
-def _write_header() -> None:
-    _out_path.parent.mkdir(parents=True, exist_ok=True)
-    with _out_path.open("w", encoding="utf-8") as f:
-        f.write("round,time(ms),clicks,path\n")
+def _default_out_path() -> Path:
+    return Path(os.path.join(
+        OPTIONS["DIR"],
+        OPTIONS["TRIGGER"] + "_" + OPTIONS["ACTION"] + "_" + time.strftime("%H%M%S", time.localtime())
+            + "_" + OPTIONS["FILENAME"]
+    ))
+
+
+_HEADER = "round,time(ms),clicks,path\n"
+_STOP = object()
+_POLL_S = 0.1  # flush(): how often a waiter checks that the writer is still alive
+
+# durability policies
+#   always   : flush + fsync after every batch (nothing lost)
+#   interval : flush + fsync at most every flush_ms (lose <= flush_ms on a crash)
+#   os       : flush to the OS every flush_ms, never fsync (survives app crash, not power loss)
+_POLICIES = ("always", "interval", "os")
+
+
+class _ResultWriter(threading.Thread):
+    """Owns the open results file; lines arrive through a queue, so the click
+    handler never waits on disk."""
+    def __init__(self, path: Path, *, policy: str = "interval", flush_ms: int = 250,
+                 append: bool = False):
+        super().__init__(name="measure-writer", daemon=True)
+        if policy not in _POLICIES:
+            raise ValueError(f"unknown durability policy: {policy!r} (expected one of {_POLICIES})")
+        self.path = path
+        self.append = append
+        self.policy = policy
+        self.flush_s = max(int(flush_ms), 0) / 1000.0
+        self._q: queue.SimpleQueue = queue.SimpleQueue()
+        self.error: Optional[OSError] = None  # why the thread stopped (file could not be opened / written)
+        self.start()
+
+    def _check(self) -> None:
+        # surfaced to the caller, as the synchronous writer did
+        if self.error is not None:
+            raise self.error
+
+    def put(self, line: str) -> None:
+        self._check()
+        self._q.put(line)
+
+    def put_blob(self, path: Path, data: bytes) -> None:
+        """Write data as its own file (e.g. a round trajectory)."""
+        self._q.put((path, data))
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Block until everything queued so far is on disk (per policy).
+        Raises the writer's OSError if the file could not be opened or written."""
+        done = threading.Event()
+        if self.is_alive():
+            self._q.put(done)
+            # the thread may die with the event still queued: wait in steps
+            end = None if timeout is None else time.monotonic() + timeout
+            while self.is_alive():
+                step = _POLL_S if end is None else min(_POLL_S, end - time.monotonic())
+                if step <= 0 or done.wait(step):
+                    break
+        self._check()
+        return done.is_set()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        if not self.is_alive():
+            return
+        self._q.put(_STOP)
+        self.join(timeout)
+
+    def _sync(self, f) -> None:
+        f.flush()
+        if self.policy != "os":
+            os.fsync(f.fileno())
+
+    def _write_blob(self, path: Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open("wb") as f:
+            f.write(data)
+            self._sync(f)
+
+    def run(self) -> None:
+        try:
+            self._run()
+        except OSError as e:
+            self.error = e
+            print(f"measure: results file {self.path}: {e}", file=sys.stderr)
+
+    def _run(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a" if self.append else "w", encoding="utf-8") as f:
+            if not self.append:
+                f.write(_HEADER)
+                self._sync(f)
+            dirty = False
+            deadline = 0.0
+            stop = False
+            while not stop:
+                timeout = max(deadline - time.monotonic(), 0.0) if dirty else None
+                try:
+                    item = self._q.get(timeout=timeout)
+                except queue.Empty:
+                    item = None  # flush window elapsed
+
+                # drain whatever else is queued as one batch
+                waiters = []
+                while item is not None:
+                    if item is _STOP:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    elif isinstance(item, tuple):
+                        # a lost trajectory must not stop the results rows behind it
+                        try:
+                            self._write_blob(*item)
+                        except OSError as e:
+                            print(f"measure: could not write {item[0]}: {e}", file=sys.stderr)
+                    else:
+                        if not dirty:
+                            deadline = time.monotonic() + self.flush_s
+                        f.write(item)
+                        dirty = True
+                    try:
+                        item = self._q.get_nowait()
+                    except queue.Empty:
+                        item = None
+
+                if dirty and (stop or waiters or self.policy == "always" or time.monotonic() >= deadline):
+                    self._sync(f)
+                    dirty = False
+                for w in waiters:
+                    w.set()
+
+
+def _close_writer() -> None:
+    global _writer
+    if _writer is not None:
+        _writer.close()
+        _writer = None
+
+
+def _retire_writer() -> None:
+    # a new session (blocks.py) must not wait on the previous file's last fsync;
+    # the writer stops by itself once its queue is written, close() joins it
+    global _writer
+    _closers[:] = [t for t in _closers if t.is_alive()]
+    _writer.close(timeout=0)
+    _closers.append(_writer)
+    _writer = None
+
+
+def _open_writer(append: bool) -> None:
+    global _writer
+    if _writer is not None and _writer.path != Path(_out_path):
+        _retire_writer()
+    else:
+        _close_writer()  # same file: the old writer has to finish first
+    _writer = _ResultWriter(Path(_out_path),
+                            policy=str(OPTIONS.get("DURABILITY", "interval")),
+                            flush_ms=int(OPTIONS.get("FLUSH_MS", 250)),
+                            append=append)
 
 
 def _write_header_if_needed() -> None:
     global _header_written
     if not _header_written:
-        _write_header()
+        _open_writer(append=False)
         _header_written = True
+    elif _writer is None:
+        # reopened after close(): keep what is already on disk
+        _open_writer(append=True)
 
 
 def _append_result(round_no: int, elapsed_ms: float, clicks: int, path: str) -> None:
     _write_header_if_needed()
-    with _out_path.open("a", encoding="utf-8") as f:
-        f.write(f"{round_no},{elapsed_ms:.3f},{clicks},{path}\n")
+    _writer.put(f"{round_no},{elapsed_ms:.3f},{clicks},{path}\n")
+    for s in _sinks:
+        s.put_round(round_no, elapsed_ms, clicks, path)
+
+
+def _take_sinks() -> List[Any]:
+    """Detach the current sinks (call under _lock); close them outside it."""
+    global _sinks
+    sinks, _sinks = _sinks, []
+    return sinks
+
+
+def _close_sinks(sinks: List[Any], timeout: float = 2.0) -> None:
+    for s in sinks:
+        s.close(timeout)
+
+
+def _close_sinks_later(sinks: List[Any]) -> None:
+    # a new session (blocks.py) must not wait on the previous one's collector
+    if sinks:
+        _closers[:] = [t for t in _closers if t.is_alive()]
+        t = threading.Thread(target=_close_sinks, args=(sinks,), name="measure-sinks-close", daemon=True)
+        t.start()
+        _closers.append(t)
+
+
+def _open_sinks(info: Optional[dict] = None) -> None:
+    """Sinks configured in OPTIONS, for the session just set up."""
+    if not (OPTIONS.get("COLLECTOR") or OPTIONS.get("STORE")):
+        return
+    session = {"name": Path(_out_path).name, "trigger": OPTIONS["TRIGGER"], "action": OPTIONS["ACTION"],
+               "shape": OPTIONS.get("SHAPE"), "color": OPTIONS.get("COLOR"), "size": OPTIONS.get("SIZE"),
+               "participant": OPTIONS.get("PARTICIPANT"), **(info or {})}
+    if OPTIONS.get("STATION"):
+        session["station"] = OPTIONS["STATION"]
+    if OPTIONS.get("STORE"):
+        from store import SQLiteSink
+        _sinks.append(SQLiteSink(OPTIONS["STORE"], session))
+    if OPTIONS.get("COLLECTOR"):
+        from collector import CollectorSink
+        _sinks.append(CollectorSink(OPTIONS["COLLECTOR"], session))
+
+
+def out_path() -> Path:
+    """The results file (default name if setup_measure has not run yet)."""
+    return _out_path if _out_path is not None else _default_out_path()
+
+
+def sidecar_path(suffix: str) -> Path:
+    """Path next to the results file: <results stem><suffix>."""
+    p = out_path()
+    return p.parent / (p.stem + suffix)
+
+
+def _traj_dir() -> Path:
+    return sidecar_path("_traj")
 
 
 # ----------------- Public API -----------------
-def setup_measure(total_rounds: int, out_path: str | None = None) -> None:
-    """Initialize session and (re)write CSV header."""
+def setup_measure(total_rounds: int, out_path: str | None = None, info: Optional[dict] = None) -> None:
+    """Initialize session and (re)write CSV header.
+    info: extra session metadata for the sinks (seed, participant, ...)."""
     global _round_no, _total_rounds, _out_path, _header_written, _t0_ns, _clicks_in_round, _seen_click_keys, _last_click_ns
     with _lock:
         _round_no = 0
         _total_rounds = int(total_rounds)
-        _out_path = Path(out_path) if out_path is not None else Path(_out_path)
+        _out_path = Path(out_path) if out_path is not None else (_out_path or _default_out_path())
         _header_written = False
         _t0_ns = None
         _clicks_in_round = 0
         _seen_click_keys = set()
         _last_click_ns = None
         _write_header_if_needed()
+        old = _take_sinks()
+        _open_sinks(info)
+    _close_sinks_later(old)
+
+
+def prepare() -> None:
+    """Allocate the trajectory buffers now (otherwise on the first round).
+    Kept out of import so startup does not pay for them."""
+    global _traj
+    if _traj is None and OPTIONS.get("TRAJECTORY", True):
+        _traj = trajectory.enable(int(OPTIONS.get("TRAJECTORY_CAPACITY", 200_000)))
+
+
+def flush(timeout: Optional[float] = None) -> bool:
+    """Wait until every recorded round is written out."""
+    w = _writer
+    return w.flush(timeout) if w is not None else True
+
+
+def close() -> None:
+    """Flush and close the results file (connect to QApplication.aboutToQuit).
+    Sinks get a short grace period to deliver what is queued (outside _lock, so
+    clicks still being handled never wait on them); the CSV has it all anyway."""
+    with _lock:
+        _close_writer()
+        sinks = _take_sinks()
+    _close_sinks(sinks)
+    while _closers:
+        t = _closers.pop()
+        t.join(None if isinstance(t, _ResultWriter) else 2.0)  # results files are written out in full
+
+
+atexit.register(close)
+
+
+def set_clock(clock: Optional[Callable[[], int]]) -> None:
+    """Use clock() (ns) for round start/end instead of perf_counter_ns (None restores it)."""
+    global _clock
+    _clock = clock
 
 
 def is_active() -> bool:
@@ -69,7 +332,7 @@ def _event_key(ev: Any) -> Optional[Tuple[int, int, int, int]]:
     Key: (timestamp_ms, button, global_x, global_y)"""
     try:
         ts = int(ev.timestamp())  # QInputEvent::timestamp (ms, int)
-        btn = int(ev.button())
+        btn = ev.button().value  # PyQt6 enums are not int()-convertible
         # PyQt6: globalPosition() -> QPointF ; older: globalPos() -> QPoint
         gp = getattr(ev, "globalPosition", None)
         if gp is not None:
@@ -83,6 +346,31 @@ def _event_key(ev: Any) -> Optional[Tuple[int, int, int, int]]:
         return None
 
 
+def record_pointer(kind: int, ev: Any) -> None:
+    """Add a mouse move/press/release (trajectory.MOVE/PRESS/RELEASE) to the
+    active round's trajectory. Called for every pointer event; kept lock-free."""
+    rec = _traj
+    if rec is None or not rec.recording:
+        return
+    try:
+        p = ev.globalPosition()
+        rec.add(kind, int(ev.timestamp()), p.x(), p.y(), int(ev.buttons().value))
+    except Exception:
+        pass
+
+
+def _click_to_sinks(ev: Optional[Any], key: Optional[Tuple[int, int, int, int]]) -> None:
+    if not _sinks:
+        return
+    t_ms = (time.perf_counter_ns() - _round_t0_real_ns) / 1e6
+    if key is not None:
+        _, btn, x, y = key
+    else:
+        btn = x = y = None
+    for s in _sinks:
+        s.put_click(_round_no, t_ms, x, y, btn)
+
+
 def register_click(ev: Optional[Any] = None) -> None:
     """Increment click counter if a round is active.
     Accepts optional QMouseEvent to robustly de-duplicate duplicate press notifications."""
@@ -99,6 +387,7 @@ def register_click(ev: Optional[Any] = None) -> None:
                     return
                 _seen_click_keys.add(key)
                 _clicks_in_round += 1
+                _click_to_sinks(ev, key)
                 return
 
         # Fallback: time-based guard (ignore re-entrancy within 1 ms window)
@@ -107,18 +396,24 @@ def register_click(ev: Optional[Any] = None) -> None:
             return
         _last_click_ns = now_ns
         _clicks_in_round += 1
+        _click_to_sinks(ev, None)
 
 
 def start_round(round_no: int) -> None:
     """Call immediately AFTER button & cursor placement.
     Resets click counter and de-dup structures, then starts the timer."""
-    global _t0_ns, _round_no, _clicks_in_round, _seen_click_keys, _last_click_ns
+    global _t0_ns, _round_no, _clicks_in_round, _seen_click_keys, _last_click_ns, _round_t0_real_ns
     with _lock:
         _round_no = int(round_no)
         _clicks_in_round = 0
         _seen_click_keys = set()
         _last_click_ns = None
-        _t0_ns = time.perf_counter_ns()
+        if _traj is None:
+            prepare()
+        now_ns = _round_t0_real_ns = time.perf_counter_ns()
+        _t0_ns = now_ns if _clock is None else _clock()
+        if _traj is not None:
+            _traj.begin(_round_no, now_ns)
 
 
 def end_round(round_info) -> Tuple[float, int]:
@@ -129,10 +424,15 @@ def end_round(round_info) -> Tuple[float, int]:
         if _t0_ns is None:
             elapsed_ms = 0.0
         else:
-            elapsed_ns = time.perf_counter_ns() - _t0_ns
+            elapsed_ns = (time.perf_counter_ns() if _clock is None else _clock()) - _t0_ns
             elapsed_ms = elapsed_ns / 1e6
         clicks = _clicks_in_round
         _append_result(_round_no, elapsed_ms, clicks, round_info[_round_no-1])
+        if _traj is not None and _traj.recording:
+            blob_path, blob = trajectory.round_file(_traj_dir(), _round_no), _traj.end()
+            _writer.put_blob(blob_path, blob)
+            for s in _sinks:
+                s.put_blob(blob_path.name, blob)
         # reset for next round
         _t0_ns = None
         _clicks_in_round = 0
@@ -141,9 +441,10 @@ def end_round(round_info) -> Tuple[float, int]:
         return elapsed_ms, clicks
 
 
-def read_results(out_path: str = "measure.txt") -> List[Tuple[int, float, int]]:
-    """Read CSV into a list of (round, time_ms, clicks)."""
-    results: List[Tuple[int, float, int]] = []
+def read_results(out_path: str = "measure.txt") -> List[Tuple[int, float, int, str]]:
+    """Read CSV into a list of (round, time_ms, clicks, path).
+    Older 2/3-column files get clicks=0 / path="". See analytics.py for metrics."""
+    results: List[Tuple[int, float, int, str]] = []
     p = Path(out_path)
     if not p.exists():
         return results
@@ -153,15 +454,18 @@ def read_results(out_path: str = "measure.txt") -> List[Tuple[int, float, int]]:
             line = line.strip()
             if not line:
                 continue
-            parts = line.split(",")
+            parts = line.split(",", 3)
             try:
-                if len(parts) == 3:
+                if len(parts) == 4:
+                    r, t, c, path = parts
+                    results.append((int(r), float(t), int(c), path))
+                elif len(parts) == 3:
                     r, t, c = parts
-                    results.append((int(r), float(t), int(c)))
+                    results.append((int(r), float(t), int(c), ""))
                 elif len(parts) == 2:
                     r, t = parts
-                    results.append((int(r), float(t), 0))
-            except Exception:
+                    results.append((int(r), float(t), 0, ""))
+            except ValueError:
                 pass
     return results
 
@@ -169,13 +473,14 @@ def read_results(out_path: str = "measure.txt") -> List[Tuple[int, float, int]]:
 # ----------------- Optional helpers -----------------
 def discover_backgrounds(assets_dir: str = "./py/assets",
                          pattern: str = r"bg(\d+)\.(png|jpg|jpeg)$") -> List[Tuple[int, str]]:
+    """[(number, path)] of the backgrounds directly in assets_dir, from its manifest."""
+    import manifest
     regex = re.compile(pattern, re.IGNORECASE)
     found = []
-    for p in glob.glob(str(Path(assets_dir) / "bg*.*")):
-        m = regex.search(Path(assets_dir, p).name) if False else regex.search(Path(p).name)
+    for e in manifest.load(assets_dir)["entries"]:
+        m = regex.search(e["path"]) if e["level"] == "" else None
         if m:
-            idx = int(m.group(1))
-            found.append((idx, p))
+            found.append((int(m.group(1)), manifest.join(assets_dir, e["path"])))
     found.sort(key=lambda x: x[0])
     return found
 
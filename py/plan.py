@@ -0,0 +1,262 @@
+"""Experiment plans: every round's background, target rect, cursor start and pause,
+built up front (stdlib only).
+
+    python py/plan.py --participants 2000 --seed 7 --out plans.json [--size 1898 1024] [--target-size 133 37]
+
+Counterbalancing across participants:
+  - background levels come in blocks holding each level once; block k of
+    participant p uses level order perms[(p + k) % n!], so every order appears
+    equally often at every block position (no level twice in a row)
+  - pauses are stratified: round i gets one draw from each of n equal slices of
+    [PAUSE_MS], shuffled, so every participant sees the same pause distribution
+Cursor starts are drawn directly from the points of the container at least
+min_dist_px from the target center (no rejection sampling).
+
+Demo builds the same plan from its session seed (OPTIONS PARTICIPANT) or reads
+entry p of a plan file (OPTIONS PLAN).
+"""
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import permutations
+from math import isqrt
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+import argparse, json, random, sys, time
+
+VERSION = 1
+
+# independent random streams, all derived from one master seed
+RNG_STREAMS = ("bg", "target", "cursor", "pause")
+
+PAUSE_MS = (1000, 5000)
+MIN_DIST_PX = 150
+
+# container / target size of the default 1920x1080 window with the button target
+DEFAULT_SIZE = (1898, 1024)
+DEFAULT_TARGET_SIZE = (133, 37)
+
+
+def streams(seed: int) -> Dict[str, random.Random]:
+    return {name: random.Random(f"{seed}/{name}") for name in RNG_STREAMS}
+
+
+def participant_seed(batch_seed: int, participant: int) -> int:
+    return random.Random(f"{batch_seed}/participant/{participant}").randrange(2**63)
+
+
+# ----------------- backgrounds -----------------
+def bg_sequence(all_by_level: Dict[str, List[str]], participant: int, rng: random.Random) -> List[Tuple[str, str]]:
+    """[(level, path)] using every image once, levels counterbalanced in blocks."""
+    pools = {lvl: list(paths) for lvl, paths in all_by_level.items() if paths}
+    for paths in pools.values():
+        rng.shuffle(paths)
+    perms = list(permutations(sorted(pools)))
+    seq: List[Tuple[str, str]] = []
+    k = 0
+    while any(pools.values()):
+        block = [lvl for lvl in perms[(participant + k) % len(perms)] if pools[lvl]]
+        if seq and len(block) > 1 and block[0] == seq[-1][0]:
+            block[0], block[1] = block[1], block[0]
+        for lvl in block:
+            seq.append((lvl, pools[lvl].pop()))
+        k += 1
+    return seq
+
+
+# ----------------- pauses -----------------
+def pauses(n: int, rng: random.Random, lo: int = PAUSE_MS[0], hi: int = PAUSE_MS[1]) -> List[int]:
+    span = hi - lo + 1
+    out = [lo + int((i + rng.random()) * span / n) for i in range(n)]
+    rng.shuffle(out)
+    return out
+
+
+# ----------------- positions -----------------
+def sample_target(rng: random.Random, rect: Sequence[int], size: Sequence[int]) -> Tuple[int, int]:
+    """Top-left of a size (w, h) target fully inside rect (left, top, w, h)."""
+    left, top, w, h = rect
+    return (rng.randint(left, left + max(w - size[0], 0)),
+            rng.randint(top, top + max(h - size[1], 0)))
+
+
+@lru_cache(maxsize=8)
+def _disc(r2: int) -> Tuple[Tuple[int, ...], Tuple[int, ...]]:
+    """Excluded rows of the disc |d| < r per column: k[|dx|] (rows with |dy| <= k),
+    and the running total of excluded rows over dx = -reach..reach."""
+    reach = isqrt(r2 - 1)
+    ks = tuple(isqrt(r2 - dx * dx - 1) for dx in range(reach + 1))
+    cum = [0]
+    for dx in range(-reach, reach + 1):
+        cum.append(cum[-1] + 2 * ks[abs(dx)] + 1)
+    return ks, tuple(cum)
+
+
+def sample_outside(rng: random.Random, rect: Sequence[int], center: Sequence[int], r: int) -> Tuple[int, int]:
+    """Uniform integer point of rect (left, top, w, h) at distance >= r from center.
+
+    Drawn directly: a column is chosen with weight = its number of valid rows,
+    then one valid row. Only columns within r of the center lose rows (one
+    interval each); when the disc is not cut by the top/bottom edge, the column
+    is found by bisection over the disc's precomputed running totals. If no
+    point qualifies, the corner farthest from center is returned.
+    """
+    left, top, w, h = rect
+    right, bottom = left + w - 1, top + h - 1
+    cx, cy = center
+    r2 = int(r) * int(r)
+    ks, cum = _disc(r2) if r2 > 0 else ((), (0,))
+    reach = len(ks) - 1  # largest |dx| with dx^2 < r^2
+    x0, x1 = max(left, cx - reach), min(right, cx + reach)
+    n_part = max(0, x1 - x0 + 1)
+    n_left = x0 - left if n_part else w  # full columns left of the partial ones
+    n_full = w - n_part
+
+    if not n_part:
+        partial, part_total = [], 0
+    elif cy - ks[0] < top or cy + ks[0] > bottom:
+        # disc cut by the top/bottom edge: count the partial columns one by one
+        partial = []
+        for x in range(x0, x1 + 1):
+            k = ks[abs(x - cx)]
+            lo, hi = max(top, cy - k), min(bottom, cy + k)
+            partial.append((x, lo, hi, h - hi + lo - 1 if lo <= hi else h))
+        part_total = sum(p[3] for p in partial)
+    else:
+        partial = None
+        j0 = x0 - cx + reach
+        part_total = n_part * h - (cum[j0 + n_part] - cum[j0])
+
+    total = n_full * h + part_total
+    if total <= 0:
+        return max(((x, y) for x in (left, right) for y in (top, bottom)),
+                   key=lambda p: (p[0] - cx) ** 2 + (p[1] - cy) ** 2)
+
+    i = rng.randrange(total)
+    if i < n_full * h:
+        col, row = divmod(i, h)
+        x = left + col if col < n_left else x1 + 1 + (col - n_left)
+        return x, top + row
+    i -= n_full * h
+
+    if partial is None:
+        # valid rows in partial columns before column n (from x0)
+        def before(n):
+            return n * h - (cum[j0 + n] - cum[j0])
+        n = bisect_right(range(n_part + 1), i, key=before) - 1
+        x = x0 + n
+        k = ks[abs(x - cx)]
+        i -= before(n)
+        above = cy - k - top
+        return (x, top + i) if i < above else (x, cy + k + 1 + (i - above))
+
+    for x, lo, hi, count in partial:
+        if i < count:
+            above = max(0, lo - top) if lo <= hi else h
+            return (x, top + i) if i < above else (x, hi + 1 + (i - above))
+        i -= count
+    raise AssertionError("unreachable")
+
+
+def center_of(x: int, y: int, w: int, h: int) -> Tuple[int, int]:
+    # same as QRect(x, y, w, h).center()
+    return x + (w - 1) // 2, y + (h - 1) // 2
+
+
+# ----------------- plans -----------------
+def make_rounds(rng: Dict[str, random.Random], bgs: Sequence[Tuple[str, str]], rect: Sequence[int],
+                target_size: Sequence[int], *, min_dist_px: int = MIN_DIST_PX,
+                pause_ms: Optional[Sequence[int]] = None) -> List[dict]:
+    """Positions and pauses for an ordered background list [(level, path)].
+    pause_ms: already drawn from rng["pause"] (Demo needs them before the layout settles)."""
+    tw, th = target_size
+    if pause_ms is None:
+        pause_ms = pauses(len(bgs), rng["pause"])
+    out = []
+    for i, (lvl, path), pause in zip(range(len(bgs)), bgs, pause_ms):
+        x, y = sample_target(rng["target"], rect, target_size)
+        cur = sample_outside(rng["cursor"], rect, center_of(x, y, tw, th), min_dist_px)
+        out.append({"round": i + 1, "level": lvl, "bg": path, "target": [x, y, tw, th],
+                    "cursor": list(cur), "pause_ms": pause})
+    return out
+
+
+def make_plan(seed: int, all_by_level: Dict[str, List[str]], *, participant: int = 0,
+              size: Sequence[int] = DEFAULT_SIZE, target_size: Sequence[int] = DEFAULT_TARGET_SIZE,
+              min_dist_px: int = MIN_DIST_PX) -> dict:
+    rng = streams(seed)
+    bgs = bg_sequence(all_by_level, participant, rng["bg"])
+    return {"participant": participant, "seed": seed,
+            "rounds": make_rounds(rng, bgs, (0, 0, *size), target_size, min_dist_px=min_dist_px)}
+
+
+def make_plans(n: int, batch_seed: int, all_by_level: Dict[str, List[str]], **kw) -> List[dict]:
+    return [make_plan(participant_seed(batch_seed, p), all_by_level, participant=p, **kw) for p in range(n)]
+
+
+def fit(rounds: List[dict], from_size: Sequence[int], to_size: Sequence[int],
+        target_size: Sequence[int]) -> List[dict]:
+    """Rescale a plan built for another container size (positions scale proportionally)."""
+    if tuple(from_size) == tuple(to_size) and all(tuple(r["target"][2:]) == tuple(target_size) for r in rounds):
+        return rounds
+    sx, sy = to_size[0] / from_size[0], to_size[1] / from_size[1]
+    tw, th = target_size
+    out = []
+    for r in rounds:
+        x, y = r["target"][:2]
+        x = min(max(round(x * sx), 0), max(to_size[0] - tw, 0))
+        y = min(max(round(y * sy), 0), max(to_size[1] - th, 0))
+        cx, cy = r["cursor"]
+        out.append(dict(r, target=[x, y, tw, th],
+                        cursor=[min(round(cx * sx), to_size[0] - 1), min(round(cy * sy), to_size[1] - 1)]))
+    return out
+
+
+def save_plans(path: str | Path, plans: List[dict], *, size: Sequence[int], target_size: Sequence[int],
+               min_dist_px: int = MIN_DIST_PX) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    doc = {"version": VERSION, "size": list(size), "target_size": list(target_size),
+           "min_dist_px": min_dist_px, "pause_ms": list(PAUSE_MS), "plans": plans}
+    path.write_text(json.dumps(doc, separators=(",", ":")), encoding="utf-8")
+
+
+def load_plans(path: str | Path) -> dict:
+    doc = json.loads(Path(path).read_text(encoding="utf-8"))
+    if doc.get("version") != VERSION:
+        raise ValueError(f"unsupported plan version: {doc.get('version')!r}")
+    return doc
+
+
+def discover_levels(assets_dir: str | Path = "./py/assets",
+                    levels: Sequence[str] = ("office", "game", "stock")) -> Dict[str, List[str]]:
+    """{level: [bg paths]} in a stable order, as Demo sees them (from the asset manifest)."""
+    import manifest
+    return manifest.by_level(manifest.load(assets_dir), assets_dir, levels)
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description="Generate counterbalanced per-participant plans.")
+    ap.add_argument("--participants", type=int, default=100)
+    ap.add_argument("--seed", type=int, default=0, help="batch seed (participant seeds derive from it)")
+    ap.add_argument("--size", type=int, nargs=2, default=DEFAULT_SIZE, metavar=("W", "H"),
+                    help="background container size in px")
+    ap.add_argument("--target-size", type=int, nargs=2, default=DEFAULT_TARGET_SIZE, metavar=("W", "H"))
+    ap.add_argument("--min-dist", type=int, default=MIN_DIST_PX, help="cursor start distance from target center")
+    ap.add_argument("--assets", default="./py/assets")
+    ap.add_argument("--out", default="plans.json")
+    args = ap.parse_args(argv)
+
+    levels = discover_levels(args.assets)
+    if not any(levels.values()):
+        print(f"no backgrounds under {args.assets}", file=sys.stderr)
+        return 1
+    t0 = time.perf_counter()
+    plans = make_plans(args.participants, args.seed, levels, size=args.size,
+                       target_size=args.target_size, min_dist_px=args.min_dist)
+    save_plans(args.out, plans, size=args.size, target_size=args.target_size, min_dist_px=args.min_dist)
+    print(f"{len(plans)} plans x {len(plans[0]['rounds'])} rounds in {time.perf_counter() - t0:.2f}s -> {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
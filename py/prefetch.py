@@ -0,0 +1,122 @@
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from PyQt6 import QtWidgets, QtCore, QtGui
+
+
+def _read_image(path: str, size: QtCore.QSize, fmt: str | None = None) -> QtGui.QImage:
+    reader = QtGui.QImageReader(path)
+    if fmt:
+        # real format from the manifest: no failed attempt with the handler the suffix suggests
+        reader.setFormat(fmt.encode())
+    reader.setAutoTransform(True)
+    # decode straight to the display size (no per-paint scaling)
+    if size.isValid() and not size.isEmpty():
+        reader.setScaledSize(size)
+    img = reader.read()
+    if img.isNull():
+        return img
+    # premultiplied ARGB is the format the raster engine blits without conversion
+    return img.convertToFormat(QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+
+
+class BackgroundPrefetcher(QtCore.QObject):
+    """Decode upcoming backgrounds off the GUI thread.
+
+    request() submits a decode to one persistent worker thread (QImageReader), the
+    result is turned into a QPixmap back on the GUI thread during the pause, and
+    take() hands it over at round start. Decoded pixmaps are kept in an LRU bounded
+    by budget_bytes.
+    """
+    _decoded = QtCore.pyqtSignal(str)
+
+    def __init__(self, parent=None, *, budget_bytes: int = 64 * 1024 * 1024,
+                 formats: dict[str, str] | None = None):
+        super().__init__(parent)
+        self.budget_bytes = int(budget_bytes)
+        self.formats = formats or {}  # path -> real image format (manifest.formats)
+        self._ready: OrderedDict[str, QtGui.QPixmap] = OrderedDict()
+        self._pending: dict[str, Future] = {}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bg-prefetch")
+        self._decoded.connect(self._on_decoded)  # queued: emitted from the worker
+
+        app = QtCore.QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.shutdown)
+
+    def request(self, path: str, size: QtCore.QSize = QtCore.QSize()) -> None:
+        """Start decoding path at size (device pixels) in the background."""
+        if path in self._ready or path in self._pending:
+            return
+        fut = self._pool.submit(_read_image, path, QtCore.QSize(size), self.formats.get(path))
+        fut.add_done_callback(lambda _f, p=path: self._decoded.emit(p))
+        self._pending[path] = fut
+
+    def take(self, path: str, size: QtCore.QSize = QtCore.QSize()) -> QtGui.QPixmap:
+        """Return the decoded pixmap for path.
+        Waits for an in-flight decode; decodes synchronously only if never requested."""
+        pm = self._ready.pop(path, None)
+        if pm is not None:
+            self._bytes -= _nbytes(pm)
+            self.hits += 1
+            return pm
+        self.misses += 1
+        fut = self._pending.pop(path, None)
+        img = fut.result() if fut is not None else _read_image(path, size, self.formats.get(path))
+        return QtGui.QPixmap.fromImage(img)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": len(self._ready), "bytes": self._bytes}
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=True, cancel_futures=True)
+
+    def _on_decoded(self, path: str) -> None:
+        fut = self._pending.pop(path, None)
+        if fut is None or fut.cancelled():  # already taken
+            return
+        img = fut.result()
+        if img.isNull():
+            return
+        pm = QtGui.QPixmap.fromImage(img)
+        self._ready[path] = pm
+        self._bytes += _nbytes(pm)
+        # keep the newest entry even if it alone exceeds the budget
+        while self._bytes > self.budget_bytes and len(self._ready) > 1:
+            _, old = self._ready.popitem(last=False)
+            self._bytes -= _nbytes(old)
+
+
+def _nbytes(pm: QtGui.QPixmap) -> int:
+    return pm.width() * pm.height() * max(pm.depth(), 8) // 8
+
+
+class BackgroundView(QtWidgets.QWidget):
+    """Container that blits its background pixmap (stretch), double-buffered:
+    swap() is a pointer swap of front/back plus a repaint."""
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._front = QtGui.QPixmap()
+        self._back = QtGui.QPixmap()
+
+    def set_back(self, pm: QtGui.QPixmap) -> None:
+        self._back = pm
+
+    def swap(self) -> None:
+        self._front, self._back = self._back, QtGui.QPixmap()
+        self.update()
+
+    def decode_size(self) -> QtCore.QSize:
+        """Device-pixel size images should be decoded at."""
+        return self.size() * self.devicePixelRatioF()
+
+    def paintEvent(self, e):
+        if self._front.isNull():
+            return
+        p = QtGui.QPainter(self)
+        p.drawPixmap(self.rect(), self._front)
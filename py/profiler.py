@@ -0,0 +1,113 @@
+from pathlib import Path
+from typing import Dict, List, Tuple
+import time
+
+from PyQt6 import QtCore
+from PyQt6.QtCore import QEvent
+
+
+def _pct(vals: List[float], q: float) -> float:
+    return vals[min(len(vals) - 1, int(q * len(vals)))] if vals else 0.0
+
+
+class FrameProfiler(QtCore.QObject):
+    """Opt-in paint / frame / stall profiler.
+
+    - watch(widget): times each Paint of that widget (the filter runs the widget's
+      own event() and returns True, so the paint runs exactly once and no other
+      filter sees the event twice)
+    - watched top-level widgets: times each UpdateRequest, i.e. one
+      backing-store frame (all dirty paints + flush)
+    - a PreciseTimer heartbeat: any tick later than stall_ms is an event-loop stall
+    Every sample is tagged with the current round and background path (set_round).
+    """
+    def __init__(self, parent=None, *, heartbeat_ms: int = 5, stall_ms: float = 20.0, top_n: int = 20):
+        super().__init__(parent)
+        self.stall_ms = float(stall_ms)
+        self.top_n = top_n
+        self.round_no = 0
+        self.bg_path = ""
+        self.paints: List[Tuple[int, str, float]] = []     # (round, widget, ms)
+        self.frames: List[Tuple[int, float]] = []          # (round, frame ms)
+        self.stalls: List[Tuple[int, float]] = []          # (round, late ms)
+        self.bg_by_round: Dict[int, str] = {}
+
+        self._hb_ms = heartbeat_ms
+        self._hb = QtCore.QTimer(self)
+        self._hb.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._hb.timeout.connect(self._tick)
+        self._last_tick_ns = 0
+
+    def start(self) -> None:
+        self._last_tick_ns = time.perf_counter_ns()
+        self._hb.start(self._hb_ms)
+
+    def stop(self) -> None:
+        self._hb.stop()
+
+    def set_round(self, round_no: int, bg_path: str) -> None:
+        self.round_no = int(round_no)
+        self.bg_path = bg_path
+        self.bg_by_round[self.round_no] = bg_path
+
+    def watch(self, widget, name: str | None = None) -> None:
+        """Call before any other filter is installed on widget: filters installed
+        later run before this one (once, as usual); earlier ones would be skipped."""
+        widget.setProperty("_profile_name", name or widget.objectName() or type(widget).__name__)
+        widget.installEventFilter(self)
+
+    def _tick(self) -> None:
+        now = time.perf_counter_ns()
+        late = (now - self._last_tick_ns) / 1e6 - self._hb_ms
+        self._last_tick_ns = now
+        if late >= self.stall_ms:
+            self.stalls.append((self.round_no, late))
+
+    def _timed(self, obj, e) -> tuple:
+        # the delivery that would follow this (last) filter: the object's own event()
+        t0 = time.perf_counter_ns()
+        obj.event(e)
+        return t0, time.perf_counter_ns()
+
+    def eventFilter(self, obj, e):
+        et = e.type()
+        if et == QEvent.Type.Paint:
+            t0, t1 = self._timed(obj, e)
+            self.paints.append((self.round_no, str(obj.property("_profile_name")), (t1 - t0) / 1e6))
+            return True
+        if et == QEvent.Type.UpdateRequest and obj.isWindow():
+            t0, t1 = self._timed(obj, e)
+            self.frames.append((self.round_no, (t1 - t0) / 1e6))
+            return True
+        return False
+
+    # ----------------- reporting -----------------
+    def per_round(self) -> List[dict]:
+        rounds = sorted({r for r, _ in self.frames} | {r for r, _ in self.stalls})
+        out = []
+        for r in rounds:
+            ft = sorted(ms for rr, ms in self.frames if rr == r)
+            st = [ms for rr, ms in self.stalls if rr == r]
+            out.append({"round": r, "bg": self.bg_by_round.get(r, ""), "frames": len(ft),
+                        "frame_p50": _pct(ft, 0.5), "frame_p95": _pct(ft, 0.95),
+                        "frame_max": ft[-1] if ft else 0.0,
+                        "stalls": len(st), "stall_max": max(st, default=0.0)})
+        return out
+
+    def slowest_paints(self) -> List[Tuple[int, str, str, float]]:
+        top = sorted(self.paints, key=lambda p: p[2], reverse=True)[:self.top_n]
+        return [(r, self.bg_by_round.get(r, ""), name, ms) for r, name, ms in top]
+
+    def dump(self, path: str | Path) -> None:
+        """Per-round frame stats (<path>) and slowest paints (<stem>_paints.csv)."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        cols = ("round", "frames", "frame_p50", "frame_p95", "frame_max", "stalls", "stall_max", "bg")
+        with path.open("w", encoding="utf-8") as f:
+            f.write(",".join(cols) + "\n")
+            for row in self.per_round():
+                f.write(",".join(f"{row[c]:.3f}" if isinstance(row[c], float) else str(row[c]) for c in cols) + "\n")
+        with path.with_name(path.stem + "_paints.csv").open("w", encoding="utf-8") as f:
+            f.write("round,widget,ms,bg\n")
+            for r, bg, name, ms in self.slowest_paints():
+                f.write(f"{r},{name},{ms:.3f},{bg}\n")
@@ -0,0 +1,270 @@
+"""Session record / replay.
+
+With OPTIONS["RECORD_SESSION"], run.py writes <results>_session.json: the master
+seed of every random stream (background order, target, cursor start, pause), the
+window size, the round-timing clock readings taken by measure, each round onset
+and every key / mouse event of the Demo window, timestamped on the same clock.
+
+    python py/replay.py <session.json> [--speed 1] [--out replayed.txt] [--no-check]
+
+Replay runs the app offscreen and re-injects the input stream at `--speed` x real
+time (0 = as fast as possible, the default). Pauses are not waited out: each round
+starts at its recorded position in the stream, and measure plays back the recorded
+clock readings, so the replayed results file equals the recorded one byte for byte
+(exit status 1 if it does not). Trajectory files are re-recorded on the replay's
+own clock.
+"""
+from pathlib import Path
+from typing import List, Optional
+import argparse, json, math, os, sys, time
+
+from PyQt6 import QtWidgets, QtCore
+from PyQt6.QtCore import Qt, QEvent
+
+VERSION = 1
+
+# recorded event type -> timeline tag
+_MOUSE = {
+    QEvent.Type.MouseMove: "move",
+    QEvent.Type.MouseButtonPress: "press",
+    QEvent.Type.MouseButtonRelease: "release",
+}
+_KEYS = {
+    QEvent.Type.KeyPress: "key_press",
+    QEvent.Type.KeyRelease: "key_release",
+}
+
+
+class SessionRecorder(QtCore.QObject):
+    """Records what replay needs while a Demo session runs.
+
+    timeline : [t_ns, tag, ...] in delivery order, t_ns relative to the session start
+               move/press/release: x, y (window px), button, modifiers
+               key_press/key_release: key, modifiers, autorepeat
+               onset: round_no
+    clock    : every reading measure took for round timing (start/end), same origin
+    """
+    def __init__(self, demo, parent=None):
+        super().__init__(parent if parent is not None else demo)
+        import measure
+        from dispatch import EventDispatcher, window_of
+
+        self.demo = demo
+        self.t0_ns = time.perf_counter_ns()
+        self.timeline: List[list] = []
+        self.clock: List[int] = []
+        self.size: Optional[List[int]] = None
+
+        measure.set_clock(self._clock)
+        EventDispatcher.instance().subscribe(window_of(demo), (*_MOUSE, *_KEYS), self._on_event)
+        demo.scheduler.fired.connect(self._on_onset)
+
+    def _clock(self) -> int:
+        t = time.perf_counter_ns()
+        self.clock.append(t - self.t0_ns)
+        return t
+
+    def _on_onset(self, round_no: int) -> None:
+        if self.size is None:  # laid out by now (showMaximized)
+            self.size = [self.demo.width(), self.demo.height()]
+        self.timeline.append([time.perf_counter_ns() - self.t0_ns, "onset", int(round_no)])
+
+    def _on_event(self, obj, e) -> bool:
+        t = time.perf_counter_ns() - self.t0_ns
+        et = e.type()
+        tag = _MOUSE.get(et)
+        if tag is not None:
+            p = e.position()
+            self.timeline.append([t, tag, round(p.x(), 2), round(p.y(), 2),
+                                  e.button().value, e.modifiers().value])
+        else:
+            self.timeline.append([t, _KEYS[et], e.key(), e.modifiers().value, int(e.isAutoRepeat())])
+        return False
+
+    def to_dict(self) -> dict:
+        import measure
+        from constant import OPTIONS
+        return {"version": VERSION,
+                "seed": self.demo.seed,
+                "size": self.size or [self.demo.width(), self.demo.height()],
+                "options": dict(OPTIONS),
+                "results": str(measure.out_path().resolve()),
+                "clock": self.clock,
+                "timeline": self.timeline}
+
+    def dump(self, path: str | Path) -> None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_dict(), separators=(",", ":")), encoding="utf-8")
+
+
+def load_session(path: str | Path) -> dict:
+    s = json.loads(Path(path).read_text(encoding="utf-8"))
+    if s.get("version") != VERSION:
+        raise ValueError(f"unsupported session version: {s.get('version')!r}")
+    return s
+
+
+class Replayer(QtCore.QObject):
+    """Re-injects a recorded timeline into a Demo through QTest (the same path
+    real input takes into the window). speed: 1.0 = real time, 0 = as fast as possible."""
+    finished = QtCore.pyqtSignal()
+
+    BATCH = 256  # items per event-loop turn when replaying as fast as possible
+
+    def __init__(self, session: dict, demo, *, speed: float = 0.0, parent=None):
+        super().__init__(parent if parent is not None else demo)
+        import measure
+        from dispatch import window_of
+
+        self.session = session
+        self.demo = demo
+        self.speed = float(speed)
+        self.window = window_of(demo)
+        self.timeline = session["timeline"]
+        self.desync: List[str] = []  # onsets that did not match the app's pending round
+
+        # rounds start only where the recording says so
+        demo.scheduler.manual = True
+        self._tape = iter(session["clock"])
+        self._tape_t0 = time.perf_counter_ns()
+        self.clock_misses = 0
+        measure.set_clock(self._clock)
+
+        self._i = 0
+        self._real_t0 = 0
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._step)
+
+    def _clock(self) -> int:
+        t = next(self._tape, None)
+        if t is None:  # more round boundaries than recorded
+            self.clock_misses += 1
+            return time.perf_counter_ns()
+        return self._tape_t0 + t
+
+    def start(self) -> None:
+        self._real_t0 = time.perf_counter_ns()
+        self._timer.start(0)
+
+    @property
+    def done(self) -> bool:
+        return self._i >= len(self.timeline)
+
+    def _step(self) -> None:
+        if self.speed <= 0:
+            end = min(self._i + self.BATCH, len(self.timeline))
+        else:
+            due = (time.perf_counter_ns() - self._real_t0) * self.speed
+            end = self._i
+            while end < len(self.timeline) and self.timeline[end][0] <= due:
+                end += 1
+        while self._i < end:
+            item = self.timeline[self._i]
+            self._i += 1
+            self._inject(item)
+
+        if self.done:
+            self.finished.emit()
+        elif self.speed <= 0:
+            self._timer.start(0)
+        else:
+            wait_ns = self.timeline[self._i][0] / self.speed - (time.perf_counter_ns() - self._real_t0)
+            self._timer.start(max(0, math.ceil(wait_ns / 1e6)))
+
+    def _inject(self, item: list) -> None:
+        from PyQt6.QtTest import QTest
+
+        tag = item[1]
+        if tag == "onset":
+            fired = self.demo.scheduler.fire_pending()
+            if fired != item[2]:
+                self.desync.append(f"t={item[0] / 1e6:.1f}ms: onset of round {item[2]}, app had {fired}")
+        elif tag in ("move", "press", "release"):
+            _, _, x, y, button, mods = item
+            pos = QtCore.QPoint(round(x), round(y))
+            if tag == "move":
+                QTest.mouseMove(self.window, pos)
+            elif tag == "press":
+                QTest.mousePress(self.window, Qt.MouseButton(button), Qt.KeyboardModifier(mods), pos)
+            else:
+                QTest.mouseRelease(self.window, Qt.MouseButton(button), Qt.KeyboardModifier(mods), pos)
+        else:
+            _, _, key, mods, autorepeat = item
+            if autorepeat:
+                return  # QTest cannot mark repeats; nothing reacts to them
+            if tag == "key_press":
+                QTest.keyPress(self.window, Qt.Key(key), Qt.KeyboardModifier(mods))
+            else:
+                QTest.keyRelease(self.window, Qt.Key(key), Qt.KeyboardModifier(mods))
+
+
+def replay(session_path: str | Path, *, speed: float = 0.0, out_path: str | Path | None = None) -> dict:
+    """Replay a session offscreen; returns {"results", "replayed", "desync", "clock_misses"}."""
+    session_path = Path(session_path).resolve()
+    session = load_session(session_path)
+    if out_path is None:
+        out_path = session_path.with_name(session_path.stem.removesuffix("_session") + "_replay.txt")
+    out_path = Path(out_path).resolve()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # Demo resolves ./py/assets relative to the repo root (as recorded)
+    os.chdir(Path(__file__).resolve().parent.parent)
+
+    from constant import OPTIONS
+    OPTIONS.update(session["options"])
+    OPTIONS["RECORD_SESSION"] = False
+    OPTIONS["STORE"] = OPTIONS["COLLECTOR"] = None  # a replay is not a new session
+
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    import measure
+    from cursor import Demo, cleanup_override_cursor
+    from toggle import get_toggler
+
+    w = Demo(seed=session["seed"], out_path=str(out_path))
+    r = Replayer(session, w, speed=speed)
+    w.resize(*session["size"])
+    w.show()
+    w.setMouseTracking(True)
+    toggler = get_toggler(OPTIONS, app)
+    toggler.attach(w)
+
+    app.aboutToQuit.connect(cleanup_override_cursor)
+    r.finished.connect(lambda: QtCore.QTimer.singleShot(0, app.quit))
+    # the session (plan, results file, round 1) is set up after the first frame
+    w.ready.connect(r.start)
+    app.exec()
+    measure.close()
+    measure.set_clock(None)
+    return {"results": session["results"], "replayed": str(out_path),
+            "desync": r.desync, "clock_misses": r.clock_misses}
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description="Replay a recorded session offscreen.")
+    ap.add_argument("session", help="<results>_session.json written by run.py")
+    ap.add_argument("--speed", type=float, default=0.0, help="x real time (0 = as fast as possible)")
+    ap.add_argument("--out", help="replayed results file (default: <results stem>_replay.txt)")
+    ap.add_argument("--no-check", action="store_true", help="do not compare with the recorded results")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    res = replay(args.session, speed=args.speed, out_path=args.out)
+    print(f"replayed in {time.perf_counter() - t0:.1f}s -> {res['replayed']}")
+    for d in res["desync"]:
+        print(f"DESYNC {d}", file=sys.stderr)
+    if args.no_check:
+        return 0
+    recorded = Path(res["results"])
+    if not recorded.exists():
+        print(f"recorded results not found: {recorded}", file=sys.stderr)
+        return 1
+    same = recorded.read_bytes() == Path(res["replayed"]).read_bytes()
+    print("results identical" if same else f"results DIFFER from {recorded}")
+    return 0 if same and not res["desync"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -1,25 +1,49 @@
-import random
+import startup  # first: marks process start for the startup benchmark
 
 from PyQt6 import QtWidgets
 
-from cursor import *
-from toggle import get_toggler
 from constant import (
     OPTIONS
 )
 
 if __name__ == "__main__":
+    if startup.enabled():
+        OPTIONS["DIR"] = startup.out_dir()
+
     app = QtWidgets.QApplication([])
     app.setQuitOnLastWindowClosed(True)
 
+    # window first; the rest is imported/built after it is shown
+    from cursor import Demo, cleanup_override_cursor
+    import measure
+    startup.mark("import")
+
     w = Demo(); w.showMaximized()
     w.setMouseTracking(True) 
+    startup.mark("shown")
 
-    # global filter, which is attched to the parent process as a child
-    toggler = get_toggler(OPTIONS, app)
-    app.installEventFilter(toggler)
+    # toggler listens on the demo window through the shared event dispatcher
+    from toggle import get_toggler
+    toggler = get_toggler(OPTIONS, app, prewarm=False)
+    toggler.attach(w)
+    # cursors are pre-rendered once the window is up and round 1 is scheduled
+    w.ready.connect(toggler.prewarm)
 
     # safeguard to clean handler
     app.aboutToQuit.connect(cleanup_override_cursor)
+    # toggle latency samples/histograms next to the results
+    if toggler.latency is not None:
+        app.aboutToQuit.connect(lambda: toggler.latency.dump(measure.sidecar_path("_latency.csv")))
+    # seeds + input stream, so the session can be replayed (python py/replay.py <...>_session.json)
+    if OPTIONS.get("RECORD_SESSION", True):
+        from replay import SessionRecorder
+        recorder = SessionRecorder(w)
+        app.aboutToQuit.connect(lambda: recorder.dump(measure.sidecar_path("_session.json")))
+    # rounds as played (target rects), for clutter.py
+    app.aboutToQuit.connect(lambda: w.dump_plan(measure.sidecar_path("_plan.json")))
+    # flush buffered results before the process exits
+    app.aboutToQuit.connect(measure.close)
 
+    if startup.enabled():
+        startup.trace(w, app)
     app.exec()
@@ -0,0 +1,62 @@
+import time
+
+from PyQt6 import QtCore
+
+
+class RoundScheduler(QtCore.QObject):
+    """Single precise timer that drives pause -> stimulus onset for every round.
+
+    One instance lives for the whole session (no thread or worker per round).
+    Each onset is recorded as (round_no, scheduled_ns, fired_ns) on the
+    perf_counter clock used by measure, so fired - scheduled is the scheduling error.
+    """
+    fired = QtCore.pyqtSignal(int)  # round_no
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setTimerType(QtCore.Qt.TimerType.PreciseTimer)
+        self._timer.timeout.connect(self._fire)
+
+        self._round_no = 0
+        self._scheduled_ns: int | None = None
+        self.onsets: list[tuple[int, int, int]] = []
+        self.manual = False  # replay: onsets come from fire_pending(), not the timer
+
+    def schedule(self, round_no: int, pause_ms: int) -> None:
+        """Fire round_no after pause_ms (restarts any pending round)."""
+        self._round_no = int(round_no)
+        self._scheduled_ns = time.perf_counter_ns() + int(pause_ms) * 1_000_000
+        if not self.manual:
+            self._timer.start(int(pause_ms))
+
+    def cancel(self) -> None:
+        self._timer.stop()
+        self._scheduled_ns = None
+
+    def is_pending(self) -> bool:
+        return self._scheduled_ns is not None
+
+    def fire_pending(self) -> int | None:
+        """Fire the pending round now (replay); returns its number, None if nothing is pending."""
+        if self._scheduled_ns is None:
+            return None
+        self._timer.stop()
+        self._fire()
+        return self._round_no
+
+    def last_error_ms(self) -> float | None:
+        """fired - scheduled of the latest onset, in ms."""
+        if not self.onsets:
+            return None
+        _, scheduled_ns, fired_ns = self.onsets[-1]
+        return (fired_ns - scheduled_ns) / 1e6
+
+    def _fire(self):
+        fired_ns = time.perf_counter_ns()
+        if self._scheduled_ns is None:
+            return
+        self.onsets.append((self._round_no, self._scheduled_ns, fired_ns))
+        self._scheduled_ns = None
+        self.fired.emit(self._round_no)
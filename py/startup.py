@@ -0,0 +1,96 @@
+"""Startup timing: marks since process start, and a benchmark that runs run.py.
+
+    python py/startup.py [--runs 5] [--out startup.json]
+
+Each run starts py/run.py offscreen with MC_STARTUP_TRACE set. run.py marks
+(ms since it started):
+  import_ms      : Qt and the app modules imported
+  shown_ms       : Demo constructed and shown
+  first_frame_ms : first frame of the window processed
+  ready_ms       : assets, plan, results file set up and round 1 scheduled
+  first_round_ms : round 1 on screen, minus its planned pause (the pause is
+                   part of the protocol, not of startup)
+then quits. process_ms is the wall time of the whole child process
+(interpreter start-up, round 1's pause and exit included). The median of each
+is reported.
+"""
+import time
+
+T0_NS = time.perf_counter_ns()  # run.py imports this module first
+
+from pathlib import Path
+from typing import Dict, List
+import argparse, json, os, subprocess, sys, tempfile
+
+ENV = "MC_STARTUP_TRACE"
+_marks: Dict[str, float] = {}
+
+
+def enabled() -> bool:
+    return bool(os.environ.get(ENV))
+
+
+def out_dir() -> str:
+    """Where a traced run writes its results (next to the trace file)."""
+    return str(Path(os.environ[ENV]).parent)
+
+
+def mark(name: str) -> None:
+    if enabled() and name not in _marks:
+        _marks[name] = (time.perf_counter_ns() - T0_NS) / 1e6
+
+
+def trace(demo, app) -> None:
+    """Mark the first frame and round 1 of demo, then write the trace and quit."""
+    from PyQt6 import QtCore
+    demo.first_frame.connect(lambda: mark("first_frame"))
+    demo.ready.connect(lambda: mark("ready"))
+
+    def on_round(round_no: int) -> None:
+        mark("first_round")
+        out = {f"{k}_ms": v for k, v in _marks.items()}
+        out["first_round_ms"] -= demo._pauses[0]
+        Path(os.environ[ENV]).write_text(json.dumps(out), encoding="utf-8")
+        QtCore.QTimer.singleShot(0, app.quit)
+    demo.scheduler.fired.connect(on_round)
+
+
+def run_once(python: str = sys.executable) -> Dict[str, float]:
+    root = Path(__file__).resolve().parent.parent  # Demo resolves ./py/assets from here
+    with tempfile.TemporaryDirectory(prefix="cursor-startup-") as tmp:
+        trace_path = Path(tmp) / "startup.json"
+        env = dict(os.environ, **{ENV: str(trace_path)})
+        env.setdefault("QT_QPA_PLATFORM", "offscreen")
+        t0 = time.perf_counter()
+        subprocess.run([python, str(root / "py" / "run.py")], cwd=root, env=env, check=True,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, timeout=60)
+        res = json.loads(trace_path.read_text(encoding="utf-8"))
+        res["process_ms"] = (time.perf_counter() - t0) * 1e3
+        return res
+
+
+def summarize(runs: List[Dict[str, float]]) -> Dict[str, float]:
+    out = {}
+    for k in runs[0]:
+        vals = sorted(r[k] for r in runs)
+        out[k] = vals[len(vals) // 2]
+    return out
+
+
+def main(argv) -> int:
+    ap = argparse.ArgumentParser(description="Startup benchmark of py/run.py (offscreen).")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--out", help="write the medians as JSON here (default: stdout)")
+    args = ap.parse_args(argv)
+
+    runs = [run_once() for _ in range(max(1, args.runs))]
+    text = json.dumps({"runs": len(runs), **summarize(runs)}, indent=2)
+    if args.out:
+        Path(args.out).write_text(text + "\n", encoding="utf-8")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,224 @@
+"""SQLite session store for measure results (stdlib only).
+
+With OPTIONS["STORE"] = "results.db", measure writes every session, round and
+counted click into SQLite as well (the CSV is still written). A writer thread
+takes rows from a queue and inserts everything queued so far with executemany
+in one transaction (prepared statements), so the click handler never waits on
+the database. The database runs in WAL mode: analysis can read while stations
+write.
+
+    python py/store.py import [ROOT ...] --db results.db    # existing *_measure.txt, once
+    python py/store.py query --db results.db [--trigger shake] [--action big-size] [--level game] [--participant P]
+    python py/store.py export --db results.db --out DIR      # one <name> CSV per session, as measure writes it
+
+Tables: sessions (condition, participant, seed, station), rounds (level taken
+from the background path), clicks (time since round start, position, button).
+Indexed on condition (trigger, action), participant and background level.
+"""
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+import argparse, queue, socket, sqlite3, sys, threading, time
+
+VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions(
+    id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, trigger TEXT, action TEXT,
+    shape TEXT, color TEXT, size INTEGER, participant INTEGER, seed TEXT,
+    station TEXT, started REAL, source TEXT);
+CREATE TABLE IF NOT EXISTS rounds(
+    session INTEGER NOT NULL REFERENCES sessions(id), round INTEGER NOT NULL,
+    time_ms REAL, clicks INTEGER, path TEXT, level TEXT, PRIMARY KEY(session, round));
+CREATE TABLE IF NOT EXISTS clicks(
+    session INTEGER NOT NULL REFERENCES sessions(id), round INTEGER NOT NULL,
+    t_ms REAL, x REAL, y REAL, button INTEGER);
+CREATE INDEX IF NOT EXISTS sessions_condition ON sessions(trigger, action);
+CREATE INDEX IF NOT EXISTS sessions_participant ON sessions(participant);
+CREATE INDEX IF NOT EXISTS rounds_level ON rounds(level);
+CREATE INDEX IF NOT EXISTS clicks_round ON clicks(session, round);
+"""
+
+_SESSION_COLS = ("name", "trigger", "action", "shape", "color", "size", "participant", "seed",
+                 "station", "started", "source")
+_INSERT_SESSION = (f"INSERT OR IGNORE INTO sessions({','.join(_SESSION_COLS)}) "
+                   f"VALUES ({','.join('?' * len(_SESSION_COLS))})")
+_INSERT_ROUND = "INSERT OR REPLACE INTO rounds VALUES (?,?,?,?,?,?)"
+_INSERT_CLICK = "INSERT INTO clicks VALUES (?,?,?,?,?,?)"
+
+
+def connect(path: str | Path) -> sqlite3.Connection:
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(str(path), check_same_thread=False)
+    db.execute("PRAGMA journal_mode=WAL")
+    db.execute("PRAGMA synchronous=NORMAL")  # WAL: durable at checkpoints, never corrupt
+    db.executescript(SCHEMA)
+    db.execute(f"PRAGMA user_version={VERSION}")
+    return db
+
+
+def level_of(path: str) -> str:
+    from aggregate import level_of
+    return level_of(path)
+
+
+def _session_row(meta: Dict[str, Any]) -> tuple:
+    row = dict(meta)
+    if row.get("seed") is not None:
+        row["seed"] = str(row["seed"])  # 63-bit seeds: kept exact as text
+    return tuple(row.get(c) for c in _SESSION_COLS)
+
+
+def add_session(db: sqlite3.Connection, meta: Dict[str, Any]) -> int:
+    """Id of the session named meta["name"] (inserted if new)."""
+    db.execute(_INSERT_SESSION, _session_row(meta))
+    return db.execute("SELECT id FROM sessions WHERE name = ?", (meta["name"],)).fetchone()[0]
+
+
+# ----------------- live sink (measure) -----------------
+_STOP = object()
+
+
+class SQLiteSink(threading.Thread):
+    """measure sink: rounds and clicks of one session, batched into transactions
+    on its own thread (see measure._sinks for the interface)."""
+    def __init__(self, path: str | Path, session: Dict[str, Any]):
+        super().__init__(name="measure-store", daemon=True)
+        self.path = Path(path)
+        self.session = dict(session, source="live")
+        self.session.setdefault("station", socket.gethostname())
+        self.session.setdefault("started", time.time())
+        self._q: queue.SimpleQueue = queue.SimpleQueue()
+        self.start()
+
+    def put_round(self, round_no: int, time_ms: float, clicks: int, path: str) -> None:
+        self._q.put((_INSERT_ROUND, (int(round_no), float(time_ms), int(clicks), path)))
+
+    def put_click(self, round_no: int, t_ms: float, x: Optional[float], y: Optional[float],
+                  button: Optional[int]) -> None:
+        self._q.put((_INSERT_CLICK, (int(round_no), float(t_ms), x, y, button)))
+
+    def put_blob(self, name: str, data: bytes) -> None:
+        pass  # trajectories stay in <results>_traj/
+
+    def close(self, timeout: Optional[float] = 2.0) -> bool:
+        self._q.put(_STOP)
+        self.join(timeout)
+        return not self.is_alive()
+
+    def run(self) -> None:
+        db = connect(self.path)
+        with db:
+            sid = add_session(db, self.session)
+        stop = False
+        while not stop:
+            batch: Dict[str, List[tuple]] = {}
+            item = self._q.get()
+            # everything queued meanwhile goes into the same transaction
+            while item is not None:
+                if item is _STOP:
+                    stop = True
+                else:
+                    sql, row = item
+                    if sql is _INSERT_ROUND:
+                        row += (level_of(row[-1]),)  # here, not on the caller's thread
+                    batch.setdefault(sql, []).append((sid,) + row)
+                try:
+                    item = self._q.get_nowait()
+                except queue.Empty:
+                    item = None
+            if batch:
+                with db:
+                    for sql, rows in batch.items():
+                        db.executemany(sql, rows)
+        db.close()
+
+
+# ----------------- import / query / export -----------------
+def import_files(db: sqlite3.Connection, files: Iterable[Path]) -> int:
+    """Add results files not imported yet (by file name); returns how many were added."""
+    from aggregate import _NAME
+    from measure import read_results
+    added = 0
+    with db:  # one transaction for the whole import
+        for p in files:
+            if db.execute("SELECT 1 FROM sessions WHERE name = ?", (p.name,)).fetchone():
+                continue
+            m = _NAME.match(p.name)
+            meta = {"name": p.name, "trigger": m.group("trigger") if m else None,
+                    "action": m.group("action") if m else None,
+                    "started": p.stat().st_mtime, "source": "import"}
+            sid = add_session(db, meta)
+            db.executemany(_INSERT_ROUND, [(sid, r, t, c, path, level_of(path))
+                                           for r, t, c, path in read_results(str(p))])
+            added += 1
+    return added
+
+
+def query(db: sqlite3.Connection, *, trigger: Optional[str] = None, action: Optional[str] = None,
+          level: Optional[str] = None, participant: Optional[int] = None) -> List[tuple]:
+    """(session name, round, time_ms, clicks, level, path) matching every given filter."""
+    where, args = [], []
+    for col, val in (("s.trigger", trigger), ("s.action", action), ("r.level", level), ("s.participant", participant)):
+        if val is not None:
+            where.append(f"{col} = ?")
+            args.append(val)
+    sql = ("SELECT s.name, r.round, r.time_ms, r.clicks, r.level, r.path FROM rounds r "
+           "JOIN sessions s ON s.id = r.session")
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    return db.execute(sql + " ORDER BY s.id, r.round", args).fetchall()
+
+
+def export_csv(db: sqlite3.Connection, out_dir: str | Path) -> int:
+    """Write every session as <out_dir>/<name> in measure's CSV format."""
+    from measure import _HEADER
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    sessions = db.execute("SELECT id, name FROM sessions ORDER BY id").fetchall()
+    for sid, name in sessions:
+        with (out_dir / name).open("w", encoding="utf-8") as f:
+            f.write(_HEADER)
+            for r, t, c, path in db.execute(
+                    "SELECT round, time_ms, clicks, path FROM rounds WHERE session = ? ORDER BY round", (sid,)):
+                f.write(f"{r},{t:.3f},{c},{path}\n")
+    return len(sessions)
+
+
+def main(argv) -> int:
+    from constant import OPTIONS
+    ap = argparse.ArgumentParser(description="SQLite session store for measure results.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    ip = sub.add_parser("import", help="import existing *_measure.txt files")
+    ip.add_argument("roots", nargs="*", default=[OPTIONS["DIR"]])
+    qp = sub.add_parser("query", help="rounds matching a condition / level / participant (CSV)")
+    qp.add_argument("--trigger")
+    qp.add_argument("--action")
+    qp.add_argument("--level")
+    qp.add_argument("--participant", type=int)
+    ep = sub.add_parser("export", help="one measure CSV per session")
+    ep.add_argument("--out", default="export")
+    for p in (ip, qp, ep):
+        p.add_argument("--db", default=OPTIONS.get("STORE") or "results.db")
+    args = ap.parse_args(argv)
+
+    db = connect(args.db)
+    if args.cmd == "import":
+        from aggregate import discover
+        files = discover(args.roots)
+        t0 = time.perf_counter()
+        n = import_files(db, files)
+        print(f"{n} of {len(files)} sessions imported in {time.perf_counter() - t0:.2f}s -> {args.db}")
+    elif args.cmd == "query":
+        print("session,round,time_ms,clicks,level,path")
+        for name, r, t, c, lvl, path in query(db, trigger=args.trigger, action=args.action,
+                                                level=args.level, participant=args.participant):
+            print(f"{name},{r},{t:.3f},{c},{lvl},{path}")
+    else:
+        n = export_csv(db, args.out)
+        print(f"{n} sessions -> {args.out}")
+    db.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,77 @@
+from PyQt6 import QtWidgets, QtCore, QtGui
+
+# resolved once at import; every button target shares the same polished style
+_BUTTON_STYLE = """
+    QPushButton {
+        background-color: #2ecc71;
+        color: white;
+        border-radius: 8px;
+        padding: 6px 12px;
+    }
+    QPushButton:hover {
+        background-color: #27ae60;
+    }
+    QPushButton:pressed {
+        background-color: #1e8449;
+    }
+"""
+
+
+class _PaintedTarget(QtWidgets.QAbstractButton):
+    """Target drawn from a pixmap rendered once at construction (paint = one blit)."""
+    def __init__(self, pixmap: QtGui.QPixmap, parent=None):
+        super().__init__(parent)
+        self._pm = pixmap
+        self.setFixedSize(pixmap.deviceIndependentSize().toSize())
+        self.setAttribute(QtCore.Qt.WidgetAttribute.WA_TranslucentBackground, True)
+
+    def paintEvent(self, e):
+        p = QtGui.QPainter(self)
+        p.drawPixmap(0, 0, self._pm)
+        p.end()
+
+
+def _render(size: int, draw, dpr: float) -> QtGui.QPixmap:
+    pm = QtGui.QPixmap(int(size * dpr), int(size * dpr))
+    pm.setDevicePixelRatio(dpr)
+    pm.fill(QtCore.Qt.GlobalColor.transparent)
+    p = QtGui.QPainter(pm)
+    p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
+    draw(p, size)
+    p.end()
+    return pm
+
+
+def _draw_icon(p: QtGui.QPainter, size: int):
+    # bullseye: green disc with white ring
+    r = QtCore.QRectF(1, 1, size - 2, size - 2)
+    p.setPen(QtGui.QPen(QtGui.QColor("#1e8449"), 2))
+    p.setBrush(QtGui.QColor("#2ecc71"))
+    p.drawEllipse(r)
+    p.setPen(QtGui.QPen(QtGui.QColor("white"), max(2, size // 12)))
+    p.setBrush(QtCore.Qt.BrushStyle.NoBrush)
+    p.drawEllipse(r.adjusted(size / 4, size / 4, -size / 4, -size / 4))
+
+
+def _draw_hitbox(p: QtGui.QPainter, size: int):
+    p.fillRect(QtCore.QRectF(0, 0, size, size), QtGui.QColor("#2ecc71"))
+
+
+def make_target(kind: str = "button", parent=None) -> QtWidgets.QAbstractButton:
+    """Create the persistent round target. kind: [button, icon, hitbox]
+    All styling is applied here; rounds only move/show/hide the widget."""
+    kind = (kind or "button").lower()
+    dpr = parent.devicePixelRatioF() if parent is not None else 1.0
+    if kind == "icon":
+        w = _PaintedTarget(_render(48, _draw_icon, dpr), parent)
+    elif kind == "hitbox":
+        w = _PaintedTarget(_render(16, _draw_hitbox, dpr), parent)
+    else:
+        w = QtWidgets.QPushButton("Click Me!", parent)
+        w.setFont(QtGui.QFont("Arial", 16, QtGui.QFont.Weight.Bold))
+        w.setStyleSheet(_BUTTON_STYLE)
+        w.ensurePolished()
+        w.resize(w.sizeHint())
+    w.setObjectName("target")
+    w.hide()
+    return w
@@ -1,9 +1,15 @@
+from collections import deque
+
 from PyQt6 import QtWidgets, QtCore, QtGui
 
 class Toast(QtWidgets.QWidget):
-    """Simple in-app toast: fade-in, stay, fade-out."""
+    """Simple in-app toast: fade-in, stay, fade-out.
+    Fades with windowOpacity (composited by the window system), so no offscreen
+    effect pass per animation frame. Reusable: popup() may be called again."""
+    hidden = QtCore.pyqtSignal(object)  # self, after fade-out
+
     def __init__(self, parent=None, *, duration_ms=1500, margin=16, radius=10):
-        super().__init__(parent, flags=QtCore.Qt.WindowType.FramelessWindowHint | 
+        super().__init__(parent, flags=QtCore.Qt.WindowType.FramelessWindowHint |
                                    QtCore.Qt.WindowType.ToolTip)
         self.setAttribute(QtCore.Qt.WidgetAttribute.WA_TranslucentBackground, True)
         self.setWindowFlag(QtCore.Qt.WindowType.WindowStaysOnTopHint, True)
@@ -11,6 +17,9 @@ class Toast(QtWidgets.QWidget):
         self._duration = duration_ms
         self._margin = margin
         self._radius = radius
+        self._path = QtGui.QPainterPath()
+        self._bg = QtGui.QColor(20, 20, 20, 200)
+        self.pos_key = None
 
         self._label = QtWidgets.QLabel("", self)
         self._label.setStyleSheet("""
@@ -27,10 +36,10 @@ class Toast(QtWidgets.QWidget):
         lay.addWidget(self._label)
 
         # Opacity animation
-        self._eff = QtWidgets.QGraphicsOpacityEffect(self)
-        self.setGraphicsEffect(self._eff)
-        self._anim = QtCore.QPropertyAnimation(self._eff, b"opacity", self)
+        self._anim = QtCore.QPropertyAnimation(self, b"windowOpacity", self)
         self._anim.setDuration(200)  # fade in/out 200ms
+        self._anim.finished.connect(self._on_anim_finished)
+        self._fading_out = False
 
         # Auto close timer
         self._timer = QtCore.QTimer(self)
@@ -38,27 +47,43 @@ class Toast(QtWidgets.QWidget):
         self._timer.timeout.connect(self._start_fade_out)
 
 
+    def resizeEvent(self, e):
+        # rounded background path is rebuilt on resize only, not per paint
+        self._path = QtGui.QPainterPath()
+        self._path.addRoundedRect(QtCore.QRectF(self.rect()), float(self._radius), float(self._radius))
+        super().resizeEvent(e)
+
+
     def paintEvent(self, e):
         p = QtGui.QPainter(self)
         p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
-        bg = QtGui.QColor(20, 20, 20, 200)
-
-        rectf = QtCore.QRectF(self.rect())
-        path = QtGui.QPainterPath()
-        path.addRoundedRect(rectf, float(self._radius), float(self._radius))
-
-        p.fillPath(path, bg)
+        p.fillPath(self._path, self._bg)
 
 
     def _start_fade_out(self):
         self._anim.stop()
-        self._anim.setStartValue(1.0)
+        self._fading_out = True
+        self._anim.setStartValue(self.windowOpacity())
         self._anim.setEndValue(0.0)
-        self._anim.setDuration(200)
-        self._anim.finished.connect(self.close)
         self._anim.start()
 
 
+    def _on_anim_finished(self):
+        if self._fading_out:
+            self._fading_out = False
+            self.hide_now()
+
+
+    def hide_now(self):
+        """Hide without fading (used for quiet mode)."""
+        self._anim.stop()
+        self._timer.stop()
+        self._fading_out = False
+        if self.isVisible():
+            self.hide()
+        self.hidden.emit(self)
+
+
     def _place(self, parent, pos="bottom-right"):
         if parent is None:
             screen = QtGui.QGuiApplication.primaryScreen().availableGeometry()
@@ -69,7 +94,7 @@ class Toast(QtWidgets.QWidget):
             return
         pr = self.frameGeometry()
         gr = parent.geometry() if parent.isWindow() else parent.window().geometry()
-        
+
         # default: right bottom
         x = gr.right() - pr.width() - self._margin
         y = gr.bottom() - pr.height() - self._margin
@@ -84,22 +109,104 @@ class Toast(QtWidgets.QWidget):
         self.move(x, y)
 
 
-    @staticmethod
-    def show_toast(parent, text: str, *, duration_ms=1500, pos="bottom-right"):
-        w = Toast(parent, duration_ms=duration_ms)
-        w._label.setText(text)
-        w.adjustSize()
-        w._place(parent if isinstance(parent, QtWidgets.QWidget) else None, pos=pos)
-
-        # fade in
-        w._anim.stop()
-        w._eff.setOpacity(0.0)
-        QtWidgets.QWidget.show(w) 
-        w._anim.setStartValue(0.0)
-        w._anim.setEndValue(1.0)
-        w._anim.setDuration(200)
-        w._anim.start()
+    def popup(self, parent, text: str, *, duration_ms=1500, pos="bottom-right"):
+        """Show text; if already showing, swap the text and restart the stay timer."""
+        self._label.setText(text)
+        self.adjustSize()
+        self._place(parent if isinstance(parent, QtWidgets.QWidget) else None, pos=pos)
+        self.pos_key = pos
+
+        if not self.isVisible() or self._fading_out:
+            # fade in
+            self._anim.stop()
+            self._fading_out = False
+            if not self.isVisible():
+                self.setWindowOpacity(0.0)
+                QtWidgets.QWidget.show(self)
+            self._anim.setStartValue(self.windowOpacity())
+            self._anim.setEndValue(1.0)
+            self._anim.start()
 
         # stay then fade out
-        w._timer.start(duration_ms)
-        return w
+        self._timer.start(duration_ms)
+        return self
+
+
+    @staticmethod
+    def show_toast(parent, text: str, *, duration_ms=1500, pos="bottom-right"):
+        return ToastManager.for_parent(parent).show(text, duration_ms=duration_ms, pos=pos)
+
+
+class ToastManager(QtCore.QObject):
+    """Small pool of reusable toasts per parent.
+    - one toast per position: a new message at a busy position replaces its text
+    - more positions than pool_size: messages wait in a queue
+    - quiet mode: visible toasts are hidden at once and new ones are dropped
+      (used to keep repaints out of timed rounds)"""
+    _global = None  # manager for parent=None
+    created = QtCore.pyqtSignal(object)  # new pooled Toast
+
+    def __init__(self, parent=None, *, pool_size=2):
+        super().__init__(parent)
+        self._owner = parent
+        self._pool_size = pool_size
+        self._free: list[Toast] = []
+        self._active: dict[str, Toast] = {}
+        self._queue = deque()  # (text, duration_ms, pos)
+        self._created = 0
+        self.quiet = False
+        self.suppressed = 0
+
+    @classmethod
+    def for_parent(cls, parent) -> "ToastManager":
+        if not isinstance(parent, QtWidgets.QWidget):
+            if cls._global is None:
+                cls._global = ToastManager(None)
+            return cls._global
+        mgr = getattr(parent, "_toast_manager", None)
+        if mgr is None:
+            mgr = ToastManager(parent)
+            parent._toast_manager = mgr   # GC protection
+        return mgr
+
+    def show(self, text: str, *, duration_ms=1500, pos="bottom-right") -> Toast | None:
+        if self.quiet:
+            self.suppressed += 1
+            return None
+        t = self._active.get(pos)
+        if t is None:
+            t = self._acquire()
+            if t is None:
+                # coalesce: keep only the latest pending message per position
+                self._queue = deque(m for m in self._queue if m[2] != pos)
+                self._queue.append((text, duration_ms, pos))
+                return None
+            self._active[pos] = t
+        return t.popup(self._owner, text, duration_ms=duration_ms, pos=pos)
+
+    def set_quiet(self, quiet: bool) -> None:
+        self.quiet = bool(quiet)
+        if self.quiet:
+            self._queue.clear()
+            for t in list(self._active.values()):
+                t.hide_now()
+
+    def _acquire(self) -> Toast | None:
+        if self._free:
+            return self._free.pop()
+        if self._created < self._pool_size:
+            self._created += 1
+            t = Toast(self._owner)
+            t.hidden.connect(self._release)
+            self.created.emit(t)
+            return t
+        return None
+
+    def _release(self, t: Toast):
+        if self._active.get(t.pos_key) is t:
+            del self._active[t.pos_key]
+        if t not in self._free:
+            self._free.append(t)
+        if self._queue and not self.quiet:
+            text, duration_ms, pos = self._queue.popleft()
+            self.show(text, duration_ms=duration_ms, pos=pos)
@@ -1,16 +1,27 @@
 from PyQt6 import QtWidgets, QtCore, QtGui
 from PyQt6.QtCore import Qt, QEvent
 
-from collections import deque
-import time
+from collections import deque, OrderedDict
+import math, time
+
+import trajectory
+from latency import ToggleLatency
+from dispatch import EventDispatcher, window_of
+
+# event types CursorToggle listens to (on the window it is attached to);
+# UpdateRequest only while a toggle waits for its frame (latency instrumentation)
+TOGGLE_EVENTS = (QEvent.Type.KeyPress, QEvent.Type.KeyRelease, QEvent.Type.FocusOut,
+                 QEvent.Type.MouseMove)
 
 def make_windows_arrow_cursor(size: int = 24,
                               body_color: str | QtGui.QColor = "#FFFFFF",
                               outline_color: str | QtGui.QColor = "#000000",
-                              shadow: bool = True) -> QtGui.QCursor:
+                              shadow: bool = True,
+                              dpr: float = 1.0) -> QtGui.QCursor:
     """
     Windows-like cursor style (white body, black outline, slight shade) QCursor creation.
     size: total size in pixels (width=height)
+    dpr: device pixel ratio the pixmap is rendered for (size stays in logical pixels)
     """
     if isinstance(body_color, str):
         body_color = QtGui.QColor(body_color)
@@ -32,7 +43,7 @@ def make_windows_arrow_cursor(size: int = 24,
         (15, 14), # right
     ]
     base = 24.0
-    s = size / base
+    s = size * dpr / base
 
     # path
     path = QtGui.QPainterPath()
@@ -42,7 +53,8 @@ def make_windows_arrow_cursor(size: int = 24,
     path.closeSubpath()
 
     # image canvas
-    img = QtGui.QImage(size, size, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+    px = max(1, int(round(size * dpr)))
+    img = QtGui.QImage(px, px, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
     img.fill(0)
     p = QtGui.QPainter(img)
     p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
@@ -60,7 +72,7 @@ def make_windows_arrow_cursor(size: int = 24,
 
     # 3) outline (black)
     pen = QtGui.QPen(outline_color)
-    pen.setWidth(max(1, int(size // 24)))
+    pen.setWidth(max(1, int(size * dpr // 24)))
     pen.setJoinStyle(QtCore.Qt.PenJoinStyle.MiterJoin)
     pen.setCapStyle(QtCore.Qt.PenCapStyle.FlatCap)
     p.setPen(pen)
@@ -69,14 +81,284 @@ def make_windows_arrow_cursor(size: int = 24,
     p.end()
 
     pm = QtGui.QPixmap.fromImage(img)
-    tip = P(1, 1)  # hotspot: arrow tip
+    pm.setDevicePixelRatio(dpr)
+    tip = QtCore.QPointF(size / base, size / base)  # hotspot: arrow tip (logical pixels)
     return QtGui.QCursor(pm, int(tip.x()), int(tip.y()))
 
 
-def make_colored_like(shape: Qt.CursorShape, color="#00D8FF", size=24) -> QtGui.QCursor:
+def make_colored_like(shape: Qt.CursorShape, color="#00D8FF", size=24,
+                      dpr: float = 1.0, shadow: bool = True) -> QtGui.QCursor:
     # Qt.CursorShape.CrossCursor (for test)
     if shape in (Qt.CursorShape.ArrowCursor, Qt.CursorShape.UpArrowCursor):
-        return make_windows_arrow_cursor(size=size, body_color=color, outline_color="#000000", shadow=True)
+        return make_windows_arrow_cursor(size=size, body_color=color, outline_color="#000000",
+                                         shadow=shadow, dpr=dpr)
+
+
+class CursorCache:
+    """Bounded LRU cache of rendered cursors.
+    Key: (shape, color, size, device pixel ratio, shadow). A hit is a dict lookup,
+    so activating a pre-warmed cursor never touches QPainter."""
+    def __init__(self, max_entries: int = 32):
+        self.max_entries = max_entries
+        self._items: OrderedDict = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(shape, color, size, dpr, shadow):
+        # ArrowCursor / UpArrowCursor render the same arrow
+        if shape == Qt.CursorShape.UpArrowCursor:
+            shape = Qt.CursorShape.ArrowCursor
+        return (shape, QtGui.QColor(color).name().upper(), int(size), round(float(dpr), 3), bool(shadow))
+
+    def get(self, shape, color, size, dpr=1.0, shadow=True) -> QtGui.QCursor | None:
+        key = self._key(shape, color, size, dpr, shadow)
+        cur = self._items.get(key)
+        if cur is not None:
+            self.hits += 1
+            self._items.move_to_end(key)
+            return cur
+        self.misses += 1
+        cur = make_colored_like(key[0], color, size, dpr=dpr, shadow=shadow)
+        if cur is not None:
+            self._put(key, cur)
+        return cur
+
+    def warm(self, shape, color, size, dpr=1.0, shadow=True) -> None:
+        """Render ahead of time without touching hit/miss counters."""
+        key = self._key(shape, color, size, dpr, shadow)
+        if key not in self._items:
+            cur = make_colored_like(key[0], color, size, dpr=dpr, shadow=shadow)
+            if cur is not None:
+                self._put(key, cur)
+
+    def _put(self, key, cur):
+        self._items[key] = cur
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._items)}
+
+    def __len__(self):
+        return len(self._items)
+
+
+class CursorAtlas:
+    """Every animation frame of one cursor, rendered once into a horizontal strip.
+    Frame k is the cursor over a halo pulsing with (1 - cos(2*pi*k/frames)) / 2, so
+    showing a frame is a blit of its sub-rect (no QPainterPath work per frame)."""
+    def __init__(self, cursor: QtGui.QCursor, dpr: float = 1.0, halo_color=None,
+                 frames: int = 24, period_ms: float = 900.0):
+        cpm = cursor.pixmap()
+        src = cpm.toImage()
+        src.setDevicePixelRatio(1.0)  # composed in device pixels
+        hot = cursor.hotSpot()
+        self.frames = int(frames) if halo_color is not None else 1
+        self.period_ms = float(period_ms)
+
+        pad = int(math.ceil(src.width() * 0.75)) if halo_color is not None else 0  # max halo radius
+        fpx = src.width() + 2 * pad
+        self.frame_px = fpx
+        self.frame_size = QtCore.QSize(math.ceil(fpx / dpr), math.ceil(fpx / dpr))  # logical
+        self.hotspot = QtCore.QPoint(round(pad / dpr) + hot.x(), round(pad / dpr) + hot.y())
+
+        strip = QtGui.QImage(fpx * self.frames, fpx, QtGui.QImage.Format.Format_ARGB32_Premultiplied)
+        strip.fill(0)
+        p = QtGui.QPainter(strip)
+        p.setRenderHint(QtGui.QPainter.RenderHint.Antialiasing, True)
+        tip = QtCore.QPointF(pad + hot.x() * dpr, pad + hot.y() * dpr)
+        for k in range(self.frames):
+            x0 = k * fpx
+            if halo_color is not None:
+                phase = (1.0 - math.cos(2.0 * math.pi * k / self.frames)) / 2.0
+                r = pad * (0.6 + 0.4 * phase)
+                c = QtGui.QColor(halo_color)
+                grad = QtGui.QRadialGradient(tip + QtCore.QPointF(x0, 0), r)
+                c.setAlpha(int(90 + 110 * phase))
+                grad.setColorAt(0.0, c)
+                c.setAlpha(0)
+                grad.setColorAt(1.0, c)
+                p.setPen(Qt.PenStyle.NoPen)
+                p.setBrush(grad)
+                p.drawEllipse(tip + QtCore.QPointF(x0, 0), r, r)
+            p.drawImage(QtCore.QPoint(x0 + pad, pad), src)
+        p.end()
+        self.pixmap = QtGui.QPixmap.fromImage(strip)
+
+    def frame_at(self, t_ms: float) -> int:
+        return int(t_ms * self.frames / self.period_ms) % self.frames
+
+    def source_rect(self, k: int) -> QtCore.QRect:
+        return QtCore.QRect(k * self.frame_px, 0, self.frame_px, self.frame_px)
+
+
+class CursorOverlay(QtWidgets.QWidget):
+    """Transparent always-on-top window drawing the active cursor at the pointer.
+    The platform cursor is blanked meanwhile; paintEvent is one blit from the atlas."""
+    painted = QtCore.pyqtSignal()
+
+    def __init__(self, fps: int = 60):
+        super().__init__(None, Qt.WindowType.FramelessWindowHint | Qt.WindowType.WindowStaysOnTopHint
+                         | Qt.WindowType.Tool | Qt.WindowType.WindowTransparentForInput
+                         | Qt.WindowType.WindowDoesNotAcceptFocus)
+        self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.atlas: CursorAtlas | None = None
+        self.frame = 0
+        self._t0_ns = 0
+
+        # halo animation: picks the frame for the elapsed time, repaints on change
+        self._anim = QtCore.QTimer(self)
+        self._anim.setTimerType(Qt.TimerType.PreciseTimer)
+        self._anim.setInterval(max(1, 1000 // fps))
+        self._anim.timeout.connect(self._tick)
+
+    def show_at(self, atlas: CursorAtlas, global_pos: QtCore.QPointF) -> None:
+        self.atlas = atlas
+        self.frame = 0
+        self._t0_ns = time.perf_counter_ns()
+        if self.size() != atlas.frame_size:
+            self.resize(atlas.frame_size)
+        self.follow(global_pos)
+        self.show()
+        self.update()
+        if atlas.frames > 1:
+            self._anim.start()
+
+    def follow(self, global_pos: QtCore.QPointF) -> None:
+        if self.atlas is not None:
+            hs = self.atlas.hotspot
+            self.move(int(global_pos.x()) - hs.x(), int(global_pos.y()) - hs.y())
+
+    def dismiss(self) -> None:
+        self._anim.stop()
+        self.hide()
+
+    def _tick(self):
+        k = self.atlas.frame_at((time.perf_counter_ns() - self._t0_ns) / 1e6)
+        if k != self.frame:
+            self.frame = k
+            self.update()
+
+    def paintEvent(self, e):
+        if self.atlas is None:
+            return
+        p = QtGui.QPainter(self)
+        p.setCompositionMode(QtGui.QPainter.CompositionMode.CompositionMode_Source)
+        pm = self.atlas.pixmap
+        dpr = self.devicePixelRatioF()
+        p.drawPixmap(QtCore.QRectF(0, 0, self.atlas.frame_px / dpr, self.atlas.frame_px / dpr),
+                     pm, QtCore.QRectF(self.atlas.source_rect(self.frame)))
+        p.end()
+        self.painted.emit()
+
+
+def _screen_dprs() -> list[float]:
+    app = QtGui.QGuiApplication.instance()
+    if app is None:
+        return [1.0]
+    return sorted({float(sc.devicePixelRatio()) for sc in QtGui.QGuiApplication.screens()}) or [1.0]
+
+
+class ShakeDetector:
+    """Sliding-window path-length detector.
+    Keeps a running distance total (add on append, subtract on eviction),
+    so each move costs one hypot() plus amortized O(1) eviction."""
+    def __init__(self, window_ms=120, dist_threshold_px=280):
+        if not window_ms > 0:
+            raise ValueError(f"window_ms must be > 0, got {window_ms!r}")
+        self.window_ms = window_ms
+        self.dist_threshold_px = dist_threshold_px
+        self._moves = deque()  # (t_ms, seg_px): seg_px = distance from the previous sample
+        self._dist = 0.0       # sum of seg_px of every sample except the head
+        self._last = None      # (x, y)
+
+    def reset(self):
+        self._moves.clear()
+        self._dist = 0.0
+        self._last = None
+
+    @property
+    def distance(self) -> float:
+        return self._dist
+
+    def feed(self, t_ms: float, x: float, y: float) -> bool:
+        """Push one sample, return True iff the window path length reaches the threshold."""
+        moves = self._moves
+        if self._last is not None and moves:
+            seg = math.hypot(x - self._last[0], y - self._last[1])
+            self._dist += seg
+        else:
+            seg = 0.0
+        moves.append((t_ms, seg))
+        self._last = (x, y)
+
+        # eviction: the new head no longer links to anything inside the window
+        # (the newest sample always stays, even if the clock went backwards)
+        cut = t_ms - self.window_ms
+        while len(moves) > 1 and moves[0][0] < cut:
+            moves.popleft()
+            t_head, seg_head = moves[0]
+            self._dist -= seg_head
+            moves[0] = (t_head, 0.0)
+        if len(moves) == 1:
+            self._dist = 0.0  # drop accumulated float drift
+
+        return self._dist >= self.dist_threshold_px
+
+
+class ReversalDetector:
+    """Velocity/reversal-count detector.
+    Counts direction flips (per axis) made faster than min_speed_px_s,
+    and fires when at least min_reversals land inside window_ms."""
+    def __init__(self, window_ms=400, min_reversals=4, min_speed_px_s=800.0):
+        self.window_ms = window_ms
+        self.min_reversals = min_reversals
+        self.min_speed_px_s = min_speed_px_s
+        self._reversals = deque()  # t_ms of each reversal
+        self._last = None          # (t_ms, x, y)
+        self._sx = 0               # last non-zero x direction (-1, 0, 1)
+        self._sy = 0
+
+    def reset(self):
+        self._reversals.clear()
+        self._last = None
+        self._sx = self._sy = 0
+
+    def feed(self, t_ms: float, x: float, y: float) -> bool:
+        """Push one sample, return True iff enough fast reversals are in the window."""
+        last = self._last
+        self._last = (t_ms, x, y)
+        if last is not None:
+            dx, dy = x - last[1], y - last[2]
+            dt = max(t_ms - last[0], 1.0)  # 1000 Hz devices report equal ms stamps
+            if math.hypot(dx, dy) * 1000.0 / dt >= self.min_speed_px_s:
+                sx = (dx > 0) - (dx < 0)
+                sy = (dy > 0) - (dy < 0)
+                if (sx and self._sx and sx != self._sx) or (sy and self._sy and sy != self._sy):
+                    self._reversals.append(t_ms)
+                if sx:
+                    self._sx = sx
+                if sy:
+                    self._sy = sy
+
+        cut = t_ms - self.window_ms
+        while self._reversals and self._reversals[0] < cut:
+            self._reversals.popleft()
+        return len(self._reversals) >= self.min_reversals
+
+
+def _event_ms(e, clock="event") -> float:
+    """Event time in ms. "event" uses QInputEvent.timestamp() (falls back to
+    the monotonic clock when the platform leaves it at 0), "monotonic" ignores it."""
+    if clock == "event":
+        ts = e.timestamp() if hasattr(e, "timestamp") else 0
+        if ts:
+            return float(ts)
+    return time.monotonic_ns() / 1e6
 
 
 class CursorToggle(QtCore.QObject):
@@ -90,7 +372,11 @@ class CursorToggle(QtCore.QObject):
                  shake_enabled=False,
                  window_ms=120, 
                  dist_threshold_px=280, 
-                 idle_ms=350): 
+                 idle_ms=350,
+                 detector=None,         # ShakeDetector / ReversalDetector
+                 clock="event",         # [event, monotonic]
+                 cursor_cache=None,     # CursorCache shared by rendered cursors
+                 latency=None):         # ToggleLatency (None = not instrumented)
         super().__init__(parent)
         self.key = key
         self.color = color
@@ -101,17 +387,63 @@ class CursorToggle(QtCore.QObject):
 
         # shake parameters
         self.shake_enabled = shake_enabled
-        self._win_ms = window_ms
-        self._dist_th = dist_threshold_px
         self._idle_ms = idle_ms
-        self._moves = deque()  # (t_ms, x, y)
+        self._clock = clock
+        self.detector = detector if detector is not None else ShakeDetector(window_ms, dist_threshold_px)
         self._last_apply_t = 0.0
+        self.cursor_cache = cursor_cache if cursor_cache is not None else CursorCache()
+        self.latency = latency
+        self.dispatcher: EventDispatcher | None = None  # set by attach(); None = the shared one
+        self._frame_window: QtGui.QWindow | None = None  # subscribed to its next UpdateRequest
+
+        # overlay rendering (use_overlay): atlases per (color, size, dpr)
+        self.overlay_enabled = False
+        self.halo_color = None
+        self._overlay: CursorOverlay | None = None
+        self._atlases: dict = {}
 
         # idle timer
         self._idle_timer = QtCore.QTimer(self)
         self._idle_timer.setSingleShot(True)
         self._idle_timer.timeout.connect(self._restore_if_active)
 
+    def attach(self, widget, dispatcher=None):
+        """Listen on widget's window through the shared dispatcher
+        (instead of an application-wide event filter)."""
+        d = dispatcher if dispatcher is not None else EventDispatcher.instance()
+        self.dispatcher = d
+        d.subscribe(window_of(widget), TOGGLE_EVENTS, self.eventFilter)
+        QtWidgets.QApplication.instance().applicationStateChanged.connect(self._on_app_state)
+
+    def use_overlay(self, halo: bool = False, halo_color="#FFD400"):
+        """Draw the active cursor in a CursorOverlay instead of setOverrideCursor."""
+        self.overlay_enabled = True
+        self.halo_color = halo_color if halo else None
+
+    def _ensure_overlay(self) -> CursorOverlay:
+        if self._overlay is None:
+            self._overlay = CursorOverlay()
+            self._overlay.painted.connect(self._on_overlay_painted)
+        return self._overlay
+
+    def _atlas_for(self, shape, dpr) -> CursorAtlas:
+        key = (shape, self.color, self.size, round(float(dpr), 3))
+        atlas = self._atlases.get(key)
+        if atlas is None:
+            cur = self.cursor_cache.get(shape, self.color, self.size, dpr)
+            atlas = self._atlases[key] = CursorAtlas(cur, dpr, self.halo_color)
+        return atlas
+
+    def _on_overlay_painted(self):
+        # overlay mode: the overlay's first paint is the visible frame
+        if self.latency is not None and self.latency.waiting_for_frame:
+            self.latency.frame()
+
+    def _on_app_state(self, state):
+        # replaces ApplicationDeactivate (only delivered to the application object)
+        if state != Qt.ApplicationState.ApplicationActive:
+            self._restore()
+
     def eventFilter(self, obj, e):
         et = e.type()
 
@@ -119,6 +451,8 @@ class CursorToggle(QtCore.QObject):
         if et == QEvent.Type.KeyPress and getattr(e, "key", None) and e.key() == self.key:
             if not getattr(e, "isAutoRepeat", lambda: False)():
                 if not self.active:
+                    if self.latency is not None:
+                        self.latency.begin("key", e.timestamp())
                     self._apply_cursor_for(obj)
             return False
 
@@ -134,27 +468,96 @@ class CursorToggle(QtCore.QObject):
             return False
 
         # shake trigger
-        if self.shake_enabled and et == QEvent.Type.MouseMove:
-            self._on_mouse_move(e)
+        if et == QEvent.Type.MouseMove:
+            if self.active and self._overlay is not None:
+                self._overlay.follow(e.globalPosition())
+            if self.shake_enabled:
+                self._on_mouse_move(e)
+            elif self.latency is not None:
+                self.latency.observe(e.timestamp())  # input clock calibration
             return False
 
         return False
 
     def _restore(self):
         if self.active:
+            if self._overlay is not None:
+                self._overlay.dismiss()
             QtWidgets.QApplication.restoreOverrideCursor()
             self.active = False
+            trajectory.set_toggle_state(False)
 
     def _apply_cursor_for(self, obj):
         if self.mode != 0:
             cur = QtWidgets.QApplication.overrideCursor()
-            shape = cur.shape() if cur else (obj.cursor().shape() if isinstance(obj, QtWidgets.QWidget)
+            shape = cur.shape() if cur else (obj.cursor().shape() if isinstance(obj, (QtWidgets.QWidget, QtGui.QWindow))
                                              else Qt.CursorShape.ArrowCursor)
-            colored = make_colored_like(shape, self.color, self.size)
-            QtWidgets.QApplication.setOverrideCursor(colored)
+            if isinstance(obj, QtWidgets.QWidget):
+                dpr = obj.devicePixelRatioF()
+            elif isinstance(obj, QtGui.QWindow):
+                dpr = obj.devicePixelRatio()
+            else:
+                dpr = _screen_dprs()[-1]
+            if self.overlay_enabled:
+                atlas = self._atlas_for(shape, dpr)
+                if self.latency is not None:
+                    self.latency.built()
+                # platform cursor hidden, the overlay draws it
+                QtWidgets.QApplication.setOverrideCursor(Qt.CursorShape.BlankCursor)
+                self._ensure_overlay().show_at(atlas, QtGui.QCursor.pos().toPointF())
+            else:
+                colored = self.cursor_cache.get(shape, self.color, self.size, dpr)
+                if self.latency is not None:
+                    self.latency.built()
+                QtWidgets.QApplication.setOverrideCursor(colored)
         else:
             QtWidgets.QApplication.setOverrideCursor(self.default_cursor)
         self.active = True
+        trajectory.set_toggle_state(True)
+        if self.latency is not None:
+            self.latency.applied()
+            if not (self.overlay_enabled and self.mode != 0):  # the overlay paints by itself
+                self._request_frame(obj)
+
+    def _request_frame(self, obj):
+        # ask for one frame so the applied cursor can be timed to the next UpdateRequest
+        if isinstance(obj, QtGui.QWindow):
+            win = obj
+        else:
+            win = obj.window().windowHandle() if isinstance(obj, QtWidgets.QWidget) else None
+        if win is None:
+            win = QtGui.QGuiApplication.focusWindow()
+        if win is not None:
+            if self._frame_window is None:
+                # the window's next frame only: every frame would otherwise cross into Python
+                self._frame_window = win
+                (self.dispatcher or EventDispatcher.instance()).subscribe(
+                    win, (QEvent.Type.UpdateRequest,), self._on_frame)
+            win.requestUpdate()
+        elif self.latency is not None:
+            self.latency.frame()
+
+    def _on_frame(self, obj, e):
+        # first frame after the cursor switched
+        if obj is not self._frame_window:
+            return False
+        (self.dispatcher or EventDispatcher.instance()).unsubscribe(self._on_frame)
+        self._frame_window = None
+        if self.latency is not None:
+            self.latency.frame()
+        return False
+
+    def prewarm(self):
+        """Render the activation cursors for every connected screen's DPR."""
+        if self.mode == 0:
+            return
+        for dpr in _screen_dprs():
+            for shape in (Qt.CursorShape.ArrowCursor,):
+                self.cursor_cache.warm(shape, self.color, self.size, dpr)
+                if self.overlay_enabled:
+                    self._atlas_for(shape, dpr)
+        if self.overlay_enabled:
+            self._ensure_overlay()
 
     def _restore_if_active(self):
         # idle timer
@@ -163,43 +566,93 @@ class CursorToggle(QtCore.QObject):
     def _on_mouse_move(self, e):
         # global position
         if hasattr(e, "globalPosition"):
-            gx, gy = e.globalPosition().x(), e.globalPosition().y()
+            gp = e.globalPosition()
+            gx, gy = gp.x(), gp.y()
         else:
             gp = QtGui.QCursor.pos()
             gx, gy = gp.x(), gp.y()
-        now_ms = time.time() * 1000.0
-
-        # window_ms 
-        self._moves.append((now_ms, gx, gy))
-        cut = now_ms - self._win_ms
-        while self._moves and self._moves[0][0] < cut:
-            self._moves.popleft()
-
-        # cumulative distance
-        if len(self._moves) >= 2:
-            dist = 0.0
-            it = iter(self._moves)
-            t0, x0, y0 = next(it)
-            for t1, x1, y1 in it:
-                dx, dy = (x1 - x0), (y1 - y0)
-                dist += (dx*dx + dy*dy) ** 0.5
-                t0, x0, y0 = t1, x1, y1
-
-            # threshold check
-            if dist >= self._dist_th and not self.active:
+        now_ms = _event_ms(e, self._clock)
+        if self.latency is not None:
+            self.latency.observe(e.timestamp())
+
+        # threshold check (constant cost per move, whatever window_ms is)
+        if self.detector.feed(now_ms, gx, gy):
+            if not self.active:
+                if self.latency is not None:
+                    self.latency.begin("shake", e.timestamp())
                 # obj -> event reciever
                 # widget/override shape extraction
                 self._apply_cursor_for(e.target() if hasattr(e, "target") else QtWidgets.QApplication.widgetAt(QtGui.QCursor.pos()))
 
             # big move check (reset timer)
-            if dist >= self._dist_th:
-                self._idle_timer.start(self._idle_ms)
-            else:
-                # reset timer by small moves
-                pass
+            self._idle_timer.start(self._idle_ms)
 
 
-def get_toggler(opt, app):
+class ToggleSlot(QtCore.QObject):
+    """Holds the active CursorToggle of a window and swaps it in one assignment.
+
+    The slot is what subscribes to the window (once); every event goes to
+    `current`, so a swap between two events can never leave both or neither
+    toggler installed. swap() restores the outgoing toggler's cursor first."""
+    def __init__(self, toggler: CursorToggle, parent=None):
+        super().__init__(parent)
+        self.current = toggler
+        self.swaps = 0
+
+    def attach(self, widget, dispatcher=None):
+        d = dispatcher if dispatcher is not None else EventDispatcher.instance()
+        self.current.dispatcher = d
+        d.subscribe(window_of(widget), TOGGLE_EVENTS, self._on_event)
+        QtWidgets.QApplication.instance().applicationStateChanged.connect(self._on_app_state)
+
+    def swap(self, toggler: CursorToggle) -> CursorToggle:
+        old = self.current
+        if toggler is not old:
+            old._idle_timer.stop()
+            old._restore()
+            self.current = toggler
+            toggler.dispatcher = old.dispatcher
+            self.swaps += 1
+        return old
+
+    def _on_event(self, obj, e):
+        return self.current.eventFilter(obj, e)
+
+    def _on_app_state(self, state):
+        self.current._on_app_state(state)
+
+
+def make_detector(opt, window_ms=300, dist_threshold_px=3000):
+    """Shake detector selected by opt["DETECTOR"] ([distance, reversal]);
+    SHAKE_WINDOW_MS / SHAKE_DIST_PX override the distance detector's defaults."""
+    kind = opt.get("DETECTOR", "distance").lower()
+    if kind == "reversal":
+        return ReversalDetector(window_ms=int(opt.get("REVERSAL_WINDOW_MS", 400)),
+                                min_reversals=int(opt.get("MIN_REVERSALS", 4)),
+                                min_speed_px_s=float(opt.get("MIN_SPEED_PX_S", 800)))
+    return ShakeDetector(window_ms=float(opt.get("SHAKE_WINDOW_MS", window_ms)),
+                         dist_threshold_px=float(opt.get("SHAKE_DIST_PX", dist_threshold_px)))
+
+
+def get_toggler(opt, app, prewarm=True, cursor_cache=None):
+    # "overlay-<action>": same action, drawn by CursorOverlay instead of the platform cursor
+    action = opt["ACTION"].lower()
+    overlay = action.startswith("overlay-")
+    toggler = _build_toggler(dict(opt, ACTION=action.removeprefix("overlay-")) if overlay else opt, app)
+    if overlay:
+        toggler.use_overlay(halo=bool(opt.get("HALO", False)), halo_color=opt.get("HALO_COLOR", "#FFD400"))
+    if cursor_cache is not None:  # shared by several togglers (blocks.py)
+        toggler.cursor_cache = cursor_cache
+    if opt.get("LATENCY", True):
+        toggler.latency = ToggleLatency(float(opt.get("LATENCY_BUDGET_MS", 16.7)))
+    # render activation cursors before the participant triggers them
+    # (prewarm=False: the caller runs toggler.prewarm() later, e.g. after the first frame)
+    if prewarm:
+        toggler.prewarm()
+    return toggler
+
+
+def _build_toggler(opt, app):
     # Red is a default color for highlight mode.
     if opt["TRIGGER"].lower() == "spacebar" and opt["ACTION"].lower() == "big-size":
         # case 1: hotkey + big-sized
@@ -216,13 +669,17 @@ def get_toggler(opt, app):
         color =  "#FFFFFF"
         size = int(opt.get("SIZE", 96))
         return CursorToggle(1, None, color=color, size=size, parent=app,
-                            shake_enabled=True,window_ms=300, dist_threshold_px=3000, idle_ms=350)
+                            shake_enabled=True, idle_ms=int(opt.get("SHAKE_IDLE_MS", 350)),
+                            detector=make_detector(opt),
+                            clock=opt.get("CLOCK", "event"))
     elif opt["TRIGGER"].lower() == "shake" and opt["ACTION"].lower() == "big-size":
         # case 4: shake + colored
         color = opt.get("COLOR", "#FF0000")
         size = 24
         return CursorToggle(1, None, color=color, size=size, parent=app,
-                            shake_enabled=True,window_ms=300, dist_threshold_px=3000, idle_ms=350)
+                            shake_enabled=True, idle_ms=int(opt.get("SHAKE_IDLE_MS", 350)),
+                            detector=make_detector(opt),
+                            clock=opt.get("CLOCK", "event"))
 
     elif opt["TRIGGER"].lower() == "spacebar" and opt["SHAPE"].lower() == "corsshead":
         # default test case
@@ -0,0 +1,125 @@
+from array import array
+from pathlib import Path
+import struct, sys, time
+from typing import Dict, Optional
+
+# event kinds
+MOVE, PRESS, RELEASE, TOGGLE = 0, 1, 2, 3
+
+# column name -> array typecode (fixed-size, native order; byte order is in the file header)
+COLUMNS = (
+    ("t_ns", "q"),     # perf_counter_ns at delivery (same clock as measure)
+    ("ev_ms", "I"),    # QInputEvent.timestamp() (ms, wraps at 2**32)
+    ("x", "f"),        # global position (logical px)
+    ("y", "f"),
+    ("buttons", "B"),  # Qt.MouseButton flags (low 8 bits)
+    ("kind", "B"),     # MOVE / PRESS / RELEASE / TOGGLE
+    ("toggle", "B"),   # cursor toggle active (0/1)
+)
+
+# magic, version, byteorder ('<' / '>'), round_no, n, t0_ns, dropped
+_HEADER = struct.Struct("<4sHcxIIqI")
+_MAGIC = b"TRJ1"
+
+# shared with CursorToggle: current toggle state, stamped on every sample
+_toggle_state = 0
+# module-level recorder used by measure (None = disabled)
+_recorder: Optional["TrajectoryRecorder"] = None
+
+
+def enable(capacity: int = 200_000) -> "TrajectoryRecorder":
+    global _recorder
+    if _recorder is None or _recorder.capacity != capacity:
+        _recorder = TrajectoryRecorder(capacity)
+    return _recorder
+
+
+def disable() -> None:
+    global _recorder
+    _recorder = None
+
+
+def set_toggle_state(active: bool) -> None:
+    global _toggle_state
+    _toggle_state = 1 if active else 0
+    if _recorder is not None:
+        _recorder.add(TOGGLE, 0, float("nan"), float("nan"), 0)
+
+
+class TrajectoryRecorder:
+    """Columnar per-round buffer of pointer events.
+
+    Columns are preallocated once (capacity events) and reused every round, so
+    recording is a handful of index stores per event and memory never grows.
+    Events beyond capacity are counted in `dropped`.
+    """
+    def __init__(self, capacity: int = 200_000):
+        self.capacity = int(capacity)
+        self.cols: Dict[str, array] = {name: array(tc, bytes(array(tc).itemsize * self.capacity))
+                                       for name, tc in COLUMNS}
+        self.n = 0
+        self.dropped = 0
+        self.round_no = 0
+        self.t0_ns = 0
+        self.recording = False
+
+    def begin(self, round_no: int, t0_ns: int) -> None:
+        self.round_no = int(round_no)
+        self.t0_ns = int(t0_ns)
+        self.n = 0
+        self.dropped = 0
+        self.recording = True
+
+    def add(self, kind: int, ev_ms: int, x: float, y: float, buttons: int, t_ns: Optional[int] = None) -> None:
+        if not self.recording:
+            return
+        # one call per event: measure.record_pointer runs from a filter on the window only
+        i = self.n
+        if i >= self.capacity:
+            self.dropped += 1
+            return
+        c = self.cols
+        c["t_ns"][i] = t_ns if t_ns is not None else time.perf_counter_ns()
+        c["ev_ms"][i] = ev_ms & 0xFFFFFFFF
+        c["x"][i] = x
+        c["y"][i] = y
+        c["buttons"][i] = buttons & 0xFF
+        c["kind"][i] = kind
+        c["toggle"][i] = _toggle_state
+        self.n = i + 1
+
+    def end(self) -> bytes:
+        """Stop recording and return the round as one binary blob."""
+        self.recording = False
+        n = self.n
+        parts = [_HEADER.pack(_MAGIC, 1, b"<" if sys.byteorder == "little" else b">",
+                              self.round_no, n, self.t0_ns, self.dropped)]
+        for name, _ in COLUMNS:
+            col = self.cols[name]
+            parts.append(memoryview(col)[:n].tobytes())
+        return b"".join(parts)
+
+
+def load_round(path: str | Path) -> dict:
+    """Read one .trj file back: header fields plus one array per column."""
+    data = Path(path).read_bytes()
+    magic, version, order, round_no, n, t0_ns, dropped = _HEADER.unpack_from(data, 0)
+    if magic != _MAGIC:
+        raise ValueError(f"not a trajectory file: {path}")
+    out = {"round": round_no, "n": n, "t0_ns": t0_ns, "dropped": dropped}
+    off = _HEADER.size
+    swap = (order == b"<") != (sys.byteorder == "little")
+    for name, tc in COLUMNS:
+        col = array(tc)
+        size = col.itemsize * n
+        col.frombytes(data[off:off + size])
+        if swap:
+            col.byteswap()
+        out[name] = col
+        off += size
+    return out
+
+
+def round_file(traj_dir: str | Path, round_no: int) -> Path:
+    return Path(traj_dir) / f"round_{int(round_no):04d}.trj"
+
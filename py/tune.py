@@ -0,0 +1,409 @@
+"""Offline tuner for the shake trigger (distance detector), vectorized in NumPy.
+
+Recorded round trajectories are run through the detection logic of CursorToggle
+(ShakeDetector fed with the event time and global position of every mouse move,
+cursor restored after idle_ms without a detection) for every combination of
+
+    window_ms x dist_threshold_px x idle_ms
+
+at once: per window one searchsorted gives every sample's in-window path length
+(cumulative segment lengths), the threshold and idle axes are broadcast over the
+samples that reach the smallest threshold.
+
+Ground truth: in shake sessions, every toggle recorded in the trajectory is a
+shake, starting where the pointer last moved slower than ONSET_SPEED_PX_S before
+the toggle and ending when the cursor was restored. Everything else (all of a
+spacebar session) is not. Only shakes the recording settings caught are labelled,
+so record the sessions used for tuning with permissive SHAKE_* options.
+
+  miss_rate     : share of shakes with no detection before the cursor was restored
+  false_per_min : activations outside the shakes, per minute of unlabelled trace
+  latency_ms    : mean shake onset -> first detection, over the detected shakes
+  reactivations : mean restores + re-activations of the cursor within a detected shake
+                  (idle_ms too short)
+  linger_ms     : mean time the cursor stays active after the pointer stopped shaking
+                  (idle_ms too long)
+
+    python py/tune.py [ROOT | results.txt ...] [--window 100:600:25] [--threshold 500:6000:100]
+                      [--idle 150:800:50] [--group-by participant] [--groups groups.csv]
+                      [--max-false 0.5] [--out tune] [--workers N] [--check]
+
+Groups are participants (from the <results>_plan.json sidecar), or user groups
+from a participant,group CSV. Outputs (in --out): grid.csv (every combination
+per group), best.csv (per group: lowest miss rate within --max-false, then
+lowest latency; idle_ms by fewest re-activations, then shortest linger). --check compares the vectorized replay with ShakeDetector.
+"""
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+import argparse, os, sys, time
+
+import numpy as np
+
+import trajectory
+from analytics import traj_dir_for
+
+ONSET_SPEED_PX_S = 300.0   # a shake starts where the pointer last moved slower than this
+MIN_DT_MS = 1.0            # floor for sample spacing in the onset speed
+
+GRID_COLUMNS = ("group", "window_ms", "threshold_px", "idle_ms", "shakes", "hits", "miss_rate",
+                "false_triggers", "false_per_min", "latency_ms", "reactivations", "linger_ms")
+
+_INLINE_MAX = 2  # sessions evaluated in-process below this many
+
+
+# ----------------- traces -----------------
+def load_trace(path: str | Path, shake_session: bool) -> Optional[Dict[str, np.ndarray]]:
+    """Mouse moves of one .trj file as the detector sees them, plus labels:
+    t (ms), x, y, episodes (k, 3) move indices [a, b) plus e, the last sample of the
+    shake still moving at ONSET_SPEED_PX_S, neg (samples outside the episodes)."""
+    d = trajectory.load_round(path)
+    col = {name: np.frombuffer(d[name], dtype=d[name].typecode) for name, _ in trajectory.COLUMNS}
+    kind = col["kind"]
+    mv = kind == trajectory.MOVE
+    n = int(mv.sum())
+    if n < 2:
+        return None
+    ev = col["ev_ms"][mv].astype(np.int64)
+    if (ev == 0).any():  # no event timestamps: CursorToggle falls back to the monotonic clock
+        t = (col["t_ns"][mv] - col["t_ns"][mv][0]) / 1e6
+    else:  # QInputEvent timestamps are 32-bit ms
+        t = np.concatenate(([0], np.cumsum(np.diff(ev) % (1 << 32)))).astype(np.float64) + ev[0]
+    x = col["x"][mv].astype(np.float64)
+    y = col["y"][mv].astype(np.float64)
+
+    episodes = np.empty((0, 3), dtype=np.int64)
+    neg = np.ones(n, dtype=bool)
+    tg = np.flatnonzero(kind == trajectory.TOGGLE)
+    if shake_session and tg.size:
+        moves_before = np.cumsum(mv)[tg]       # moves recorded before each toggle row
+        state = col["toggle"][tg]
+        if col["toggle"][0]:                    # active when the round began: onset unknown
+            first_off = moves_before[state == 0]
+            neg[:first_off[0] if first_off.size else n] = False
+        seg = np.hypot(np.diff(x), np.diff(y))
+        speed = np.concatenate(([0.0], seg / np.maximum(np.diff(t), MIN_DT_MS) * 1000))
+        idx = np.arange(n)
+        slow = speed < ONSET_SPEED_PX_S
+        last_slow = np.maximum.accumulate(np.where(slow, idx, -1))
+        last_fast = np.maximum.accumulate(np.where(slow, -1, idx))
+        eps, prev_end = [], 0
+        for k in np.flatnonzero(state == 1):
+            j = int(moves_before[k]) - 1        # the move that activated the cursor
+            if j < 0:
+                continue
+            off = moves_before[k + 1:][state[k + 1:] == 0]
+            b = int(off[0]) if off.size else n
+            a = max(min(int(last_slow[j]) + 1, j), prev_end)
+            eps.append((a, b, max(int(last_fast[b - 1]), a)))
+            prev_end = b
+        if eps:
+            episodes = np.array(eps, dtype=np.int64)
+            for a, b, _ in eps:
+                neg[a:b] = False
+    return {"t": t, "x": x, "y": y, "episodes": episodes, "neg": neg}
+
+
+def window_distance(t: np.ndarray, cum: np.ndarray, window_ms: float) -> np.ndarray:
+    """ShakeDetector.distance after each sample: path length of the samples
+    after the first one still inside the window (cum = cumulative segment lengths)."""
+    head = np.searchsorted(t, t - window_ms, side="left")
+    return cum - cum[head]
+
+
+def _activations(sel: np.ndarray, gap: np.ndarray, idles: np.ndarray) -> np.ndarray:
+    """(nT, nI) count of selected detections more than idle_ms after the previous
+    detection, i.e. that (re)activate the cursor; idles ascending."""
+    nT, nI = sel.shape[0], len(idles)
+    n_idle_below = np.searchsorted(idles, gap[sel], side="left")  # idles with idle < gap
+    rows = np.broadcast_to(np.arange(nT)[:, None], sel.shape)[sel]
+    cnt = np.bincount(rows * (nI + 1) + n_idle_below, minlength=nT * (nI + 1)).reshape(nT, nI + 1)
+    return np.cumsum(cnt[:, ::-1], axis=1)[:, ::-1][:, 1:]
+
+
+def evaluate(trace: Dict[str, np.ndarray], windows: np.ndarray, thresholds: np.ndarray,
+             idles: np.ndarray) -> Dict[str, np.ndarray]:
+    """Counts of one trace for every (window, threshold[, idle]); thresholds and idles ascending."""
+    nW, nT, nI = len(windows), len(thresholds), len(idles)
+    t, eps, neg = trace["t"], trace["episodes"], trace["neg"]
+    n = len(t)
+    cum = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(trace["x"]), np.diff(trace["y"])))))
+    in_ep = np.zeros(n, dtype=bool)
+    for a, b, _ in eps:
+        in_ep[a:b] = True
+    out = {"shakes": len(eps),
+           "neg_ms": float(np.diff(t)[neg[1:]].sum()),
+           "hits": np.zeros((nW, nT), dtype=np.int64),
+           "lat_sum": np.zeros((nW, nT)),
+           "false": np.zeros((nW, nT, nI), dtype=np.int64),
+           "react": np.zeros((nW, nT, nI), dtype=np.int64),
+           "linger_sum": np.zeros((nW, nT, nI))}
+    for wi, w in enumerate(windows):
+        dist = window_distance(t, cum, w)
+        # only samples reaching the lowest threshold can detect at all
+        cand = np.flatnonzero(dist >= thresholds[0])
+        m = cand.size
+        if not m:
+            continue
+        tc = t[cand]
+        det = dist[cand][None, :] >= thresholds[:, None]          # (nT, m)
+        k = np.arange(m)
+
+        # activation = detection more than idle_ms after the previous one (cursor restored meanwhile)
+        last = np.maximum.accumulate(np.where(det, k, -1), axis=1)
+        prev = np.concatenate((np.full((nT, 1), -1), last[:, :-1]), axis=1)
+        gap = np.where(prev >= 0, tc - tc[np.maximum(prev, 0)], np.inf)
+        out["false"][wi] = _activations(det & neg[cand][None, :], gap, idles)
+
+        if len(eps):
+            # first detection at or after each shake onset, hit if before its end
+            nxt = np.minimum.accumulate(np.where(det, k, m)[:, ::-1], axis=1)[:, ::-1]
+            nxt = np.concatenate((nxt, np.full((nT, 1), m)), axis=1)
+            ca, cb = np.searchsorted(cand, eps[:, 0]), np.searchsorted(cand, eps[:, 1])
+            first = nxt[:, ca]                                     # (nT, shakes)
+            hit = first < cb[None, :]
+            lat = tc[np.minimum(first, m - 1)] - t[eps[:, 0]][None, :]
+            out["hits"][wi] = hit.sum(axis=1)
+            out["lat_sum"][wi] = np.where(hit, lat, 0.0).sum(axis=1)
+
+            # short idle: the cursor is restored and re-activated while the shake goes on
+            again = det & in_ep[cand][None, :]
+            hr, hs = np.nonzero(hit)
+            again[hr, first[hr, hs]] = False
+            out["react"][wi] = _activations(again, gap, idles)
+
+            # long idle: the cursor stays enlarged after the pointer stopped shaking
+            last_in = last[:, np.maximum(cb - 1, 0)]                # last detection before each end
+            stop_t = t[eps[:, 2]]
+            linger = np.maximum(tc[np.maximum(last_in, 0)][:, :, None] + idles[None, None, :]
+                                - stop_t[None, :, None], 0.0)     # (nT, shakes, nI)
+            out["linger_sum"][wi] = np.where(hit[:, :, None], linger, 0.0).sum(axis=1)
+    return out
+
+
+def evaluate_session(files: Sequence[str], shake_session: bool, windows, thresholds, idles) -> Dict[str, object]:
+    """Summed counts over the rounds of one session (runs in a worker process)."""
+    total = None
+    for f in files:
+        tr = load_trace(f, shake_session)
+        if tr is None:
+            continue
+        r = evaluate(tr, windows, thresholds, idles)
+        if total is None:
+            total = r
+        else:
+            for key in total:
+                total[key] = total[key] + r[key]
+    return total
+
+
+# ----------------- sessions / groups -----------------
+def discover_sessions(roots: Sequence[str]) -> List[Path]:
+    from aggregate import discover
+    files = [Path(r) for r in roots if Path(r).is_file()]
+    dirs = [r for r in roots if Path(r).is_dir()]
+    return sorted(set(files + discover(dirs))) if dirs else sorted(set(files))
+
+
+def participant_of(results_path: Path) -> Optional[int]:
+    import plan
+    side = results_path.with_name(results_path.stem + "_plan.json")
+    if not side.exists():
+        return None
+    return plan.load_plans(side)["plans"][0].get("participant")
+
+
+def load_groups(path: str) -> Dict[str, str]:
+    groups = {}
+    with open(path, "r", encoding="utf-8") as f:
+        for i, line in enumerate(f):
+            cells = [c.strip() for c in line.split(",")]
+            if len(cells) < 2 or (i == 0 and not cells[0].lstrip("-").isdigit()):
+                continue  # header / blank
+            groups[cells[0]] = cells[1]
+    return groups
+
+
+def group_of(results_path: Path, by: str, groups: Optional[Dict[str, str]]) -> str:
+    if by == "all" and groups is None:
+        return "all"
+    p = participant_of(results_path)
+    if groups is not None:
+        return groups.get(str(p), "other")
+    return f"participant {p}" if p is not None else "unknown"
+
+
+# ----------------- report -----------------
+def summarize(tot: Dict[str, object], windows, thresholds, idles) -> Dict[str, np.ndarray]:
+    """Metrics over the full (window, threshold, idle) grid."""
+    shape = (len(windows), len(thresholds), len(idles))
+    hits = np.broadcast_to(tot["hits"][:, :, None], shape)
+    shakes = tot["shakes"]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "hits": hits,
+            "miss_rate": 1.0 - hits / shakes if shakes else np.full(shape, np.nan),
+            "false_triggers": tot["false"],
+            "false_per_min": tot["false"] / (tot["neg_ms"] / 60000.0) if tot["neg_ms"] else np.full(shape, np.nan),
+            "latency_ms": np.broadcast_to((tot["lat_sum"] / tot["hits"])[:, :, None], shape),
+            "reactivations": tot["react"] / hits,
+            "linger_ms": tot["linger_sum"] / hits,
+        }
+
+
+def best_index(m: Dict[str, np.ndarray], max_false: float) -> tuple:
+    """Lowest miss rate with false_per_min <= max_false, then latency; lowest false
+    rate if no combination meets the limit. idle_ms (which only lowers the false rate
+    as it grows) is then chosen by fewest re-activations within a shake, then the
+    shortest linger after it."""
+    miss = np.nan_to_num(m["miss_rate"].ravel(), nan=1.0)
+    fpm = np.nan_to_num(m["false_per_min"].ravel(), nan=0.0)
+    lat = np.nan_to_num(m["latency_ms"].ravel(), nan=np.inf)
+    react = np.nan_to_num(m["reactivations"].ravel(), nan=0.0)
+    linger = np.nan_to_num(m["linger_ms"].ravel(), nan=0.0)
+    ok = fpm <= max_false
+    if ok.any():
+        order = np.lexsort((fpm, linger, react, lat, miss, ~ok))
+    else:
+        order = np.lexsort((linger, react, lat, miss, fpm))
+    return np.unravel_index(order[0], m["miss_rate"].shape)
+
+
+def _fmt(v) -> str:
+    return f"{v:.4f}" if isinstance(v, float) else str(v)
+
+
+def _write_csv(path: Path, rows) -> None:
+    with path.open("w", encoding="utf-8") as f:
+        f.write(",".join(GRID_COLUMNS) + "\n")
+        for row in rows:
+            f.write(",".join(_fmt(v) for v in row) + "\n")
+
+
+def _row(group, tot, m, idx, windows, thresholds, idles) -> tuple:
+    wi, ti, ii = idx
+    return (group, float(windows[wi]), float(thresholds[ti]), float(idles[ii]), tot["shakes"],
+            int(m["hits"][idx]), float(m["miss_rate"][idx]), int(m["false_triggers"][idx]),
+            float(m["false_per_min"][idx]), float(m["latency_ms"][idx]),
+            float(m["reactivations"][idx]), float(m["linger_ms"][idx]))
+
+
+# ----------------- check -----------------
+def check(trace: Dict[str, np.ndarray], window_ms: float, threshold_px: float, idle_ms: float) -> tuple:
+    """(vectorized, reference) (false activations, re-activations within shakes) of one
+    trace, the reference being ShakeDetector + the idle-timer logic of CursorToggle,
+    one sample at a time."""
+    from toggle import ShakeDetector
+    det = ShakeDetector(window_ms=window_ms, dist_threshold_px=threshold_px)
+    ep_of = np.full(len(trace["t"]), -1)
+    for i, (a, b, _) in enumerate(trace["episodes"]):
+        ep_of[a:b] = i
+    false = react = 0
+    seen, active_until = set(), -np.inf
+    for ti, xi, yi, ni, ei in zip(trace["t"], trace["x"], trace["y"], trace["neg"], ep_of):
+        if det.feed(float(ti), float(xi), float(yi)):
+            activates = ti > active_until
+            if ni:
+                false += activates
+            elif ei >= 0:
+                react += activates and ei in seen
+                seen.add(ei)
+            active_until = ti + idle_ms
+    r = evaluate(trace, np.array([window_ms]), np.array([threshold_px]), np.array([idle_ms]))
+    return (int(r["false"][0, 0, 0]), int(r["react"][0, 0, 0])), (int(false), int(react))
+
+
+def _axis(text: str) -> np.ndarray:
+    """"a:b:step" (b included) or "v1,v2,..." -> ascending float array."""
+    if ":" in text:
+        a, b, step = (float(v) for v in text.split(":"))
+        return np.arange(a, b + step / 2, step)
+    return np.array(sorted(float(v) for v in text.split(",")))
+
+
+def main(argv: List[str]) -> int:
+    from aggregate import _NAME
+    from constant import OPTIONS
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("roots", nargs="*", default=[OPTIONS["DIR"]], help="results files or directories")
+    ap.add_argument("--window", default="100:600:25", help="window_ms values (a:b:step or v1,v2,...)")
+    ap.add_argument("--threshold", default="500:6000:100", help="dist_threshold_px values")
+    ap.add_argument("--idle", default="150:800:50", help="idle_ms values")
+    ap.add_argument("--group-by", choices=("participant", "all"), default="participant")
+    ap.add_argument("--groups", help="participant,group CSV (user groups instead of participants)")
+    ap.add_argument("--max-false", type=float, default=0.5, help="false activations per minute allowed")
+    ap.add_argument("--out", default="tune")
+    ap.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    ap.add_argument("--check", action="store_true", help="compare with ShakeDetector on a few traces")
+    args = ap.parse_args(argv)
+
+    windows, thresholds, idles = _axis(args.window), _axis(args.threshold), _axis(args.idle)
+    groups = load_groups(args.groups) if args.groups else None
+    sessions = []
+    for p in discover_sessions(args.roots):
+        files = sorted(str(f) for f in traj_dir_for(p).glob("round_*.trj"))
+        m = _NAME.match(p.name)
+        if files and m:
+            sessions.append((p, files, m.group("trigger") == "shake"))
+    if not sessions:
+        print("no sessions with trajectories found", file=sys.stderr)
+        return 1
+
+    if args.check:
+        rng = np.random.default_rng(0)
+        bad = 0
+        for p, files, shake in sessions[:4]:
+            tr = load_trace(files[0], shake)
+            if tr is None:
+                continue
+            w, thr, idle = rng.choice(windows), rng.choice(thresholds), rng.choice(idles)
+            got, ref = check(tr, w, thr, idle)
+            bad += got != ref
+            print(f"{p.name} {Path(files[0]).name} window={w:g} threshold={thr:g} idle={idle:g}: "
+                  f"{got} vs {ref} (false, re-activations){'' if got == ref else '  MISMATCH'}")
+        if bad:
+            return 1
+
+    t0 = time.perf_counter()
+    jobs = [(files, shake, windows, thresholds, idles) for _, files, shake in sessions]
+    if len(jobs) > _INLINE_MAX and args.workers > 1:
+        with ProcessPoolExecutor(max_workers=min(args.workers, len(jobs))) as pool:
+            results = list(pool.map(evaluate_session, *zip(*jobs)))
+    else:
+        results = [evaluate_session(*job) for job in jobs]
+
+    totals: Dict[str, dict] = {}
+    for (p, _, _), r in zip(sessions, results):
+        if r is None:
+            continue
+        g = group_of(p, args.group_by, groups)
+        if g not in totals:
+            totals[g] = r
+        else:
+            for key in r:
+                totals[g][key] = totals[g][key] + r[key]
+
+    out = Path(args.out)
+    out.mkdir(parents=True, exist_ok=True)
+    grid_rows, best_rows = [], []
+    for g in sorted(totals):
+        tot = totals[g]
+        m = summarize(tot, windows, thresholds, idles)
+        grid_rows += [_row(g, tot, m, idx, windows, thresholds, idles) for idx in np.ndindex(m["miss_rate"].shape)]
+        best_rows.append(_row(g, tot, m, best_index(m, args.max_false), windows, thresholds, idles))
+    _write_csv(out / "grid.csv", grid_rows)
+    _write_csv(out / "best.csv", best_rows)
+
+    n_combos = len(windows) * len(thresholds) * len(idles)
+    n_rounds = sum(len(f) for _, f, _ in sessions)
+    print(f"{len(sessions)} sessions, {n_rounds} rounds x {n_combos} combinations "
+          f"in {time.perf_counter() - t0:.1f}s -> {out}")
+    for g, w, thr, idle, shakes, hits, miss, _, fpm, lat, react, linger in best_rows:
+        print(f"{g}: SHAKE_WINDOW_MS={w:g} SHAKE_DIST_PX={thr:g} SHAKE_IDLE_MS={idle:g}  "
+              f"(miss {miss:.1%} of {shakes} shakes, {fpm:.2f} false/min, latency {lat:.0f} ms, "
+              f"{react:.2f} re-activations, linger {linger:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))